@@ -0,0 +1,154 @@
+"""
+Compara XML-RPC y JSON-RPC: tamaño del payload y tiempo de decodificación.
+
+Por defecto usa registros sintéticos con la forma de un `search_read` de
+`account.move.line`. Con `--live` descarga registros reales de v13 y mide
+además el tiempo total de la llamada con cada protocolo.
+
+Uso:
+    python bench_protocols.py [--records 2000] [--repeat 5] [--live]
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+import argparse
+import json
+import time
+import xmlrpc.client
+from typing import Callable
+
+
+LINE_FIELDS = [
+    'name', 'move_id', 'account_id', 'partner_id', 'product_id', 'debit',
+    'credit', 'quantity', 'price_unit', 'tax_ids', 'tax_line_id', 'date',
+]
+
+
+def synthetic_lines(count: int) -> list:
+    """Genera registros con la forma de account.move.line leídos por RPC."""
+    lines = []
+    for i in range(1, count + 1):
+        lines.append({
+            'id': i,
+            'name': f"Servicio mensual suscripción #{i}",
+            'move_id': [i // 3 + 1, f"VEN/{i // 3 + 1:06d}"],
+            'account_id': [700 + i % 7, f"70000{i % 7} Ventas de servicios"],
+            'partner_id': [1000 + i % 250, f"Cliente {1000 + i % 250}"],
+            'product_id': [50 + i % 20, f"[SRV{i % 20}] Servicio {i % 20}"] if i % 3 else False,
+            'debit': 0.0 if i % 2 else round(i * 1.21, 2),
+            'credit': round(i * 1.21, 2) if i % 2 else 0.0,
+            'quantity': 1.0,
+            'price_unit': round(i * 1.0, 2),
+            'tax_ids': [1, 2] if i % 3 else [],
+            'tax_line_id': False if i % 3 else [1, 'IVA 21%'],
+            'date': '2026-01-15',
+        })
+    return lines
+
+
+def encode_xmlrpc(records: list) -> bytes:
+    return xmlrpc.client.dumps((records,), methodresponse=True).encode('utf-8')
+
+
+def encode_jsonrpc(records: list) -> bytes:
+    return json.dumps({'jsonrpc': '2.0', 'id': 1, 'result': records}).encode('utf-8')
+
+
+def decode_xmlrpc(data: bytes) -> list:
+    return xmlrpc.client.loads(data)[0][0]
+
+
+def decode_jsonrpc(data: bytes) -> list:
+    return json.loads(data)['result']
+
+
+def best_time(func: Callable, arg, repeat: int) -> float:
+    """Retorna el mejor tiempo (segundos) de `repeat` ejecuciones."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_payload(records: list, repeat: int) -> dict:
+    """Mide tamaño y tiempos de codificación/decodificación por protocolo."""
+    results = {}
+    for name, encode, decode in (
+        ('xmlrpc', encode_xmlrpc, decode_xmlrpc),
+        ('jsonrpc', encode_jsonrpc, decode_jsonrpc),
+    ):
+        payload = encode(records)
+        results[name] = {
+            'bytes': len(payload),
+            'encode': best_time(encode, records, repeat),
+            'decode': best_time(decode, payload, repeat),
+        }
+    return results
+
+
+def bench_live(count: int, repeat: int) -> tuple:
+    """Descarga líneas reales de v13 con ambos protocolos y mide la llamada."""
+    from connections import get_odoo_v13
+
+    clients = {}
+    for protocol in ('xmlrpc', 'jsonrpc'):
+        clients[protocol] = get_odoo_v13(protocol)
+        clients[protocol].authenticate()
+
+    timings = {}
+    records = None
+    for protocol, client in clients.items():
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            records = client.search_read(
+                'account.move.line', [], fields=LINE_FIELDS, limit=count, order='id'
+            )
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        timings[protocol] = best
+    return records, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--live', action='store_true')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK XML-RPC vs JSON-RPC")
+    print("=" * 70)
+
+    if args.live:
+        records, timings = bench_live(args.records, args.repeat)
+        print(f"Registros reales de v13: {len(records)}")
+        print(f"\nLlamada completa search_read (mejor de {args.repeat}):")
+        for protocol, elapsed in timings.items():
+            print(f"  {protocol:8} {elapsed * 1000:10.1f} ms")
+    else:
+        records = synthetic_lines(args.records)
+        print(f"Registros sintéticos: {len(records)}")
+
+    results = bench_payload(records, args.repeat)
+
+    print(f"\n{'Protocolo':10} {'Bytes':>12} {'Codificar ms':>14} {'Decodificar ms':>16}")
+    for protocol, res in results.items():
+        print(
+            f"{protocol:10} {res['bytes']:>12,} "
+            f"{res['encode'] * 1000:>14.1f} {res['decode'] * 1000:>16.1f}"
+        )
+
+    xml, js = results['xmlrpc'], results['jsonrpc']
+    print(f"\nJSON-RPC / XML-RPC bytes: {js['bytes'] / xml['bytes']:.2f}")
+    print(f"Aceleración decodificación JSON-RPC: {xml['decode'] / js['decode']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Diario de puntos de control para reanudar migraciones largas.
+
+Si `migrate_invoices` o `fix_reconciliations` se interrumpen, la siguiente
+ejecución volvía a contar y a recorrer todos los registros de v13 desde el
+principio. `CheckpointJournal` guarda en un fichero de solo añadir (una línea
+JSON por evento) lo que ya está hecho:
+
+- `begin`: lote en curso (IDs de v13 que se están procesando)
+- `outcome`: resultado de un registro (migrated, skipped, pending o error)
+- `commit`: último ID de v13 procesado por completo; se escribe con fsync
+- `meta`: datos de la etapa que no hace falta volver a pedir (p. ej. el total)
+
+Al abrirlo se reproduce el fichero: la ejecución sigue después del último
+`commit` y vuelve a intentar los registros del lote que quedó a medias, los
+que terminaron con error y los que quedaron pendientes (dependen de
+registros que todavía no se han migrado). Una última línea cortada (el
+proceso murió a mitad de escritura) se ignora. Para empezar una etapa de cero
+basta con borrar su fichero.
+
+El avance solo vale para los datos con los que se guardó: `open_checkpoint`
+recibe un `scope` (dominio, servidores y bases de datos) y reinicia el diario
+si no coincide con el guardado.
+
+Uso:
+    >>> journal = open_checkpoint('invoices', scope={'domain': repr(domain)})
+    >>> for batch in pages(after_id=journal.last_id):
+    ...     journal.begin([r['id'] for r in batch])
+    ...     for record in batch:
+    ...         journal.record(record['id'], 'migrated', v18_id=...)
+    ...     journal.commit(batch[-1]['id'])
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+import json
+import os
+import threading
+from typing import Iterable, Optional
+
+
+CHECKPOINT_DIR = os.getenv('CHECKPOINT_DIR', '.checkpoints')
+
+MIGRATED = 'migrated'
+SKIPPED = 'skipped'
+PENDING = 'pending'
+ERROR = 'error'
+
+# Resultados que se vuelven a intentar en la siguiente ejecución
+RETRY_STATUSES = (PENDING, ERROR)
+
+
+class CheckpointJournal:
+    """
+    Diario de una etapa, seguro entre hilos.
+
+    Sin fichero (`path=None`) funciona solo en memoria, para poder usarlo
+    siempre aunque los puntos de control estén desactivados.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Abre (o crea) el diario y reproduce sus eventos.
+
+        Args:
+            path: Fichero JSON lines, o None para no guardar nada
+        """
+        self.path = path
+        self.last_id = 0
+        self.meta: dict = {}
+        self.outcomes: dict = {}     # v13_id -> evento 'outcome'
+        self.in_flight: list = []    # IDs del último lote sin commit
+        self._lock = threading.Lock()
+        self._file = None
+
+        if path:
+            self._replay(path)
+            self._file = open(path, 'a')
+
+    def _replay(self, path: str):
+        try:
+            with open(path, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            kind = event.get('type')
+            if kind == 'begin':
+                self.in_flight = event['ids']
+            elif kind == 'outcome':
+                self.outcomes[event['v13_id']] = event
+            elif kind == 'commit':
+                self.last_id = max(self.last_id, event['last_id'])
+                self.in_flight = []
+            elif kind == 'meta':
+                self.meta.update(event['values'])
+
+    def _write(self, event: dict, sync: bool = False):
+        if self._file is None:
+            return
+        self._file.write(json.dumps(event) + '\n')
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def set_meta(self, **values):
+        """Guarda datos de la etapa para la siguiente ejecución."""
+        with self._lock:
+            self.meta.update(values)
+            self._write({'type': 'meta', 'values': values}, sync=True)
+
+    def begin(self, ids: Iterable[int]):
+        """Marca el comienzo de un lote."""
+        with self._lock:
+            self.in_flight = list(ids)
+            self._write({'type': 'begin', 'ids': self.in_flight})
+
+    def record(
+        self,
+        v13_id: int,
+        status: str,
+        v18_id: Optional[int] = None,
+        error: Optional[str] = None
+    ):
+        """
+        Registra el resultado de un registro.
+
+        Args:
+            v13_id: ID del registro en v13
+            status: MIGRATED, SKIPPED, PENDING o ERROR
+            v18_id: (Opcional) ID creado en v18
+            error: (Opcional) Mensaje de error
+        """
+        event = {'type': 'outcome', 'v13_id': v13_id, 'status': status}
+        if v18_id:
+            event['v18_id'] = v18_id
+        if error:
+            event['error'] = error
+        with self._lock:
+            self.outcomes[v13_id] = event
+            self._write(event)
+
+    def commit(self, last_id: int):
+        """
+        Marca como terminados todos los registros hasta `last_id` (incluido).
+
+        Es el punto desde el que sigue la siguiente ejecución; se escribe en
+        disco con fsync junto con los resultados anteriores.
+        """
+        with self._lock:
+            self.last_id = max(self.last_id, last_id)
+            self.in_flight = []
+            self._write({'type': 'commit', 'last_id': self.last_id}, sync=True)
+
+    def retry_ids(self) -> list:
+        """
+        IDs anteriores al último commit que hay que volver a procesar: los
+        del lote que quedó a medias y los que terminaron con error o
+        pendientes.
+        """
+        with self._lock:
+            ids = set(self.in_flight)
+            ids.update(
+                v13_id
+                for v13_id, event in self.outcomes.items()
+                if event['status'] in RETRY_STATUSES
+            )
+        return sorted(v13_id for v13_id in ids if v13_id <= self.last_id)
+
+    def done_count(self) -> int:
+        """Registros terminados (sin error ni pendientes) hasta el último commit."""
+        with self._lock:
+            return sum(
+                1
+                for v13_id, event in self.outcomes.items()
+                if v13_id <= self.last_id and event['status'] not in RETRY_STATUSES
+            )
+
+    def reset(self):
+        """Olvida todo lo registrado y vacía el fichero."""
+        with self._lock:
+            self.last_id = 0
+            self.meta = {}
+            self.outcomes = {}
+            self.in_flight = []
+            if self._file is not None:
+                self._file.truncate(0)
+                self._file.seek(0)
+
+    def close(self):
+        """Cierra el fichero."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<CheckpointJournal {self.path or '(memoria)'} last_id={self.last_id} "
+            f"outcomes={len(self.outcomes)}>"
+        )
+
+
+def open_checkpoint(stage: str, scope: Optional[dict] = None) -> CheckpointJournal:
+    """
+    Abre el diario de una etapa en CHECKPOINT_DIR (vacío = solo en memoria).
+
+    Args:
+        stage: Nombre de la etapa, p. ej. 'invoices' o 'reconciliations'
+        scope: (Opcional) Datos de los que depende el avance (dominio,
+               servidores y bases de datos). Si no coinciden con los
+               guardados, el diario se vacía y se empieza de cero.
+    """
+    if not CHECKPOINT_DIR:
+        journal = CheckpointJournal()
+    else:
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        journal = CheckpointJournal(os.path.join(CHECKPOINT_DIR, f"{stage}.jsonl"))
+    if scope is not None and journal.meta.get('scope') != scope:
+        journal.reset()
+        journal.set_meta(scope=scope)
+    return journal
@@ -1,23 +1,74 @@
 """
 Conexiones preconfiguradas a Odoo v13 y v18.
 
+`odoo_v13` y `odoo_v18` se crean la primera vez que se usan, e importar este
+módulo no hace ninguna petición de red. El UID autenticado se guarda en disco
+(ODOO_AUTH_CACHE_FILE) para que los siguientes scripts no repitan
+`authenticate()` mientras no caduque (ODOO_AUTH_CACHE_TTL segundos).
+
 Autor: andyengit
 Mantenedor: andyengit
 """
+import atexit
 import os
+import threading
+from typing import Callable, Optional
 from dotenv import load_dotenv
+from odoo_cache import AuthCache
 from odoo_client import OdooClient, OdooClientReadOnlyError
+from odoo_concurrency import AdaptiveConcurrency
+from odoo_metrics import RpcMetrics
 
 load_dotenv()
 
+# Conexiones HTTP keep-alive por servidor que pueden usar los hilos a la vez
+POOL_SIZE = int(os.getenv('ODOO_POOL_SIZE', '4'))
+
+# Tamaño máximo de listas de IDs / valores 'in' por petición, y cuántos
+# trozos se piden en paralelo
+CHUNK_SIZE = int(os.getenv('ODOO_CHUNK_SIZE', '1000'))
+CHUNK_WORKERS = int(os.getenv('ODOO_CHUNK_WORKERS', '1'))
+
+# Caché de registros del cliente v13 (solo lectura). 0 = desactivada.
+# V13_CACHE_FILE permite guardarla en disco al terminar y reutilizarla.
+V13_CACHE_SIZE = int(os.getenv('V13_CACHE_SIZE', '0'))
+V13_CACHE_FILE = os.getenv('V13_CACHE_FILE')
+
+# Protocolo RPC: 'xmlrpc' o 'jsonrpc'. V13_PROTOCOL / V18_PROTOCOL lo
+# sobrescriben para un servidor concreto.
+PROTOCOL = os.getenv('ODOO_PROTOCOL', 'xmlrpc')
+
+# Caché en disco del UID autenticado (vacío = desactivada)
+AUTH_CACHE_FILE = os.getenv('ODOO_AUTH_CACHE_FILE', '.odoo_auth_cache.json')
+AUTH_CACHE_TTL = int(os.getenv('ODOO_AUTH_CACHE_TTL', '3600'))
+auth_cache = AuthCache(AUTH_CACHE_FILE, AUTH_CACHE_TTL) if AUTH_CACHE_FILE else None
+
+# Concurrencia adaptativa (AIMD): si ODOO_ADAPTIVE_CONCURRENCY=1, las llamadas
+# de odoo_v13/odoo_v18 se limitan por servidor y por lecturas/escrituras,
+# hasta ODOO_MAX_READ_CONCURRENCY / ODOO_MAX_WRITE_CONCURRENCY en vuelo
+ADAPTIVE_CONCURRENCY = os.getenv('ODOO_ADAPTIVE_CONCURRENCY', '0') == '1'
+concurrency = AdaptiveConcurrency(limits={
+    'read': {'max_limit': int(os.getenv('ODOO_MAX_READ_CONCURRENCY', '16'))},
+    'write': {'max_limit': int(os.getenv('ODOO_MAX_WRITE_CONCURRENCY', '8'))},
+})
+
+# Métricas RPC: si se define alguno de estos ficheros, se registran todas las
+# llamadas de odoo_v13/odoo_v18 y se vuelcan al terminar el script
+METRICS_JSON = os.getenv('ODOO_METRICS_JSON')
+METRICS_PROM = os.getenv('ODOO_METRICS_PROM')
 
-def get_odoo_v13() -> OdooClient:
+
+def get_odoo_v13(protocol: Optional[str] = None) -> OdooClient:
     """
     Retorna un cliente de Odoo v13 configurado como SOLO LECTURA.
     
     Este cliente está diseñado para consultar datos del sistema origen,
     no permite operaciones de escritura (create, write, unlink).
     
+    Args:
+        protocol: (Opcional) 'xmlrpc' o 'jsonrpc'. Por defecto V13_PROTOCOL
+                  u ODOO_PROTOCOL.
+    
     Returns:
         OdooClient configurado para Odoo v13 en modo readonly
     """
@@ -26,17 +77,28 @@ def get_odoo_v13() -> OdooClient:
         db=os.getenv('V13_DB', 'odoo13'),
         username=os.getenv('V13_USERNAME', 'admin'),
         password=os.getenv('V13_PASSWORD', 'admin'),
-        readonly=True
+        readonly=True,
+        pool_size=POOL_SIZE,
+        protocol=protocol or os.getenv('V13_PROTOCOL', PROTOCOL),
+        chunk_size=CHUNK_SIZE,
+        chunk_workers=CHUNK_WORKERS,
+        cache_size=V13_CACHE_SIZE,
+        cache_path=V13_CACHE_FILE,
+        auth_cache=auth_cache
     )
 
 
-def get_odoo_v18() -> OdooClient:
+def get_odoo_v18(protocol: Optional[str] = None) -> OdooClient:
     """
     Retorna un cliente de Odoo v18 con permisos de lectura/escritura.
     
     Este cliente está diseñado para el sistema destino,
     permite todas las operaciones incluyendo escritura.
     
+    Args:
+        protocol: (Opcional) 'xmlrpc' o 'jsonrpc'. Por defecto V18_PROTOCOL
+                  u ODOO_PROTOCOL.
+    
     Returns:
         OdooClient configurado para Odoo v18 con permisos completos
     """
@@ -45,18 +107,81 @@ def get_odoo_v18() -> OdooClient:
         db=os.getenv('V18_DB', 'odoo18'),
         username=os.getenv('V18_USERNAME', 'admin'),
         password=os.getenv('V18_PASSWORD', 'admin'),
-        readonly=False
+        readonly=False,
+        pool_size=POOL_SIZE,
+        protocol=protocol or os.getenv('V18_PROTOCOL', PROTOCOL),
+        chunk_size=CHUNK_SIZE,
+        chunk_workers=CHUNK_WORKERS,
+        auth_cache=auth_cache
     )
 
 
-odoo_v13 = get_odoo_v13()
-odoo_v18 = get_odoo_v18()
+class LazyOdooClient:
+    """
+    Proxy que crea el `OdooClient` real la primera vez que se accede a él.
+    
+    Permite importar `odoo_v13` / `odoo_v18` sin coste: el cliente (y la
+    carga de su caché en disco, si la tiene) se crea al primer uso.
+    """
+    
+    def __init__(self, factory: Callable[[], OdooClient]):
+        self._factory = factory
+        self._client: Optional[OdooClient] = None
+        self._lock = threading.Lock()
+    
+    def get_client(self) -> OdooClient:
+        """Retorna el cliente real, creándolo si todavía no existe."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+    
+    def __getattr__(self, name):
+        return getattr(self.get_client(), name)
+    
+    def __repr__(self) -> str:
+        if self._client is None:
+            return "<LazyOdooClient (sin crear)>"
+        return repr(self._client)
+
+
+rpc_metrics = RpcMetrics()
+
+
+def _dump_metrics():
+    """Vuelca las métricas RPC a los ficheros configurados."""
+    if METRICS_JSON:
+        rpc_metrics.dump_json(METRICS_JSON)
+    if METRICS_PROM:
+        rpc_metrics.dump_prometheus(METRICS_PROM)
+
+
+def _setup_client(client: OdooClient) -> OdooClient:
+    """Conecta métricas, concurrencia y guardado de caché al crear un cliente."""
+    if ADAPTIVE_CONCURRENCY:
+        client.set_limiter(concurrency)
+    if METRICS_JSON or METRICS_PROM:
+        rpc_metrics.install(client)
+    if client.cache_stats() is not None and V13_CACHE_FILE:
+        atexit.register(client.save_cache)
+    return client
+
+
+odoo_v13 = LazyOdooClient(lambda: _setup_client(get_odoo_v13()))
+odoo_v18 = LazyOdooClient(lambda: _setup_client(get_odoo_v18()))
+
+if METRICS_JSON or METRICS_PROM:
+    atexit.register(_dump_metrics)
 
 __all__ = [
     'odoo_v13',
     'odoo_v18',
     'get_odoo_v13',
     'get_odoo_v18',
+    'rpc_metrics',
+    'concurrency',
+    'LazyOdooClient',
     'OdooClient',
     'OdooClientReadOnlyError'
 ]
@@ -5,6 +5,7 @@ import os
 import json
 from dotenv import load_dotenv
 from connections import odoo_v13, odoo_v18
+from reference_data import invalidate_reference_data
 
 load_dotenv()
 
@@ -66,6 +67,9 @@ try:
     new_id = odoo_v18.create('account.account', vals)
     print(f"✓ Cuenta creada con ID: {new_id}")
     
+    # La instantánea de datos de referencia no tiene la cuenta nueva
+    invalidate_reference_data()
+    
     # Actualizar mappings.json
     with open(MAPPINGS_FILE, 'r') as f:
         mappings = json.load(f)
@@ -6,6 +6,7 @@ import os
 import json
 from dotenv import load_dotenv
 from connections import odoo_v13, odoo_v18
+from reference_data import invalidate_reference_data
 
 load_dotenv()
 
@@ -156,6 +157,8 @@ def main():
     # Guardar cambios
     if created_count > 0:
         save_mappings(mappings)
+        # La instantánea de datos de referencia no tiene los diarios nuevos
+        invalidate_reference_data()
         print(f"\n✓ Se crearon {created_count} diarios y se actualizó {MAPPINGS_FILE}")
     else:
         print("\nNo se crearon diarios.")
@@ -4,7 +4,53 @@ Crea los contactos faltantes en v18 basándose en v13.
 """
 
 from connections import odoo_v13, odoo_v18
-from migration_utils import get_v18_id
+from migration_utils import create_with_tracking, get_v18_id
+from reference_data import get_reference_data
+
+
+def partner_vals(partner, reference):
+    """Valores en v18 de un partner de v13."""
+    vals = {
+        'name': partner['name'],
+        'is_company': partner['is_company'],
+        'email': partner.get('email') or False,
+        'phone': partner.get('phone') or False,
+        'mobile': partner.get('mobile') or False,
+        'vat': partner.get('vat') or False,
+        'street': partner.get('street') or False,
+        'street2': partner.get('street2') or False,
+        'city': partner.get('city') or False,
+        'zip': partner.get('zip') or False,
+        'comment': partner.get('comment') or False,
+        'website': partner.get('website') or False,
+        'lang': partner.get('lang') or False,
+    }
+
+    # Mapear país por su código (si no tiene equivalente, España)
+    if partner.get('country_id'):
+        country_v18_id = (
+            reference.v18_id('res.country', partner['country_id'][0])
+            or reference.country_id('ES')
+        )
+        if country_v18_id:
+            vals['country_id'] = country_v18_id
+
+    # Mapear estado/provincia por país y código, o por nombre
+    if partner.get('state_id'):
+        state_v18_id = (
+            reference.v18_id('res.country.state', partner['state_id'][0])
+            or reference.state_id(partner['state_id'][1])
+        )
+        if state_v18_id:
+            vals['state_id'] = state_v18_id
+
+    # Mapear parent si existe
+    if partner.get('parent_id'):
+        parent_v18_id = get_v18_id(partner['parent_id'][0], 'res.partner')
+        if parent_v18_id:
+            vals['parent_id'] = parent_v18_id
+    
+    return vals
 
 
 def create_missing_partners():
@@ -42,72 +88,41 @@ def create_missing_partners():
     )
     
     print(f"\nCreando {len(partners_v13)} contactos...")
+    reference = get_reference_data()
     
     created = 0
-    for partner in partners_v13:
-        try:
-            # Preparar valores
-            vals = {
-                'name': partner['name'],
-                'is_company': partner['is_company'],
-                'email': partner.get('email') or False,
-                'phone': partner.get('phone') or False,
-                'mobile': partner.get('mobile') or False,
-                'vat': partner.get('vat') or False,
-                'street': partner.get('street') or False,
-                'street2': partner.get('street2') or False,
-                'city': partner.get('city') or False,
-                'zip': partner.get('zip') or False,
-                'comment': partner.get('comment') or False,
-                'website': partner.get('website') or False,
-                'lang': partner.get('lang') or False,
-            }
-            
-            # Mapear país
-            if partner.get('country_id'):
-                countries = odoo_v18.search_read(
-                    'res.country',
-                    [('code', '=', 'ES')],  # Asumimos España
-                    fields=['id'],
-                    limit=1
-                )
-                if countries:
-                    vals['country_id'] = countries[0]['id']
-            
-            # Mapear estado/provincia si existe
-            if partner.get('state_id'):
-                state_name = partner['state_id'][1]
-                states = odoo_v18.search_read(
-                    'res.country.state',
-                    [('name', 'ilike', state_name)],
-                    fields=['id'],
-                    limit=1
-                )
-                if states:
-                    vals['state_id'] = states[0]['id']
-            
-            # Mapear parent si existe
-            if partner.get('parent_id'):
-                parent_v18_id = get_v18_id(partner['parent_id'][0], 'res.partner')
-                if parent_v18_id:
-                    vals['parent_id'] = parent_v18_id
-            
-            # Crear en v18
-            new_id = odoo_v18.create('res.partner', vals)
-            
-            # Registrar en tracking
-            odoo_v18.create('migration.tracking', {
-                'name': f"res.partner:{partner['id']}",
-                'model_name': 'res.partner',
-                'v13_id': partner['id'],
-                'v18_id': new_id,
-            })
-            
-            created += 1
-            print(f"  ✓ {partner['name']} (v13:{partner['id']} -> v18:{new_id})")
-            
-        except Exception as e:
-            print(f"  ✗ {partner['name']}: {str(e)[:80]}")
+    remaining = list(partners_v13)
+    while remaining:
+        # Primero los partners cuyo padre no está por crear; sus hijos, en la
+        # siguiente vuelta, cuando el padre ya tiene ID en v18
+        remaining_ids = {partner['id'] for partner in remaining}
+        ready = [
+            partner for partner in remaining
+            if not partner.get('parent_id')
+            or partner['parent_id'][0] not in remaining_ids
+        ] or remaining
+        remaining = [partner for partner in remaining if partner not in ready]
+        
+        batch = []
+        for partner in ready:
+            try:
+                batch.append((partner, partner_vals(partner, reference)))
+            except Exception as e:
+                print(f"  ✗ {partner['name']}: {str(e)[:80]}")
+        
+        # Crear el lote con su tracking en una sola llamada y transacción
+        results = create_with_tracking(
+            'create_partners_xmlrpc',
+            [vals for _, vals in batch],
+            [partner['id'] for partner, _ in batch],
+            'res.partner',
+        )
+        for (partner, _), (new_id, error) in zip(batch, results):
+            if error:
+                print(f"  ✗ {partner['name']}: {error[:80]}")
+            else:
+                created += 1
+                print(f"  ✓ {partner['name']} (v13:{partner['id']} -> v18:{new_id})")
     
     print(f"\n✅ Creados: {created}/{len(partners_v13)}")
 
@@ -2,7 +2,8 @@ import os
 import json
 from dotenv import load_dotenv
 from connections import odoo_v13, odoo_v18
-from migrate_invoices import load_mappings, get_account_v18_id, get_tax_v18_id
+from line_matcher import REASON_LABELS, match_lines
+from migrate_invoices import load_mappings, line_descriptors
 
 load_dotenv()
 
@@ -60,51 +61,21 @@ def debug_invoice(invoice_name):
     # 5. Simulate Matching
     print("\nSIMULATING MATCHING:")
     mappings = load_mappings()
+    descriptors = line_descriptors(other_lines_v13, mappings)
+    result = match_lines(descriptors, lines_v18)
 
-    for line_v18 in lines_v18:
+    for line_v18, line_v13 in result.matches:
         print(
-            f"\nMatching v18 Line [{line_v18['id']}] Dr:{line_v18['debit']} Cr:{line_v18['credit']} Acc:{line_v18['account_id'][1]}"
+            f"  v18 Line [{line_v18['id']}] Dr:{line_v18['debit']} Cr:{line_v18['credit']} -> v13 Line [{line_v13['id']}] MATCH FOUND!"
+        )
+    for line_v18, reason in result.unmatched_v18:
+        print(
+            f"  v18 Line [{line_v18['id']}] Dr:{line_v18['debit']} Cr:{line_v18['credit']} Acc:{line_v18['account_id'][1]} -> NO MATCH ({REASON_LABELS[reason]})"
+        )
+    for line_v13, reason in result.unmatched_v13:
+        print(
+            f"  v13 Line [{line_v13['id']}] Dr:{line_v13['debit']} Cr:{line_v13['credit']} AccID(v18):{line_v13['account_id']} -> UNUSED ({REASON_LABELS[reason]})"
         )
-        match = None
-        for line_v13 in other_lines_v13:
-            print(
-                f"  vs v13 Line [{line_v13['id']}] Dr:{line_v13['debit']} Cr:{line_v13['credit']} Acc:{line_v13['account_id'][1]}"
-            )
-
-            # Check Account
-            acc_v18_id = get_account_v18_id(mappings, line_v13["account_id"][0])
-            if acc_v18_id != line_v18["account_id"][0]:
-                print(
-                    f"    -> Mismatch Account: Expected {acc_v18_id} got {line_v18['account_id'][0]}"
-                )
-                continue
-
-            # Check Amount
-            if (
-                abs(line_v13["debit"] - line_v18["debit"]) > 0.01
-                or abs(line_v13["credit"] - line_v18["credit"]) > 0.01
-            ):
-                print(f"    -> Mismatch Amount")
-                continue
-
-            # Check Tax
-            if line_v18.get("tax_line_id"):
-                if not line_v13.get("tax_line_id"):
-                    print(f"    -> Mismatch Tax: v18 has tax, v13 none")
-                    continue
-                tax_v18_id = get_tax_v18_id(mappings, line_v13["tax_line_id"][0])
-                if tax_v18_id != line_v18["tax_line_id"][0]:
-                    print(
-                        f"    -> Mismatch TaxID: Expected {tax_v18_id} got {line_v18['tax_line_id'][0]}"
-                    )
-                    continue
-
-            print("    -> MATCH FOUND!")
-            match = line_v13
-            break
-
-        if match:
-            other_lines_v13.remove(match)
 
 
 if __name__ == "__main__":
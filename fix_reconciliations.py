@@ -4,9 +4,11 @@ Script para crear conciliaciones precisas basadas en montos exactos.
 """
 
 import os
+from itertools import chain
 from dotenv import load_dotenv
+from checkpoint import ERROR, MIGRATED, PENDING, SKIPPED, open_checkpoint
 from connections import odoo_v13, odoo_v18
-from migration_utils import get_v18_id
+from migration_utils import IdMap, databases, get_v18_id, load_id_map
 
 load_dotenv()
 
@@ -15,44 +17,22 @@ START_DATE = os.getenv('MIGRATION_START_DATE', '2026-01-01')
 
 
 def build_move_mapping():
-    """Construir mapeo completo de moves v13 -> v18."""
+    """Construir mapeo completo de moves v13 -> v18 (IdMap compacto)."""
     print("Construyendo mapeo de moves...")
     
-    # Facturas
-    invoice_tracking = odoo_v18.search_read(
-        'migration.tracking',
-        [('model_name', '=', 'account.move')],
-        fields=['v13_id', 'v18_id']
-    )
-    
-    # Asientos entry
-    entry_tracking = odoo_v18.search_read(
-        'migration.tracking',
-        [('model_name', '=', 'account.move.entry')],
-        fields=['v13_id', 'v18_id']
-    )
+    # Facturas y asientos entry
+    move_pairs = [
+        load_id_map('account.move').items(),
+        load_id_map('account.move.entry').items(),
+    ]
     
     # Pagos - necesitamos el move_id asociado
-    payment_tracking = odoo_v18.search_read(
-        'migration.tracking',
-        [('model_name', '=', 'account.payment')],
-        fields=['v13_id', 'v18_id']
-    )
-    
-    move_map = {}
-    
-    # Agregar facturas y entries
-    for t in invoice_tracking:
-        move_map[t['v13_id']] = t['v18_id']
-    for t in entry_tracking:
-        move_map[t['v13_id']] = t['v18_id']
+    payment_v13_to_v18 = load_id_map('account.payment')
     
     # Para pagos, necesitamos mapear move_id de v13 a move_id de v18
-    if payment_tracking:
-        payment_v13_to_v18 = {t['v13_id']: t['v18_id'] for t in payment_tracking}
-        
+    if payment_v13_to_v18:
         # Obtener move_ids de pagos en v18
-        v18_payment_ids = list(payment_v13_to_v18.values())
+        v18_payment_ids = list(payment_v13_to_v18.values)
         v18_payments = odoo_v18.search_read(
             'account.payment',
             [('id', 'in', v18_payment_ids)],
@@ -60,217 +40,321 @@ def build_move_mapping():
         )
         v18_payment_to_move = {p['id']: p['move_id'][0] for p in v18_payments if p['move_id']}
         
-        # Obtener move_ids de pagos en v13
-        v13_payment_ids = list(payment_v13_to_v18.keys())
-        for batch_start in range(0, len(v13_payment_ids), 100):
-            batch = v13_payment_ids[batch_start:batch_start + 100]
-            lines = odoo_v13.search_read(
-                'account.move.line',
-                [('payment_id', 'in', batch)],
-                fields=['move_id', 'payment_id']
-            )
-            for l in lines:
-                v13_move_id = l['move_id'][0]
-                v13_payment_id = l['payment_id'][0]
-                v18_payment_id = payment_v13_to_v18.get(v13_payment_id)
-                if v18_payment_id:
-                    v18_move_id = v18_payment_to_move.get(v18_payment_id)
-                    if v18_move_id:
-                        move_map[v13_move_id] = v18_move_id
+        # Obtener move_ids de pagos en v13 (el cliente divide la lista en lotes)
+        v13_payment_ids = list(payment_v13_to_v18.keys)
+        lines = odoo_v13.search_read(
+            'account.move.line',
+            [('payment_id', 'in', v13_payment_ids)],
+            fields=['move_id', 'payment_id']
+        )
+        payment_moves = []
+        for l in lines:
+            v13_move_id = l['move_id'][0]
+            v13_payment_id = l['payment_id'][0]
+            v18_payment_id = payment_v13_to_v18.get(v13_payment_id)
+            if v18_payment_id:
+                v18_move_id = v18_payment_to_move.get(v18_payment_id)
+                if v18_move_id:
+                    payment_moves.append((v13_move_id, v18_move_id))
+        move_pairs.append(payment_moves)
+    
+    move_map = IdMap.from_pairs(chain.from_iterable(move_pairs))
     
     print(f"  Total moves mapeados: {len(move_map)}")
     return move_map
 
 
-def fix_reconciliations():
-    """Crear conciliaciones precisas basadas en montos exactos."""
-    print("=" * 70)
-    print("CORRECCIÓN DE CONCILIACIONES")
-    print("=" * 70)
+def has_reconciled_lines(move_id):
+    """Indica si el asiento de v18 tiene líneas por cobrar/pagar ya conciliadas."""
+    return odoo_v18.search_count(
+        'account.move.line',
+        [
+            ('move_id', '=', move_id),
+            ('account_type', 'in', ['asset_receivable', 'liability_payable']),
+            ('reconciled', '=', True)
+        ]
+    ) > 0
+
+
+def fix_reconciliation(rec, move_map):
+    """
+    Concilia en v18 las líneas equivalentes a una conciliación parcial de v13.
     
-    move_map = build_move_mapping()
+    Returns:
+        tuple: (estado, mensaje de error). El estado es MIGRATED si se
+        concilió, SKIPPED si ya estaba conciliada (también si en v18 sus
+        líneas por cobrar/pagar ya están conciliadas), PENDING si sus
+        asientos todavía no están migrados o no tienen líneas que conciliar
+        en v18 (se reintenta en la siguiente ejecución), ERROR, o None si el
+        error se ignora.
+    """
+    amount = rec['amount']
     
-    # Obtener todas las conciliaciones de v13
-    reconciles_v13 = odoo_v13.search_read(
-        'account.partial.reconcile',
-        [
-            ('create_date', '>=', START_DATE),
-            ('company_id', '=', COMPANY_ID)
-        ],
-        fields=['id', 'debit_move_id', 'credit_move_id', 'amount'],
-        order='id ASC'
+    # Obtener info de líneas en v13
+    debit_line_v13 = odoo_v13.search_read(
+        'account.move.line',
+        [('id', '=', rec['debit_move_id'][0])],
+        fields=['move_id', 'debit', 'credit', 'partner_id']
+    )
+    credit_line_v13 = odoo_v13.search_read(
+        'account.move.line',
+        [('id', '=', rec['credit_move_id'][0])],
+        fields=['move_id', 'debit', 'credit', 'partner_id']
     )
     
-    print(f"Total conciliaciones en v13: {len(reconciles_v13)}")
+    if not debit_line_v13 or not credit_line_v13:
+        return PENDING, None
     
-    created = 0
-    skipped = 0
-    errors = []
+    debit_line_v13 = debit_line_v13[0]
+    credit_line_v13 = credit_line_v13[0]
     
-    for i, rec in enumerate(reconciles_v13):
-        if i > 0 and i % 200 == 0:
-            print(f"  Procesando {i}/{len(reconciles_v13)}... (creadas: {created})")
-        
-        try:
-            amount = rec['amount']
-            
-            # Obtener info de líneas en v13
-            debit_line_v13 = odoo_v13.search_read(
-                'account.move.line',
-                [('id', '=', rec['debit_move_id'][0])],
-                fields=['move_id', 'debit', 'credit', 'partner_id']
-            )
-            credit_line_v13 = odoo_v13.search_read(
-                'account.move.line',
-                [('id', '=', rec['credit_move_id'][0])],
-                fields=['move_id', 'debit', 'credit', 'partner_id']
-            )
-            
-            if not debit_line_v13 or not credit_line_v13:
-                skipped += 1
-                continue
-            
-            debit_line_v13 = debit_line_v13[0]
-            credit_line_v13 = credit_line_v13[0]
-            
-            debit_move_v13 = debit_line_v13['move_id'][0]
-            credit_move_v13 = credit_line_v13['move_id'][0]
-            
-            # Buscar moves en v18
-            debit_move_v18 = move_map.get(debit_move_v13)
-            credit_move_v18 = move_map.get(credit_move_v13)
-            
-            if not debit_move_v18 or not credit_move_v18:
-                skipped += 1
-                continue
-            
-            # Buscar línea de débito en v18 con monto exacto y partner
-            debit_amount = debit_line_v13['debit']  # El monto del débito original
-            
-            # Primero intentar con monto exacto + partner
-            debit_partner_v18 = None
-            if debit_line_v13.get('partner_id'):
-                debit_partner_v18 = get_v18_id(debit_line_v13['partner_id'][0], 'res.partner')
-            
-            domain_debit = [
+    debit_move_v13 = debit_line_v13['move_id'][0]
+    credit_move_v13 = credit_line_v13['move_id'][0]
+    
+    # Buscar moves en v18
+    debit_move_v18 = move_map.get(debit_move_v13)
+    credit_move_v18 = move_map.get(credit_move_v13)
+    
+    if not debit_move_v18 or not credit_move_v18:
+        return PENDING, None
+    
+    # Buscar línea de débito en v18 con monto exacto y partner
+    debit_amount = debit_line_v13['debit']  # El monto del débito original
+    
+    # Primero intentar con monto exacto + partner
+    debit_partner_v18 = None
+    if debit_line_v13.get('partner_id'):
+        debit_partner_v18 = get_v18_id(debit_line_v13['partner_id'][0], 'res.partner')
+    
+    domain_debit = [
+        ('move_id', '=', debit_move_v18),
+        ('account_type', 'in', ['asset_receivable', 'liability_payable']),
+        ('debit', '=', debit_amount),
+        ('reconciled', '=', False)
+    ]
+    if debit_partner_v18:
+        domain_debit.append(('partner_id', '=', debit_partner_v18))
+    
+    debit_lines_v18 = odoo_v18.search_read(
+        'account.move.line',
+        domain_debit,
+        fields=['id', 'debit', 'credit', 'amount_residual']
+    )
+    
+    # Si no hay match, intentar sin partner
+    if not debit_lines_v18 and debit_partner_v18:
+        debit_lines_v18 = odoo_v18.search_read(
+            'account.move.line',
+            [
                 ('move_id', '=', debit_move_v18),
                 ('account_type', 'in', ['asset_receivable', 'liability_payable']),
                 ('debit', '=', debit_amount),
                 ('reconciled', '=', False)
-            ]
-            if debit_partner_v18:
-                domain_debit.append(('partner_id', '=', debit_partner_v18))
-            
-            debit_lines_v18 = odoo_v18.search_read(
-                'account.move.line',
-                domain_debit,
-                fields=['id', 'debit', 'credit', 'amount_residual']
-            )
-            
-            # Si no hay match, intentar sin partner
-            if not debit_lines_v18 and debit_partner_v18:
-                debit_lines_v18 = odoo_v18.search_read(
-                    'account.move.line',
-                    [
-                        ('move_id', '=', debit_move_v18),
-                        ('account_type', 'in', ['asset_receivable', 'liability_payable']),
-                        ('debit', '=', debit_amount),
-                        ('reconciled', '=', False)
-                    ],
-                    fields=['id', 'debit', 'credit', 'amount_residual']
-                )
-            
-            # Si no hay match exacto, buscar por residual
-            if not debit_lines_v18:
-                debit_lines_v18 = odoo_v18.search_read(
-                    'account.move.line',
-                    [
-                        ('move_id', '=', debit_move_v18),
-                        ('account_type', 'in', ['asset_receivable', 'liability_payable']),
-                        ('reconciled', '=', False),
-                        ('amount_residual', '>', 0)
-                    ],
-                    fields=['id', 'debit', 'credit', 'amount_residual'],
-                    limit=1
-                )
-            
-            # Buscar línea de crédito en v18 con monto exacto y partner
-            credit_amount = credit_line_v13['credit']  # El monto del crédito original
-            
-            # Primero intentar con monto exacto + partner
-            credit_partner_v18 = None
-            if credit_line_v13.get('partner_id'):
-                credit_partner_v18 = get_v18_id(credit_line_v13['partner_id'][0], 'res.partner')
-            
-            domain_credit = [
+            ],
+            fields=['id', 'debit', 'credit', 'amount_residual']
+        )
+    
+    # Si no hay match exacto, buscar por residual
+    if not debit_lines_v18:
+        debit_lines_v18 = odoo_v18.search_read(
+            'account.move.line',
+            [
+                ('move_id', '=', debit_move_v18),
+                ('account_type', 'in', ['asset_receivable', 'liability_payable']),
+                ('reconciled', '=', False),
+                ('amount_residual', '>', 0)
+            ],
+            fields=['id', 'debit', 'credit', 'amount_residual'],
+            limit=1
+        )
+    
+    # Buscar línea de crédito en v18 con monto exacto y partner
+    credit_amount = credit_line_v13['credit']  # El monto del crédito original
+    
+    # Primero intentar con monto exacto + partner
+    credit_partner_v18 = None
+    if credit_line_v13.get('partner_id'):
+        credit_partner_v18 = get_v18_id(credit_line_v13['partner_id'][0], 'res.partner')
+    
+    domain_credit = [
+        ('move_id', '=', credit_move_v18),
+        ('account_type', 'in', ['asset_receivable', 'liability_payable']),
+        ('credit', '=', credit_amount),
+        ('reconciled', '=', False)
+    ]
+    if credit_partner_v18:
+        domain_credit.append(('partner_id', '=', credit_partner_v18))
+    
+    credit_lines_v18 = odoo_v18.search_read(
+        'account.move.line',
+        domain_credit,
+        fields=['id', 'debit', 'credit', 'amount_residual']
+    )
+    
+    # Si no hay match, intentar sin partner
+    if not credit_lines_v18 and credit_partner_v18:
+        credit_lines_v18 = odoo_v18.search_read(
+            'account.move.line',
+            [
                 ('move_id', '=', credit_move_v18),
                 ('account_type', 'in', ['asset_receivable', 'liability_payable']),
                 ('credit', '=', credit_amount),
                 ('reconciled', '=', False)
-            ]
-            if credit_partner_v18:
-                domain_credit.append(('partner_id', '=', credit_partner_v18))
-            
-            credit_lines_v18 = odoo_v18.search_read(
-                'account.move.line',
-                domain_credit,
-                fields=['id', 'debit', 'credit', 'amount_residual']
-            )
-            
-            # Si no hay match, intentar sin partner
-            if not credit_lines_v18 and credit_partner_v18:
-                credit_lines_v18 = odoo_v18.search_read(
-                    'account.move.line',
-                    [
-                        ('move_id', '=', credit_move_v18),
-                        ('account_type', 'in', ['asset_receivable', 'liability_payable']),
-                        ('credit', '=', credit_amount),
-                        ('reconciled', '=', False)
-                    ],
-                    fields=['id', 'debit', 'credit', 'amount_residual']
-                )
-            
-            # Si no hay match exacto, buscar por residual negativo (crédito)
-            if not credit_lines_v18:
-                credit_lines_v18 = odoo_v18.search_read(
-                    'account.move.line',
-                    [
-                        ('move_id', '=', credit_move_v18),
-                        ('account_type', 'in', ['asset_receivable', 'liability_payable']),
-                        ('reconciled', '=', False),
-                        ('amount_residual', '<', 0)
-                    ],
-                    fields=['id', 'debit', 'credit', 'amount_residual'],
-                    limit=1
-                )
-            
-            if not debit_lines_v18 or not credit_lines_v18:
-                skipped += 1
-                continue
-            
-            # Conciliar las líneas específicas
-            line_ids = [debit_lines_v18[0]['id'], credit_lines_v18[0]['id']]
-            
-            try:
-                odoo_v18.execute('account.move.line', 'reconcile', line_ids)
-                created += 1
-            except Exception as e:
-                err_str = str(e).lower()
-                if 'already reconciled' in err_str or 'ya conciliado' in err_str:
+            ],
+            fields=['id', 'debit', 'credit', 'amount_residual']
+        )
+    
+    # Si no hay match exacto, buscar por residual negativo (crédito)
+    if not credit_lines_v18:
+        credit_lines_v18 = odoo_v18.search_read(
+            'account.move.line',
+            [
+                ('move_id', '=', credit_move_v18),
+                ('account_type', 'in', ['asset_receivable', 'liability_payable']),
+                ('reconciled', '=', False),
+                ('amount_residual', '<', 0)
+            ],
+            fields=['id', 'debit', 'credit', 'amount_residual'],
+            limit=1
+        )
+    
+    if not debit_lines_v18 or not credit_lines_v18:
+        # Sin líneas abiertas: o ya están conciliadas en v18 (no hay nada que
+        # hacer) o el asiento todavía no tiene sus líneas
+        missing_moves = []
+        if not debit_lines_v18:
+            missing_moves.append(debit_move_v18)
+        if not credit_lines_v18:
+            missing_moves.append(credit_move_v18)
+        if all(has_reconciled_lines(move_id) for move_id in missing_moves):
+            return SKIPPED, None
+        return PENDING, None
+    
+    # Conciliar las líneas específicas
+    line_ids = [debit_lines_v18[0]['id'], credit_lines_v18[0]['id']]
+    
+    try:
+        odoo_v18.execute('account.move.line', 'reconcile', line_ids)
+        return MIGRATED, None
+    except Exception as e:
+        err_str = str(e).lower()
+        if 'already reconciled' in err_str or 'ya conciliado' in err_str:
+            return SKIPPED, None
+        if 'unhashable' in err_str:
+            # Error espurio que el script siempre ha ignorado
+            return None, None
+        return ERROR, f"Rec {rec['id']}: {str(e)[:50]}"
+
+
+def reconcile_batches(domain, checkpoint, batch_size=200):
+    """
+    Recorre por lotes las conciliaciones de v13 pendientes según el diario de
+    puntos de control: primero las que hay que reintentar y luego las
+    posteriores al último commit.
+    """
+    fields = ['id', 'debit_move_id', 'credit_move_id', 'amount']
+    
+    retry_ids = checkpoint.retry_ids()
+    for start in range(0, len(retry_ids), batch_size):
+        batch = odoo_v13.search_read(
+            'account.partial.reconcile',
+            domain + [('id', 'in', retry_ids[start:start + batch_size])],
+            fields=fields,
+            order='id ASC'
+        )
+        if batch:
+            yield batch
+    
+    yield from odoo_v13.search_read_pages(
+        'account.partial.reconcile',
+        domain,
+        fields=fields,
+        page_size=batch_size,
+        prefetch=True,
+        after_id=checkpoint.last_id
+    )
+
+
+def fix_reconciliations():
+    """
+    Crear conciliaciones precisas basadas en montos exactos.
+    
+    El avance se guarda en el diario de puntos de control 'reconciliations'
+    (CHECKPOINT_DIR): si el script se interrumpe, la siguiente ejecución
+    sigue después del último lote terminado. Las conciliaciones cuyos
+    asientos aún no estaban migrados quedan pendientes y se reintentan al
+    relanzar el script después de migrar más pagos o asientos.
+    """
+    print("=" * 70)
+    print("CORRECCIÓN DE CONCILIACIONES")
+    print("=" * 70)
+    
+    move_map = build_move_mapping()
+    
+    domain = [
+        ('create_date', '>=', START_DATE),
+        ('company_id', '=', COMPANY_ID)
+    ]
+    
+    # El avance guardado (y el total) solo vale para el mismo dominio y las
+    # mismas bases de datos
+    checkpoint = open_checkpoint(
+        'reconciliations', scope=dict(databases(), domain=repr(domain))
+    )
+    if 'total' not in checkpoint.meta:
+        total = odoo_v13.search_count('account.partial.reconcile', domain)
+        checkpoint.set_meta(total=total)
+    total = checkpoint.meta['total']
+    print(f"Total conciliaciones en v13: {total}")
+    
+    done = checkpoint.done_count()
+    if checkpoint.last_id:
+        retry_count = len(checkpoint.retry_ids())
+        print(
+            f"Reanudando después del ID {checkpoint.last_id} "
+            f"({done} ya procesadas, {retry_count} a reintentar)"
+        )
+    
+    processed = 0
+    created = 0
+    skipped = 0
+    pending = 0
+    errors = []
+    
+    try:
+        for batch in reconcile_batches(domain, checkpoint):
+            checkpoint.begin([rec['id'] for rec in batch])
+            for rec in batch:
+                try:
+                    status, error = fix_reconciliation(rec, move_map)
+                except Exception as e:
+                    status, error = ERROR, f"Error {rec['id']}: {str(e)[:50]}"
+                
+                processed += 1
+                if status == MIGRATED:
+                    created += 1
+                elif status == SKIPPED:
                     skipped += 1
-                elif 'unhashable' not in err_str:
-                    errors.append(f"Rec {rec['id']}: {str(e)[:50]}")
-        
-        except Exception as e:
-            errors.append(f"Error {rec['id']}: {str(e)[:50]}")
+                elif status == PENDING:
+                    pending += 1
+                elif status == ERROR:
+                    errors.append(error)
+                if status:
+                    checkpoint.record(rec['id'], status, error=error)
+            
+            checkpoint.commit(batch[-1]['id'])
+            print(f"  Procesando {done + processed}/{total}... (creadas: {created})")
+    finally:
+        checkpoint.close()
     
     print()
     print("=" * 70)
     print("RESUMEN")
     print("=" * 70)
-    print(f"Total procesadas: {len(reconciles_v13)}")
+    print(f"Total procesadas: {processed}")
     print(f"Creadas: {created}")
-    print(f"Saltadas: {skipped}")
+    print(f"Ya conciliadas: {skipped}")
+    print(f"Pendientes (asientos sin migrar o sin líneas en v18): {pending}")
     print(f"Errores: {len(errors)}")
     
     if errors[:10]:
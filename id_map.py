@@ -0,0 +1,259 @@
+"""
+Mapeo compacto de IDs enteros (v13 -> v18) sobre arrays ordenados.
+
+Un `dict` de int -> int cuesta más de 100 bytes por entrada; con millones
+de partners o líneas de asiento eso son cientos de MB. `IdMap` guarda las
+claves ordenadas y sus valores en dos `array('q')` (16 bytes por entrada),
+busca por bisección y se puede guardar en un fichero binario que se abre
+con `mmap` sin copiarlo a memoria.
+
+Uso:
+    >>> move_map = IdMap.from_pairs((t['v13_id'], t['v18_id']) for t in rows)
+    >>> move_map.get(1234)
+    >>> move_map.get_many([1234, 1235])
+    >>> move_map.inverse().get(5678)
+    >>> move_map.save('move_map.idmap')
+    >>> move_map = IdMap.load('move_map.idmap')
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+import heapq
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, Optional
+
+
+# Cabecera del fichero: firma (incluye el orden de bytes) y número de entradas
+_MAGIC = b'IDMAP1' + (b'LE' if sys.byteorder == 'little' else b'BE')
+_HEADER = struct.Struct('=8sq')
+
+# Entradas que se ordenan de una vez antes de mezclar los trozos
+_SORT_CHUNK_SIZE = 1 << 16
+
+
+def _sorted_positions(keys: array) -> Iterator[tuple]:
+    """
+    Recorre (clave, posición) ordenados por clave y, en empates, por posición.
+
+    Cada par se empaqueta en un solo entero ((clave - mínima) << bits |
+    posición), los enteros se ordenan por trozos de `_SORT_CHUNK_SIZE` en
+    arrays y los trozos se mezclan con `heapq.merge`, así que nunca hay una
+    lista de Python del tamaño de la entrada.
+    """
+    count = len(keys)
+    low = min(keys)
+    shift = max(count - 1, 1).bit_length()
+    if (max(keys) - low).bit_length() + shift > 63:
+        # Rango de claves demasiado grande para empaquetar (no pasa con IDs)
+        for index in sorted(range(count), key=keys.__getitem__):
+            yield keys[index], index
+        return
+
+    chunks = []
+    for start in range(0, count, _SORT_CHUNK_SIZE):
+        stop = min(start + _SORT_CHUNK_SIZE, count)
+        chunks.append(array('q', sorted(
+            (keys[index] - low) << shift | index for index in range(start, stop)
+        )))
+    mask = (1 << shift) - 1
+    for packed in heapq.merge(*chunks):
+        yield (packed >> shift) + low, packed & mask
+
+
+class IdMap:
+    """
+    Mapeo inmutable de enteros a enteros con claves únicas ordenadas.
+
+    Las claves y valores son `array('q')` o, si se cargó con `mmap`, vistas
+    de memoria sobre el fichero. El índice inverso se construye la primera
+    vez que se pide y se reutiliza.
+    """
+
+    __slots__ = ('keys', 'values', '_inverse', '_mmap')
+
+    def __init__(self, keys=None, values=None):
+        """
+        Crea el mapeo a partir de claves ya ordenadas y únicas.
+
+        Para datos sin ordenar usar `from_pairs` o `from_dict`.
+
+        Args:
+            keys: Secuencia de claves ordenadas ascendentemente, sin repetir
+            values: Secuencia de valores, en el mismo orden que las claves
+        """
+        self.keys = keys if keys is not None else array('q')
+        self.values = values if values is not None else array('q')
+        if len(self.keys) != len(self.values):
+            raise ValueError("Las claves y los valores tienen longitudes distintas")
+        self._inverse: Optional[IdMap] = None
+        self._mmap = None
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[tuple], keep: str = 'last') -> 'IdMap':
+        """
+        Construye el mapeo a partir de pares (clave, valor) en cualquier orden.
+
+        Args:
+            pairs: Pares (clave, valor); puede ser un generador
+            keep: Si una clave se repite, 'last' conserva el último valor
+                  (como `dict`) y 'first' el primero
+        """
+        keys = array('q')
+        values = array('q')
+        for key, value in pairs:
+            keys.append(key)
+            values.append(value)
+        return cls._from_arrays(keys, values, keep)
+
+    @classmethod
+    def from_dict(cls, mapping: dict) -> 'IdMap':
+        """Construye el mapeo a partir de un diccionario."""
+        return cls._from_arrays(array('q', mapping.keys()), array('q', mapping.values()))
+
+    @classmethod
+    def _from_arrays(cls, keys: array, values: array, keep: str = 'last') -> 'IdMap':
+        """Ordena por clave (estable) y elimina repetidas según `keep`."""
+        if keep not in ('first', 'last'):
+            raise ValueError(f"keep debe ser 'first' o 'last', no {keep!r}")
+        count = len(keys)
+        if all(keys[i] < keys[i + 1] for i in range(count - 1)):
+            return cls(keys, values)
+
+        sorted_keys = array('q')
+        sorted_values = array('q')
+        for key, index in _sorted_positions(keys):
+            # Con orden estable, las repetidas quedan juntas en el orden en
+            # que aparecieron en la entrada
+            if sorted_keys and sorted_keys[-1] == key:
+                if keep == 'last':
+                    sorted_values[-1] = values[index]
+                continue
+            sorted_keys.append(key)
+            sorted_values.append(values[index])
+        return cls(sorted_keys, sorted_values)
+
+    def _index(self, key: int, lo: int = 0) -> int:
+        """Posición de la clave, o -1 si no está."""
+        index = bisect_left(self.keys, key, lo)
+        if index < len(self.keys) and self.keys[index] == key:
+            return index
+        return -1
+
+    def get(self, key: int, default: Optional[int] = None) -> Optional[int]:
+        """Retorna el valor de la clave, o `default` si no está."""
+        index = self._index(key)
+        return self.values[index] if index >= 0 else default
+
+    def get_many(self, keys: Iterable[int]) -> dict:
+        """
+        Busca muchas claves a la vez.
+
+        Ordena las claves pedidas y recorre el array una sola vez, acotando
+        cada bisección con la posición de la anterior.
+
+        Returns:
+            Diccionario clave -> valor, solo con las claves encontradas
+        """
+        result = {}
+        lo = 0
+        size = len(self.keys)
+        for key in sorted(set(keys)):
+            lo = bisect_left(self.keys, key, lo)
+            if lo >= size:
+                break
+            if self.keys[lo] == key:
+                result[key] = self.values[lo]
+        return result
+
+    def inverse(self) -> 'IdMap':
+        """
+        Retorna el mapeo valor -> clave (si un valor se repite, gana la
+        mayor clave).
+        """
+        if self._inverse is None:
+            self._inverse = IdMap._from_arrays(array('q', self.values), array('q', self.keys))
+        return self._inverse
+
+    def items(self) -> Iterator[tuple]:
+        """Recorre los pares (clave, valor) ordenados por clave."""
+        return zip(self.keys, self.values)
+
+    def to_dict(self) -> dict:
+        """Retorna el mapeo como diccionario."""
+        return dict(self.items())
+
+    def __getitem__(self, key: int) -> int:
+        index = self._index(key)
+        if index < 0:
+            raise KeyError(key)
+        return self.values[index]
+
+    def __contains__(self, key: int) -> bool:
+        return self._index(key) >= 0
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.keys)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def nbytes(self) -> int:
+        """Bytes que ocupan claves y valores."""
+        return len(self.keys) * 16
+
+    def save(self, path: str):
+        """
+        Guarda el mapeo en un fichero binario que `load` puede abrir con mmap.
+
+        Args:
+            path: Fichero destino
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, len(self.keys)))
+            f.write(memoryview(self.keys).cast('B'))
+            f.write(memoryview(self.values).cast('B'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, use_mmap: bool = True) -> 'IdMap':
+        """
+        Abre un mapeo guardado con `save`.
+
+        Args:
+            path: Fichero a abrir
+            use_mmap: Si True, las claves y valores se leen del fichero bajo
+                      demanda en lugar de copiarse a memoria
+
+        Returns:
+            IdMap de solo lectura
+        """
+        with open(path, 'rb') as f:
+            magic, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{path} no es un IdMap de esta plataforma")
+
+            start = _HEADER.size
+            end = start + count * 8
+            if not use_mmap:
+                data = f.read()
+                keys = array('q')
+                keys.frombytes(data[:count * 8])
+                values = array('q')
+                values.frombytes(data[count * 8:count * 16])
+                return cls(keys, values)
+
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(mapped)
+        id_map = cls(view[start:end].cast('q'), view[end:end + count * 8].cast('q'))
+        id_map._mmap = mapped
+        return id_map
+
+    def __repr__(self) -> str:
+        return f"<IdMap size={len(self.keys)}>"
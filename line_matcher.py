@@ -0,0 +1,224 @@
+"""
+Emparejamiento de líneas automáticas (impuestos, cxc, cxp) de v13 y v18.
+
+Al publicar una factura migrada, Odoo v18 genera sus propias líneas de
+impuestos y de cuentas a cobrar/pagar, sin `x_v13_id`. Este módulo busca
+para cada una la línea de v13 equivalente: misma cuenta (mapeada a v18),
+mismo debe y haber con tolerancia de 0.01 y, si es línea de impuesto, mismo
+impuesto (mapeado a v18).
+
+Las líneas de v13 se agrupan en un diccionario por (cuenta, impuesto,
+importe en céntimos), así cada búsqueda mira unos pocos cubos en lugar de
+recorrer todas las líneas. Para las que no se emparejan se indica el motivo.
+
+`migration.helper.match_automatic_lines` aplica el mismo algoritmo en el
+servidor.
+
+Uso:
+    >>> descriptors = [
+    ...     {'id': 10, 'account_id': 45, 'tax_line_id': 7, 'debit': 0.0, 'credit': 21.0},
+    ... ]
+    >>> result = match_lines(descriptors, lines_v18)
+    >>> for line_v18, line_v13 in result.matches:
+    ...     print(line_v18['id'], '->', line_v13['id'])
+    >>> for line_v18, reason in result.unmatched_v18:
+    ...     print(line_v18['id'], REASON_LABELS[reason])
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+from typing import Optional
+
+
+DEFAULT_TOLERANCE = 0.01
+
+# Motivos de líneas sin emparejar (los mismos códigos que devuelve
+# migration.helper.match_automatic_lines)
+REASON_NO_ACCOUNT = "no_account"
+REASON_ACCOUNT = "account"
+REASON_AMOUNT = "amount"
+REASON_TAX = "tax"
+REASON_TAKEN = "taken"
+REASON_NO_V18_LINE = "no_v18_line"
+
+REASON_LABELS = {
+    REASON_NO_ACCOUNT: "cuenta sin mapear",
+    REASON_ACCOUNT: "ninguna línea con la misma cuenta",
+    REASON_AMOUNT: "importe distinto",
+    REASON_TAX: "impuesto distinto",
+    REASON_TAKEN: "candidatas ya asignadas a otras líneas",
+    REASON_NO_V18_LINE: "sin línea equivalente en v18",
+}
+
+
+def _many2one_id(value) -> Optional[int]:
+    """Acepta tanto un ID como el par [id, nombre] de un many2one leído."""
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return value or None
+
+
+def _cents(line: dict) -> int:
+    """Importe con signo (debe - haber) en céntimos."""
+    return round((line["debit"] - line["credit"]) * 100)
+
+
+class MatchResult:
+    """Resultado de `LineMatcher.match_all`."""
+
+    def __init__(self):
+        self.matches: list = []        # [(línea v18, línea v13)]
+        self.unmatched_v18: list = []  # [(línea v18, motivo)]
+        self.unmatched_v13: list = []  # [(línea v13, motivo)]
+
+    def __repr__(self) -> str:
+        return (
+            f"<MatchResult matches={len(self.matches)} "
+            f"unmatched_v18={len(self.unmatched_v18)} "
+            f"unmatched_v13={len(self.unmatched_v13)}>"
+        )
+
+
+class LineMatcher:
+    """
+    Índice de líneas de v13 para emparejarlas con líneas de v18.
+
+    Las líneas de v13 son descriptores con la cuenta y el impuesto ya
+    traducidos a IDs de v18: id, account_id, tax_line_id (False si no es
+    línea de impuesto), debit y credit. Cada línea de v13 se asigna como
+    mucho una vez.
+    """
+
+    def __init__(self, lines_v13: list, tolerance: float = DEFAULT_TOLERANCE):
+        """
+        Args:
+            lines_v13: Descriptores de las líneas de v13
+            tolerance: Diferencia máxima admitida en debe y en haber
+        """
+        self.tolerance = tolerance
+        self._tolerance_cents = round(tolerance * 100)
+        # Céntimos vecinos a revisar para cubrir la tolerancia y el redondeo
+        self._spread = int(round(tolerance * 100)) + 1
+        self._buckets: dict = {}      # (cuenta, impuesto, céntimos) -> [líneas]
+        self._taxes: dict = {}        # (cuenta, céntimos) -> {impuestos}
+        self._by_account: dict = {}   # cuenta -> [líneas], para diagnósticos
+        self._unmapped_ids: set = set()
+        self._matched_ids: set = set()
+        self._lines = list(lines_v13)
+
+        for line in self._lines:
+            account = _many2one_id(line.get("account_id"))
+            if not account:
+                self._unmapped_ids.add(line["id"])
+                continue
+            tax = _many2one_id(line.get("tax_line_id")) or False
+            cents = _cents(line)
+            self._buckets.setdefault((account, tax, cents), []).append(line)
+            self._taxes.setdefault((account, cents), set()).add(tax)
+            self._by_account.setdefault(account, []).append(line)
+
+    def _within_tolerance(self, line_v13: dict, line_v18: dict) -> bool:
+        # En céntimos enteros: con floats, abs(100.0 - 100.01) > 0.01
+        return all(
+            abs(round(line_v13[field] * 100) - round(line_v18[field] * 100))
+            <= self._tolerance_cents
+            for field in ("debit", "credit")
+        )
+
+    def _candidate_keys(self, account: int, tax, cents: int):
+        """Claves de cubo a revisar, primero el importe exacto."""
+        offsets = [0]
+        for step in range(1, self._spread + 1):
+            offsets += [-step, step]
+        for offset in offsets:
+            amount = cents + offset
+            if tax:
+                yield (account, tax, amount)
+            else:
+                # Las líneas de v18 sin impuesto admiten cualquier línea de v13,
+                # prefiriendo las que tampoco tienen impuesto
+                taxes = self._taxes.get((account, amount), ())
+                for candidate_tax in sorted(taxes, key=lambda t: (t is not False, t)):
+                    yield (account, candidate_tax, amount)
+
+    def match(self, line_v18: dict) -> tuple:
+        """
+        Busca y reserva la línea de v13 para una línea de v18.
+
+        Returns:
+            Tupla (línea de v13 o None, motivo si no hay coincidencia)
+        """
+        account = _many2one_id(line_v18.get("account_id"))
+        tax = _many2one_id(line_v18.get("tax_line_id")) or False
+        cents = _cents(line_v18)
+
+        if account not in self._by_account:
+            return None, REASON_ACCOUNT
+
+        for key in self._candidate_keys(account, tax, cents):
+            bucket = self._buckets.get(key)
+            if not bucket:
+                continue
+            for index, line_v13 in enumerate(bucket):
+                if self._within_tolerance(line_v13, line_v18):
+                    del bucket[index]
+                    self._matched_ids.add(line_v13["id"])
+                    return line_v13, None
+
+        # Sin coincidencia: se revisan las líneas de la cuenta (incluidas las
+        # ya asignadas) solo para explicar el motivo
+        same_amount = [
+            line_v13
+            for line_v13 in self._by_account[account]
+            if self._within_tolerance(line_v13, line_v18)
+        ]
+        if not same_amount:
+            return None, REASON_AMOUNT
+        if tax and not any(
+            _many2one_id(line_v13.get("tax_line_id")) == tax for line_v13 in same_amount
+        ):
+            return None, REASON_TAX
+        return None, REASON_TAKEN
+
+    def match_all(self, lines_v18: list) -> MatchResult:
+        """
+        Empareja todas las líneas de v18 en orden.
+
+        Returns:
+            MatchResult con los pares y las líneas sobrantes de ambos lados
+        """
+        result = MatchResult()
+        for line_v18 in lines_v18:
+            line_v13, reason = self.match(line_v18)
+            if line_v13 is None:
+                result.unmatched_v18.append((line_v18, reason))
+            else:
+                result.matches.append((line_v18, line_v13))
+
+        for line_v13 in self._lines:
+            if line_v13["id"] in self._unmapped_ids:
+                result.unmatched_v13.append((line_v13, REASON_NO_ACCOUNT))
+            elif line_v13["id"] not in self._matched_ids:
+                result.unmatched_v13.append((line_v13, REASON_NO_V18_LINE))
+        return result
+
+
+def match_lines(
+    lines_v13: list,
+    lines_v18: list,
+    tolerance: float = DEFAULT_TOLERANCE
+) -> MatchResult:
+    """
+    Empareja líneas automáticas de v18 con descriptores de líneas de v13.
+
+    Args:
+        lines_v13: Descriptores con id, account_id y tax_line_id (IDs de v18),
+                   debit y credit
+        lines_v18: Líneas leídas de v18 con id, account_id, tax_line_id,
+                   debit y credit
+        tolerance: Diferencia máxima admitida en debe y en haber
+
+    Returns:
+        MatchResult
+    """
+    return LineMatcher(lines_v13, tolerance).match_all(lines_v18)
@@ -6,13 +6,20 @@ Script para migrar asientos contables (entry) de Odoo v13 a v18.
 import os
 import json
 from dotenv import load_dotenv
-from connections import odoo_v13, odoo_v18
-from migration_utils import get_v18_id
+from connections import odoo_v13
+from migration_utils import (
+    PostingQueue,
+    get_v18_id,
+    load_tracking_index,
+    post_moves,
+)
+from reference_data import get_reference_data
 
 load_dotenv()
 
 COMPANY_ID = int(os.getenv("COMPANY_ID", "1"))
 START_DATE = os.getenv("MIGRATION_START_DATE", "2026-01-01")
+BATCH_SIZE = 50
 
 
 def load_mappings():
@@ -44,12 +51,9 @@ def migrate_entries():
     print(f"Mapeo de diarios: {len(journal_map)} configurados")
 
     # Obtener asientos ya migrados
-    existing = odoo_v18.search_read(
-        "migration.tracking",
-        [("model_name", "=", "account.move.entry")],
-        fields=["v13_id"],
-    )
-    existing_ids = {r["v13_id"] for r in existing}
+    tracking = load_tracking_index("account.move.entry", "res.partner")
+    existing_ids = tracking.mapping("account.move.entry")
+    reference = get_reference_data()
     print(f"Asientos ya migrados: {len(existing_ids)}")
 
     # Obtener asientos entry de v13
@@ -70,40 +74,27 @@ def migrate_entries():
     print(f"Asientos a migrar: {len(to_migrate)} de {len(entries_v13)}")
     print()
 
-    migrated = 0
     errors = []
+    queue = PostingQueue(
+        "create_invoices_xmlrpc",
+        "account.move.entry",
+        post_moves,
+        BATCH_SIZE,
+        model_name="account.move.entry",
+    )
 
     for i, entry in enumerate(to_migrate):
         try:
             # Mapear diario
             journal_v18_id = journal_map.get(entry["journal_id"][0])
             if not journal_v18_id:
-                # Cache de diarios
-                if not getattr(migrate_entries, "journal_cache", None):
-                    migrate_entries.journal_cache = {}
-
+                # Buscar por nombre en los datos de referencia
                 journal_name_clean = entry["journal_id"][1].split(" (")[0]
-                if journal_name_clean in migrate_entries.journal_cache:
-                    journal_v18_id = migrate_entries.journal_cache[journal_name_clean]
-                else:
-                    # Buscar por nombre
-                    journals = odoo_v18.search_read(
-                        "account.journal",
-                        [("name", "ilike", journal_name_clean)],
-                        fields=["id"],
-                        limit=1,
-                    )
-                    if journals:
-                        journal_v18_id = journals[0]["id"]
-                        migrate_entries.journal_cache[journal_name_clean] = (
-                            journal_v18_id
-                        )
-                    else:
-                        errors.append(
-                            f"[{entry['id']}] {entry['name']}: Diario no mapeado"
-                        )
-                        print(f"  ✗ {entry['name']}: Diario no mapeado")
-                        continue
+                journal_v18_id = reference.journal_id(journal_name_clean)
+                if not journal_v18_id:
+                    errors.append(f"[{entry['id']}] {entry['name']}: Diario no mapeado")
+                    print(f"  ✗ {entry['name']}: Diario no mapeado")
+                    continue
 
             # Obtener líneas del asiento
             lines_v13 = odoo_v13.search_read(
@@ -125,39 +116,24 @@ def migrate_entries():
             line_ids = []
             skip_entry = False
 
-            if not getattr(migrate_entries, "account_cache", None):
-                migrate_entries.account_cache = {}
-
             for line in lines_v13:
                 # Mapear cuenta
                 account_v13_name = line["account_id"][1]
                 account_v18_id = account_map.get(account_v13_name)
 
                 if not account_v18_id:
+                    # Buscar por código en los datos de referencia
                     account_code = account_v13_name.split(" ")[0]
-
-                    if account_code in migrate_entries.account_cache:
-                        account_v18_id = migrate_entries.account_cache[account_code]
-                    else:
-                        # Buscar por código
-                        accounts = odoo_v18.search_read(
-                            "account.account",
-                            [("code", "=", account_code)],
-                            fields=["id"],
-                            limit=1,
+                    account_v18_id = reference.account_id(account_code)
+                    if not account_v18_id:
+                        errors.append(
+                            f"[{entry['id']}] {entry['name']}: Cuenta {account_v13_name} no mapeada"
                         )
-                        if accounts:
-                            account_v18_id = accounts[0]["id"]
-                            migrate_entries.account_cache[account_code] = account_v18_id
-                        else:
-                            errors.append(
-                                f"[{entry['id']}] {entry['name']}: Cuenta {account_v13_name} no mapeada"
-                            )
-                            print(
-                                f"  ✗ {entry['name']}: Cuenta {account_v13_name} no mapeada"
-                            )
-                            skip_entry = True
-                            break
+                        print(
+                            f"  ✗ {entry['name']}: Cuenta {account_v13_name} no mapeada"
+                        )
+                        skip_entry = True
+                        break
 
                 # Mapear partner si existe
                 partner_v18_id = None
@@ -189,36 +165,18 @@ def migrate_entries():
                 "line_ids": line_ids,
             }
 
-            # Usar migration.helper para crear (pasar dict directamente, no en lista)
-            entry_v18_id = odoo_v18.execute(
-                "migration.helper", "create_invoice_xmlrpc", entry_vals
-            )
-
-            # Publicar
-            try:
-                odoo_v18.execute("account.move", "action_post", [entry_v18_id])
-            except Exception:
-                pass  # Puede retornar None
-
-            # Registrar en tracking
-            odoo_v18.create(
-                "migration.tracking",
-                {
-                    "name": f"Entry {entry['name']}",
-                    "model_name": "account.move.entry",
-                    "v13_id": entry["id"],
-                    "v18_id": entry_v18_id,
-                },
-            )
-
-            migrated += 1
-            print(f"  ✓ {entry['name']} -> v18 ID: {entry_v18_id}")
+            # Crear con su tracking (migration.helper) y publicar por lotes
+            queue.add(entry, entry_vals)
 
         except Exception as e:
             error_msg = f"[{entry['id']}] {entry['name']}: {str(e)[:100]}"
             errors.append(error_msg)
             print(f"  ✗ {entry['name']}: {str(e)[:80]}")
 
+    queue.flush()
+    migrated = queue.migrated
+    errors.extend(queue.errors)
+
     print()
     print("=" * 70)
     print("RESUMEN")
@@ -244,20 +202,11 @@ def analyze_reconciliations():
     print("=" * 70)
 
     # Obtener tracking de facturas
-    invoice_tracking = odoo_v18.search_read(
-        "migration.tracking",
-        [("model_name", "=", "account.move")],
-        fields=["v13_id", "v18_id"],
-    )
-    invoice_map = {r["v13_id"]: r["v18_id"] for r in invoice_tracking}
+    tracking = load_tracking_index("account.move", "account.move.entry")
+    invoice_map = tracking.mapping("account.move")
 
     # Obtener tracking de asientos entry
-    entry_tracking = odoo_v18.search_read(
-        "migration.tracking",
-        [("model_name", "=", "account.move.entry")],
-        fields=["v13_id", "v18_id"],
-    )
-    entry_map = {r["v13_id"]: r["v18_id"] for r in entry_tracking}
+    entry_map = tracking.mapping("account.move.entry")
 
     print(f"Facturas migradas: {len(invoice_map)}")
     print(f"Asientos migrados: {len(entry_map)}")
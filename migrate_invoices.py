@@ -5,16 +5,33 @@ Migra facturas de 2026 de Odoo v13 a v18.
 - Fecha >= 01/01/2026
 - Todos los tipos: out_invoice, in_invoice, out_refund, in_refund
 
+Con INVOICE_WORKERS > 1 las facturas se reparten por diario entre varios
+hilos: cada diario lo procesa un único hilo, así dos hilos nunca compiten por
+la misma secuencia ni por la cadena de hash de un diario en v18.
+
 Autor: andyengit
 Mantenedor: andyengit
 """
 
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from dotenv import load_dotenv
 from connections import odoo_v13, odoo_v18
-from migration_utils import get_v18_id
+from odoo_client import OdooBatchCallError
+from checkpoint import ERROR, MIGRATED, SKIPPED, open_checkpoint
+from line_matcher import match_lines
+from pipeline import Pipeline
+from reference_data import get_reference_data
+from migration_utils import (
+    create_with_tracking,
+    databases,
+    get_v18_id,
+    get_v18_ids,
+    load_tracking_index,
+    post_moves,
+)
 
 load_dotenv()
 
@@ -22,6 +39,52 @@ COMPANY_ID = int(os.getenv("COMPANY_ID", 1))
 MIGRATION_START_DATE = os.getenv("MIGRATION_START_DATE", "2026-01-01")
 BATCH_SIZE = 50
 MAPPINGS_FILE = "mappings.json"
+LINES_PAGE_SIZE = 2000
+
+# Hilos que migran diarios en paralelo (1 = secuencial)
+INVOICE_WORKERS = int(os.getenv("INVOICE_WORKERS", "1"))
+
+# Leer, transformar y escribir cada lote en hilos distintos (ver `Pipeline`),
+# con hasta PIPELINE_QUEUE_SIZE lotes esperando entre etapas
+INVOICE_PIPELINE = os.getenv("INVOICE_PIPELINE", "0") == "1"
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+
+# Emparejar las líneas automáticas en v18 (migration.helper) o en el cliente
+MATCH_LINES_ON_SERVER = os.getenv("MATCH_LINES_ON_SERVER", "1") == "1"
+
+INVOICE_FIELDS = [
+    "id",
+    "name",
+    "ref",
+    "type",
+    "state",
+    "partner_id",
+    "journal_id",
+    "currency_id",
+    "date",
+    "invoice_date",
+    "narration",
+]
+
+# Campos de account.move.line leídos en v13: los de las líneas de factura
+# y los de las líneas automáticas (impuestos, cxc, cxp)
+LINE_FIELDS = [
+    "move_id",
+    "exclude_from_invoice_tab",
+    "name",
+    "quantity",
+    "price_unit",
+    "discount",
+    "account_id",
+    "product_id",
+    "tax_ids",
+    "price_subtotal",
+    "price_total",
+    "user",
+    "debit",
+    "credit",
+    "tax_line_id",
+]
 
 
 def load_mappings():
@@ -48,74 +111,78 @@ def get_journal_v18_id(mappings, v13_journal_id):
     return journal_map["v18_id"] if journal_map else None
 
 
-def migrate_invoice(invoice_v13, mappings):
+def fetch_invoice_lines(invoice_ids):
     """
-    Migra una factura individual de v13 a v18.
+    Obtiene de v13 las líneas de varias facturas con una sola consulta
+    paginada por ID y las separa por factura.
 
     Returns:
-        tuple: (v18_id, error_message)
+        dict: move_id -> (líneas de factura, otras líneas), donde las otras
+        líneas son las automáticas (impuestos, cxc, cxp) con
+        exclude_from_invoice_tab = True
+    """
+    result = {invoice_id: ([], []) for invoice_id in invoice_ids}
+    if not result:
+        return result
+
+    lines = odoo_v13.search_read_iter(
+        "account.move.line",
+        [("move_id", "in", list(result))],
+        fields=LINE_FIELDS,
+        page_size=LINES_PAGE_SIZE,
+    )
+    for line in lines:
+        invoice_lines, other_lines = result[line["move_id"][0]]
+        if line["exclude_from_invoice_tab"]:
+            other_lines.append(line)
+        else:
+            invoice_lines.append(line)
+    return result
+
+
+def prepare_invoice(invoice_v13, mappings, invoice_lines=None):
+    """
+    Prepara los valores de una factura de v13 para crearla en v18.
+
+    Args:
+        invoice_lines: (Opcional) Tupla (líneas, otras líneas) ya obtenida con
+            `fetch_invoice_lines`. Si no se indica, se consulta en v13.
+
+    Returns:
+        tuple: (invoice_vals, other_lines_v13, error_message). Si hay error,
+        los dos primeros son None.
     """
     try:
         # Mapear partner
         partner_v18_id = get_v18_id(invoice_v13["partner_id"][0], "res.partner")
         if not partner_v18_id:
-            return None, f"Partner {invoice_v13['partner_id'][0]} no migrado"
+            return None, None, f"Partner {invoice_v13['partner_id'][0]} no migrado"
 
         # Mapear diario
         journal_v18_id = get_journal_v18_id(mappings, invoice_v13["journal_id"][0])
         if not journal_v18_id:
-            return None, f"Diario {invoice_v13['journal_id'][1]} no mapeado"
+            return None, None, f"Diario {invoice_v13['journal_id'][1]} no mapeado"
 
-        # Mapear moneda si existe
+        # Mapear moneda si existe (por nombre, con los datos de referencia)
         currency_v18_id = False
         if invoice_v13.get("currency_id"):
-            currency_name = invoice_v13["currency_id"][1]
-            if not getattr(migrate_invoice, "currency_cache", None):
-                migrate_invoice.currency_cache = {}
+            currency_v18_id = (
+                get_reference_data().currency_id(invoice_v13["currency_id"][1]) or False
+            )
 
-            if currency_name in migrate_invoice.currency_cache:
-                currency_v18_id = migrate_invoice.currency_cache[currency_name]
-            else:
-                # Buscar moneda por nombre en v18
-                currency = odoo_v18.search_read(
-                    "res.currency",
-                    [("name", "=", currency_name)],
-                    fields=["id"],
-                    limit=1,
-                )
-                if currency:
-                    currency_v18_id = currency[0]["id"]
-                    migrate_invoice.currency_cache[currency_name] = currency_v18_id
-
-        # Obtener líneas de la factura en v13
-        lines_v13 = odoo_v13.search_read(
-            "account.move.line",
-            [
-                ("move_id", "=", invoice_v13["id"]),
-                ("exclude_from_invoice_tab", "=", False),
-            ],
-            fields=[
-                "name",
-                "quantity",
-                "price_unit",
-                "discount",
-                "account_id",
-                "product_id",
-                "tax_ids",
-                "price_subtotal",
-                "price_total",
-                "user",
-            ],
-        )
+        # Líneas de la factura en v13 y otras líneas (impuestos, cxc, cxp)
+        # para mapeo posterior
+        if invoice_lines is None:
+            invoice_lines = fetch_invoice_lines([invoice_v13["id"]])[invoice_v13["id"]]
+        lines_v13, other_lines_v13 = invoice_lines
 
-        # Obtener otras líneas (impuestos, cxc, cxp) de v13 para mapeo posterior
-        other_lines_v13 = odoo_v13.search_read(
-            "account.move.line",
-            [
-                ("move_id", "=", invoice_v13["id"]),
-                ("exclude_from_invoice_tab", "=", True),
-            ],
-            fields=["name", "account_id", "debit", "credit", "tax_line_id"],
+        # Traducir en bloque productos y usuarios finales de todas las líneas
+        product_map = get_v18_ids(
+            [l["product_id"][0] for l in lines_v13 if l.get("product_id")],
+            "product.product",
+        )
+        user_map = get_v18_ids(
+            [l["user"][0] for l in lines_v13 if l.get("user")], "res.partner"
         )
 
         # Preparar líneas para v18
@@ -137,7 +204,7 @@ def migrate_invoice(invoice_v13, mappings):
 
             # Mapear producto
             if line.get("product_id"):
-                product_v18_id = get_v18_id(line["product_id"][0], "product.product")
+                product_v18_id = product_map.get(line["product_id"][0])
                 if product_v18_id:
                     line_vals["product_id"] = product_v18_id
 
@@ -153,7 +220,7 @@ def migrate_invoice(invoice_v13, mappings):
 
             # Mapear user -> final_user_id
             if line.get("user"):
-                user_v18_id = get_v18_id(line["user"][0], "res.partner")
+                user_v18_id = user_map.get(line["user"][0])
                 if user_v18_id:
                     line_vals["final_user_id"] = user_v18_id
 
@@ -178,70 +245,107 @@ def migrate_invoice(invoice_v13, mappings):
         if currency_v18_id:
             invoice_vals["currency_id"] = currency_v18_id
 
-        # Crear factura en v18 usando migration.helper (wrapper para v18)
-        new_invoice_id = odoo_v18.execute(
-            "migration.helper", "create_invoice_xmlrpc", invoice_vals
+        return invoice_vals, other_lines_v13, None
+
+    except Exception as e:
+        return None, None, str(e)
+
+
+def create_invoices(vals_list, v13_ids):
+    """
+    Crea varias facturas en v18 con una sola llamada a
+    `migration.helper.create_invoices_xmlrpc`, junto con sus filas de
+    migration.tracking (ver `create_with_tracking`).
+
+    Returns:
+        list: Una tupla (v18_id, error_message) por cada vals, en el mismo orden
+    """
+    return create_with_tracking(
+        "create_invoices_xmlrpc", vals_list, v13_ids, "account.move"
+    )
+
+
+def line_descriptors(other_lines_v13, mappings):
+    """
+    Traduce las líneas automáticas de v13 a descriptores para emparejarlas
+    con las de v18: cuenta e impuesto con IDs de v18, debe y haber.
+    """
+    descriptors = []
+    for line in other_lines_v13:
+        tax_v18_id = False
+        if line.get("tax_line_id"):
+            tax_v18_id = get_tax_v18_id(mappings, line["tax_line_id"][0]) or False
+        descriptors.append(
+            {
+                "id": line["id"],
+                "account_id": get_account_v18_id(mappings, line["account_id"][0])
+                or False,
+                "tax_line_id": tax_v18_id,
+                "debit": line["debit"],
+                "credit": line["credit"],
+            }
         )
+    return descriptors
 
-        # Publicar la factura
-        odoo_v18.execute("account.move", "action_post", [new_invoice_id])
 
-        # Actualizar líneas automáticas (impuestos, cxc) con x_v13_id
-        if other_lines_v13:
-            # Obtener líneas de v18
-            lines_v18 = odoo_v18.search_read(
-                "account.move.line",
-                [("move_id", "=", new_invoice_id), ("x_v13_id", "=", False)],
-                fields=["account_id", "debit", "credit", "tax_line_id"],
+def match_automatic_lines_locally(invoice_v18_id, descriptors):
+    """
+    Empareja en el cliente las líneas automáticas de una factura de v18 con
+    `line_matcher` y escribe todos los x_v13_id en una sola petición.
+
+    Alternativa a `migration.helper.match_automatic_lines` para servidores
+    con una versión anterior del módulo.
+
+    Returns:
+        int: Número de líneas de v18 que quedaron sin emparejar
+    """
+    lines_v18 = odoo_v18.search_read(
+        "account.move.line",
+        [("move_id", "=", invoice_v18_id), ("x_v13_id", "=", False)],
+        fields=["account_id", "debit", "credit", "tax_line_id"],
+    )
+    result = match_lines(descriptors, lines_v18)
+    if result.matches:
+        with odoo_v18.batch() as batch:
+            writes = [
+                batch.write(
+                    "account.move.line", [line_v18["id"]], {"x_v13_id": line_v13["id"]}
+                )
+                for line_v18, line_v13 in result.matches
+            ]
+        failed = [write for write in writes if not write.ok]
+        if failed:
+            errors = "; ".join(str(write.error) for write in failed)
+            raise OdooBatchCallError(
+                f"x_v13_id no escrito en {len(failed)} líneas: {errors}"
             )
+    return len(result.unmatched_v18)
 
-            for line_v18 in lines_v18:
-                # Buscar coincidencia en other_lines_v13
-                match = None
-                for line_v13 in other_lines_v13:
-                    # Mapear cuenta de v13 para comparar
-                    acc_v18_id = get_account_v18_id(mappings, line_v13["account_id"][0])
-
-                    # Verificar cuenta
-                    if acc_v18_id != line_v18["account_id"][0]:
-                        continue
-
-                    # Verificar montos (con pequeña tolerancia por redondeo)
-                    if (
-                        abs(line_v13["debit"] - line_v18["debit"]) > 0.01
-                        or abs(line_v13["credit"] - line_v18["credit"]) > 0.01
-                    ):
-                        continue
-
-                    # Verificar impuesto si aplica (para líneas de impuesto)
-                    if line_v18.get("tax_line_id"):
-                        # Si es línea de impuesto, verificar que coincida el impuesto mapeado
-                        if not line_v13.get("tax_line_id"):
-                            continue
-                        tax_v18_id = get_tax_v18_id(
-                            mappings, line_v13["tax_line_id"][0]
-                        )
-                        if tax_v18_id != line_v18["tax_line_id"][0]:
-                            continue
-
-                    match = line_v13
-                    break
-
-                if match:
-                    odoo_v18.write(
-                        "account.move.line", [line_v18["id"]], {"x_v13_id": match["id"]}
-                    )
-                    # Quitar de la lista para evitar doble asignación (aunque difícil si montos son iguales)
-                    other_lines_v13.remove(match)
-
-        # Registrar en migration.tracking
-        tracking_vals = {
-            "name": f"account.move:{invoice_v13['id']}",
-            "model_name": "account.move",
-            "v13_id": invoice_v13["id"],
-            "v18_id": new_invoice_id,
-        }
-        odoo_v18.execute("migration.tracking", "create", [tracking_vals])
+
+def finalize_invoice(new_invoice_id, other_lines_v13, mappings):
+    """
+    Asigna x_v13_id a las líneas automáticas de una factura ya publicada en
+    v18.
+
+    Returns:
+        tuple: (v18_id, error_message)
+    """
+    try:
+        # Actualizar líneas automáticas (impuestos, cxc) con x_v13_id
+        if other_lines_v13:
+            descriptors = line_descriptors(other_lines_v13, mappings)
+            if MATCH_LINES_ON_SERVER:
+                result = odoo_v18.execute(
+                    "migration.helper",
+                    "match_automatic_lines",
+                    new_invoice_id,
+                    descriptors,
+                )
+                unmatched = len(result["unmatched_v18"])
+            else:
+                unmatched = match_automatic_lines_locally(new_invoice_id, descriptors)
+            if unmatched:
+                print(f"    ! {unmatched} líneas automáticas sin x_v13_id")
 
         return new_invoice_id, None
 
@@ -249,8 +353,377 @@ def migrate_invoice(invoice_v13, mappings):
         return None, str(e)
 
 
+def prepare_invoice_batch(invoices_v13, mappings, lines_by_invoice):
+    """
+    Prepara los valores de v18 de un lote de facturas.
+
+    Returns:
+        tuple: (results, pending). results tiene una tupla (None, error) en la
+        posición de cada factura que no se pudo preparar y None en las demás;
+        pending, una tupla (posición, invoice_vals, otras líneas de v13) por
+        cada factura lista para crear.
+    """
+    results = [None] * len(invoices_v13)
+    pending = []
+    for index, invoice_v13 in enumerate(invoices_v13):
+        invoice_vals, other_lines_v13, error = prepare_invoice(
+            invoice_v13, mappings, lines_by_invoice[invoice_v13["id"]]
+        )
+        if error:
+            results[index] = (None, error)
+        else:
+            pending.append((index, invoice_vals, other_lines_v13))
+    return results, pending
+
+
+def create_invoice_batch(invoices_v13, mappings, results, pending):
+    """
+    Crea en v18 con una sola llamada las facturas preparadas con
+    `prepare_invoice_batch` y sus filas de migration.tracking (en la misma
+    transacción), las publica y empareja sus líneas automáticas.
+
+    Una factura creada que no se pudo publicar o emparejar queda en v18 con
+    su tracking y se devuelve como error, para revisarla a mano sin que la
+    siguiente ejecución la vuelva a crear.
+
+    Returns:
+        list: Una tupla (v18_id, error_message) por factura, en el mismo orden
+    """
+    results = list(results)
+    created = create_invoices(
+        [invoice_vals for _, invoice_vals, _ in pending],
+        [invoices_v13[index]["id"] for index, _, _ in pending],
+    )
+
+    # Publicar todas las facturas creadas en una sola llamada
+    created_ids = [new_invoice_id for new_invoice_id, _ in created if new_invoice_id]
+    try:
+        post_errors = post_moves(created_ids)
+    except Exception as e:
+        post_errors = {new_invoice_id: str(e) for new_invoice_id in created_ids}
+
+    for (index, _, other_lines_v13), (new_invoice_id, error) in zip(pending, created):
+        if error:
+            results[index] = (None, error)
+            continue
+        post_error = post_errors.get(new_invoice_id)
+        if post_error:
+            results[index] = (
+                None,
+                f"Creada en v18 (ID {new_invoice_id}) sin publicar: {post_error}",
+            )
+            continue
+        v18_id, error = finalize_invoice(new_invoice_id, other_lines_v13, mappings)
+        if error:
+            results[index] = (
+                None,
+                f"Creada en v18 (ID {new_invoice_id}) sin emparejar líneas: {error}",
+            )
+        else:
+            results[index] = (v18_id, None)
+
+    return results
+
+
+def migrate_invoice_batch(invoices_v13, mappings):
+    """
+    Migra un lote de facturas de v13 a v18, creándolas con una sola llamada
+    que también las registra en migration.tracking.
+
+    Returns:
+        list: Una tupla (v18_id, error_message) por factura, en el mismo orden
+    """
+    try:
+        lines_by_invoice = fetch_invoice_lines([inv["id"] for inv in invoices_v13])
+    except Exception as e:
+        return [(None, str(e))] * len(invoices_v13)
+
+    results, pending = prepare_invoice_batch(invoices_v13, mappings, lines_by_invoice)
+    return create_invoice_batch(invoices_v13, mappings, results, pending)
+
+
+def migrate_invoice(invoice_v13, mappings):
+    """
+    Migra una factura individual de v13 a v18.
+
+    Returns:
+        tuple: (v18_id, error_message)
+    """
+    return migrate_invoice_batch([invoice_v13], mappings)[0]
+
+
+def journal_partitions(domain):
+    """
+    Agrupa en v13 las facturas del dominio por diario.
+
+    Returns:
+        list: Tuplas (journal_id, nombre del diario, nº de facturas), de mayor
+        a menor número de facturas
+    """
+    groups = odoo_v13.execute(
+        "account.move", "read_group", domain, ["journal_id"], ["journal_id"]
+    )
+    partitions = [
+        (group["journal_id"][0], group["journal_id"][1], group["journal_id_count"])
+        for group in groups
+        if group["journal_id"]
+    ]
+    partitions.sort(key=lambda partition: partition[2], reverse=True)
+    return partitions
+
+
+def invoice_pages(domain, checkpoint):
+    """
+    Recorre por lotes las facturas pendientes del dominio según el diario de
+    puntos de control: primero las que hay que reintentar (lote a medias o
+    con error) y luego las posteriores al último commit.
+    """
+    retry_ids = checkpoint.retry_ids()
+    for start in range(0, len(retry_ids), BATCH_SIZE):
+        invoices = odoo_v13.search_read(
+            "account.move",
+            domain + [("id", "in", retry_ids[start : start + BATCH_SIZE])],
+            fields=INVOICE_FIELDS,
+            order="id asc",
+        )
+        if invoices:
+            yield invoices
+
+    # Paginación por ID, precargando el lote siguiente
+    yield from odoo_v13.search_read_pages(
+        "account.move",
+        domain,
+        fields=INVOICE_FIELDS,
+        page_size=BATCH_SIZE,
+        prefetch=True,
+        after_id=checkpoint.last_id,
+    )
+
+
+def read_invoice_batches(domain, checkpoint, tracking):
+    """
+    Etapa de lectura: recorre los lotes pendientes, separa las facturas ya
+    migradas y trae de v13 las líneas de las demás.
+
+    Yields:
+        dict: number, invoices, skipped, to_migrate, lines y error (si no se
+        pudieron leer las líneas) de cada lote
+    """
+    for number, invoices in enumerate(invoice_pages(domain, checkpoint), start=1):
+        batch = {
+            "number": number,
+            "invoices": invoices,
+            "skipped": [],
+            "to_migrate": [],
+            "lines": None,
+            "error": None,
+        }
+        for invoice in invoices:
+            if tracking.is_migrated(invoice["id"], "account.move"):
+                batch["skipped"].append(invoice)
+            else:
+                batch["to_migrate"].append(invoice)
+        try:
+            batch["lines"] = fetch_invoice_lines(
+                [invoice["id"] for invoice in batch["to_migrate"]]
+            )
+        except Exception as e:
+            batch["error"] = str(e)
+        yield batch
+
+
+def transform_invoice_batch(batch, mappings):
+    """Etapa de transformación: prepara los valores de v18 del lote."""
+    if batch["error"] is None:
+        batch["results"], batch["pending"] = prepare_invoice_batch(
+            batch["to_migrate"], mappings, batch["lines"]
+        )
+    return batch
+
+
+def write_invoice_batch(batch, mappings, checkpoint, total_batches, prefix=""):
+    """
+    Etapa de escritura: crea y publica el lote en v18 y anota el resultado de
+    cada factura en el diario de puntos de control.
+
+    Returns:
+        dict: migrated, skipped y errors del lote
+    """
+    print(f"\n{prefix}[Lote {batch['number']}/{total_batches}] Procesando...")
+    invoices = batch["invoices"]
+    checkpoint.begin([invoice["id"] for invoice in invoices])
+
+    for invoice in batch["skipped"]:
+        checkpoint.record(invoice["id"], SKIPPED)
+
+    to_migrate = batch["to_migrate"]
+    if batch["error"] is not None:
+        results = [(None, batch["error"])] * len(to_migrate)
+    else:
+        results = create_invoice_batch(
+            to_migrate, mappings, batch["results"], batch["pending"]
+        )
+
+    migrated = 0
+    errors = []
+    for invoice, (v18_id, error) in zip(to_migrate, results):
+        if v18_id:
+            migrated += 1
+            checkpoint.record(invoice["id"], MIGRATED, v18_id=v18_id)
+            print(f"  {prefix}✓ {invoice['name']} -> v18 ID: {v18_id}")
+        else:
+            errors.append(
+                {"v13_id": invoice["id"], "name": invoice["name"], "error": error}
+            )
+            checkpoint.record(invoice["id"], ERROR, error=error)
+            print(f"  {prefix}✗ {invoice['name']}: {error}")
+
+    checkpoint.commit(invoices[-1]["id"])
+    return {"migrated": migrated, "skipped": len(batch["skipped"]), "errors": errors}
+
+
+def migrate_partition(domain, total, mappings, tracking, checkpoint, label=""):
+    """
+    Migra las facturas de un dominio por lotes.
+
+    Cada lote pasa por tres etapas: lectura en v13, transformación y
+    escritura en v18. Con INVOICE_PIPELINE=1 cada etapa corre en su propio
+    hilo, unidas por colas de PIPELINE_QUEUE_SIZE lotes, así la lectura y la
+    transformación de los lotes siguientes se solapan con la escritura.
+
+    Cada lote se anota en el diario de puntos de control de la etapa, así una
+    ejecución interrumpida sigue después del último lote terminado.
+
+    Args:
+        domain: Dominio de v13 de la partición
+        total: Número de facturas del dominio (para mostrar el progreso)
+        tracking: TrackingIndex con facturas, partners y productos
+        checkpoint: CheckpointJournal de la partición
+        label: Prefijo de los mensajes (p. ej. el nombre del diario)
+
+    Returns:
+        dict: migrated, skipped y errors de la partición en esta ejecución
+    """
+    prefix = f"[{label}] " if label else ""
+    migrated = 0
+    skipped = 0
+    errors = []
+
+    retry_count = len(checkpoint.retry_ids())
+    done = checkpoint.done_count()
+    if checkpoint.last_id:
+        print(
+            f"\n{prefix}Reanudando después del ID {checkpoint.last_id} "
+            f"({done} ya procesadas, {retry_count} a reintentar)"
+        )
+
+    total_batches = (max(total - done, 0) + BATCH_SIZE - 1) // BATCH_SIZE
+    batches = read_invoice_batches(domain, checkpoint, tracking)
+
+    def transform(batch):
+        return transform_invoice_batch(batch, mappings)
+
+    def write(batch):
+        return write_invoice_batch(batch, mappings, checkpoint, total_batches, prefix)
+
+    pipeline = None
+    if INVOICE_PIPELINE:
+        pipeline = Pipeline(
+            batches,
+            [("transformación", transform), ("escritura", write)],
+            queue_size=PIPELINE_QUEUE_SIZE,
+        )
+        batch_results = pipeline.run()
+    else:
+        batch_results = (write(transform(batch)) for batch in batches)
+
+    for result in batch_results:
+        migrated += result["migrated"]
+        skipped += result["skipped"]
+        errors += result["errors"]
+
+    if pipeline is not None:
+        print(f"\n{prefix}{pipeline.report()}")
+
+    return {"migrated": migrated, "skipped": skipped, "errors": errors}
+
+
+def migrate_partitions(domain, mappings, tracking, workers, checkpoint):
+    """
+    Migra las facturas repartidas por diario entre varios hilos.
+
+    Cada diario tiene su propio diario de puntos de control
+    (invoices.journal-<id>); el reparto se guarda en el de la etapa para no
+    volver a agruparlo al reanudar.
+
+    Returns:
+        list: Tuplas (nombre del diario, resultado de `migrate_partition`)
+    """
+    partitions = checkpoint.meta.get("partitions")
+    fresh = partitions is None
+    if fresh:
+        partitions = journal_partitions(domain)
+        checkpoint.set_meta(partitions=partitions)
+    print(f"Diarios: {len(partitions)} (hilos: {workers})")
+
+    journal_checkpoints = {
+        journal_id: open_checkpoint(f"invoices.journal-{journal_id}")
+        for journal_id, _, _ in partitions
+    }
+    if fresh:
+        # Avance de una ejecución con otro dominio
+        for journal_checkpoint in journal_checkpoints.values():
+            journal_checkpoint.reset()
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    migrate_partition,
+                    domain + [("journal_id", "=", journal_id)],
+                    count,
+                    mappings,
+                    tracking,
+                    journal_checkpoints[journal_id],
+                    journal_name,
+                ): (journal_name, count)
+                for journal_id, journal_name, count in partitions
+            }
+            for future in as_completed(futures):
+                journal_name, count = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Error fuera de los lotes (p. ej. al leer de v13): el
+                    # diario sigue desde su último lote en la siguiente ejecución
+                    result = {
+                        "migrated": 0,
+                        "skipped": 0,
+                        "errors": [
+                            {"v13_id": None, "name": journal_name, "error": str(e)}
+                        ],
+                    }
+                print(
+                    f"\n[{journal_name}] Terminado: {result['migrated']} migradas, "
+                    f"{result['skipped']} ya existían, "
+                    f"{len(result['errors'])} errores (de {count})"
+                )
+                results.append((journal_name, result))
+    finally:
+        for journal_checkpoint in journal_checkpoints.values():
+            journal_checkpoint.close()
+    return results
+
+
 def migrate_invoices():
-    """Migra todas las facturas de 2026."""
+    """
+    Migra todas las facturas de 2026.
+
+    El avance se guarda en el diario de puntos de control 'invoices'
+    (CHECKPOINT_DIR): si el script se interrumpe, la siguiente ejecución
+    sigue después del último lote terminado sin volver a contar ni a
+    recorrer las facturas ya procesadas.
+    """
     print("=" * 70)
     print("MIGRACIÓN DE FACTURAS 2026")
     print("=" * 70)
@@ -269,65 +742,42 @@ def migrate_invoices():
         ("type", "in", ["out_invoice", "in_invoice", "out_refund", "in_refund"]),
     ]
 
-    total = odoo_v13.search_count("account.move", domain)
+    # El avance guardado solo vale para el mismo dominio y las mismas bases
+    # de datos
+    checkpoint = open_checkpoint(
+        "invoices", scope=dict(databases(), domain=repr(domain))
+    )
+    if "total" not in checkpoint.meta:
+        checkpoint.set_meta(total=odoo_v13.search_count("account.move", domain))
+    total = checkpoint.meta["total"]
     print(f"\nFacturas a migrar: {total}")
 
     if total == 0:
         print("No hay facturas para migrar.")
+        checkpoint.close()
         return
 
-    # Verificar cuáles ya están migradas
-    already_migrated = odoo_v18.search_read(
-        "migration.tracking", [("model_name", "=", "account.move")], fields=["v13_id"]
-    )
-    migrated_v13_ids = {m["v13_id"] for m in already_migrated}
-    print(f"Ya migradas: {len(migrated_v13_ids)}")
-
-    migrated = 0
-    skipped = 0
-    errors = []
-
-    # Procesar en lotes
-    for offset in range(0, total, BATCH_SIZE):
-        batch_num = (offset // BATCH_SIZE) + 1
-        total_batches = (total + BATCH_SIZE - 1) // BATCH_SIZE
-        print(f"\n[Lote {batch_num}/{total_batches}] Procesando...")
+    # Cargar en memoria el tracking de facturas, partners y productos, y los
+    # datos de referencia (monedas)
+    tracking = load_tracking_index("account.move", "res.partner", "product.product")
+    get_reference_data()
+    print(f"Ya migradas: {len(tracking.mapping('account.move'))}")
 
-        invoices = odoo_v13.search_read(
-            "account.move",
-            domain,
-            fields=[
-                "id",
-                "name",
-                "ref",
-                "type",
-                "state",
-                "partner_id",
-                "journal_id",
-                "currency_id",
-                "date",
-                "invoice_date",
-                "narration",
-            ],
-            offset=offset,
-            limit=BATCH_SIZE,
-        )
-
-        for invoice in invoices:
-            if invoice["id"] in migrated_v13_ids:
-                skipped += 1
-                continue
-
-            v18_id, error = migrate_invoice(invoice, mappings)
+    try:
+        if INVOICE_WORKERS > 1:
+            partition_results = migrate_partitions(
+                domain, mappings, tracking, INVOICE_WORKERS, checkpoint
+            )
+        else:
+            partition_results = [
+                ("", migrate_partition(domain, total, mappings, tracking, checkpoint))
+            ]
+    finally:
+        checkpoint.close()
 
-            if v18_id:
-                migrated += 1
-                print(f"  ✓ {invoice['name']} -> v18 ID: {v18_id}")
-            else:
-                errors.append(
-                    {"v13_id": invoice["id"], "name": invoice["name"], "error": error}
-                )
-                print(f"  ✗ {invoice['name']}: {error}")
+    migrated = sum(result["migrated"] for _, result in partition_results)
+    skipped = sum(result["skipped"] for _, result in partition_results)
+    errors = [err for _, result in partition_results for err in result["errors"]]
 
     # Resumen
     print("\n" + "=" * 70)
@@ -338,6 +788,14 @@ def migrate_invoices():
     print(f"Ya existían: {skipped}")
     print(f"Errores: {len(errors)}")
 
+    if len(partition_results) > 1:
+        print("\nPor diario:")
+        for journal_name, result in sorted(partition_results, key=lambda r: r[0]):
+            print(
+                f"  - {journal_name}: {result['migrated']} migradas, "
+                f"{result['skipped']} ya existían, {len(result['errors'])} errores"
+            )
+
     if errors:
         print("\nPrimeros 10 errores:")
         for err in errors[:10]:
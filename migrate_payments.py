@@ -6,7 +6,12 @@ Script para migrar pagos de Odoo v13 a v18 y crear conciliaciones.
 import os
 from dotenv import load_dotenv
 from connections import odoo_v13, odoo_v18
-from migration_utils import get_v18_id
+from migration_utils import (
+    PostingQueue,
+    get_v18_id,
+    load_tracking_index,
+    post_payments,
+)
 
 load_dotenv()
 
@@ -32,12 +37,8 @@ def migrate_payments():
     print(f"Mapeo de diarios: {len(JOURNAL_MAP)} configurados")
 
     # Obtener pagos ya migrados
-    existing = odoo_v18.search_read(
-        "migration.tracking",
-        [("model_name", "=", "account.payment")],
-        fields=["v13_id"],
-    )
-    existing_ids = {r["v13_id"] for r in existing}
+    tracking = load_tracking_index("account.payment", "res.partner")
+    existing_ids = tracking.mapping("account.payment")
     print(f"Pagos ya migrados: {len(existing_ids)}")
 
     # Obtener pagos de v13
@@ -68,8 +69,10 @@ def migrate_payments():
     print(f"Pagos a migrar: {len(to_migrate)} de {len(payments_v13)}")
     print()
 
-    migrated = 0
     errors = []
+    queue = PostingQueue(
+        "create_payments_xmlrpc", "account.payment", post_payments, BATCH_SIZE
+    )
 
     for i, payment in enumerate(to_migrate):
         try:
@@ -105,34 +108,18 @@ def migrate_payments():
                 "journal_id": journal_v18_id,
             }
 
-            # Crear pago en v18
-            payment_v18_id = odoo_v18.create("account.payment", payment_vals)
-
-            # Publicar el pago (puede retornar None que causa error XML-RPC)
-            try:
-                odoo_v18.execute("account.payment", "action_post", [payment_v18_id])
-            except Exception:
-                pass  # Ignorar error de XML-RPC si el pago ya se publicó
-
-            # Registrar en tracking
-            odoo_v18.create(
-                "migration.tracking",
-                {
-                    "name": f"Payment {payment['name']}",
-                    "model_name": "account.payment",
-                    "v13_id": payment["id"],
-                    "v18_id": payment_v18_id,
-                },
-            )
-
-            migrated += 1
-            print(f"  ✓ {payment['name']} -> v18 ID: {payment_v18_id}")
+            # Crear con su tracking (migration.helper) y publicar por lotes
+            queue.add(payment, payment_vals)
 
         except Exception as e:
             error_msg = f"[{payment['id']}] {payment['name']}: {str(e)[:100]}"
             errors.append(error_msg)
             print(f"  ✗ {payment['name']}: {str(e)[:80]}")
 
+    queue.flush()
+    migrated = queue.migrated
+    errors.extend(queue.errors)
+
     print()
     print("=" * 70)
     print("RESUMEN DE PAGOS")
@@ -158,20 +145,11 @@ def migrate_reconciliations():
     print("=" * 70)
 
     # Obtener mapeo de facturas migradas (v13 move_id -> v18 move_id)
-    invoice_tracking = odoo_v18.search_read(
-        "migration.tracking",
-        [("model_name", "=", "account.move")],
-        fields=["v13_id", "v18_id"],
-    )
-    invoice_map = {r["v13_id"]: r["v18_id"] for r in invoice_tracking}
+    tracking = load_tracking_index("account.move", "account.payment")
+    invoice_map = tracking.mapping("account.move")
 
     # Obtener mapeo de pagos migrados (v13 payment_id -> v18 payment_id)
-    payment_tracking = odoo_v18.search_read(
-        "migration.tracking",
-        [("model_name", "=", "account.payment")],
-        fields=["v13_id", "v18_id"],
-    )
-    payment_v13_to_v18 = {r["v13_id"]: r["v18_id"] for r in payment_tracking}
+    payment_v13_to_v18 = tracking.mapping("account.payment")
 
     # Obtener el move_id de cada pago en v18
     if payment_v13_to_v18:
@@ -193,21 +171,20 @@ def migrate_reconciliations():
         v13_payment_ids = list(payment_v13_to_v18.keys())
 
         # Buscar todas las líneas que pertenecen a estos pagos
-        for batch_start in range(0, len(v13_payment_ids), 100):
-            batch_ids = v13_payment_ids[batch_start : batch_start + 100]
-            lines_v13 = odoo_v13.search_read(
-                "account.move.line",
-                [("payment_id", "in", batch_ids)],
-                fields=["move_id", "payment_id"],
-            )
-            for l in lines_v13:
-                v13_move_id = l["move_id"][0]
-                v13_payment_id = l["payment_id"][0]
-                v18_payment_id = payment_v13_to_v18.get(v13_payment_id)
-                if v18_payment_id and v18_payment_id in payment_id_to_move:
-                    payment_move_v13_to_v18[v13_move_id] = payment_id_to_move[
-                        v18_payment_id
-                    ]
+        # (el cliente divide la lista en lotes)
+        lines_v13 = odoo_v13.search_read(
+            "account.move.line",
+            [("payment_id", "in", v13_payment_ids)],
+            fields=["move_id", "payment_id"],
+        )
+        for l in lines_v13:
+            v13_move_id = l["move_id"][0]
+            v13_payment_id = l["payment_id"][0]
+            v18_payment_id = payment_v13_to_v18.get(v13_payment_id)
+            if v18_payment_id and v18_payment_id in payment_id_to_move:
+                payment_move_v13_to_v18[v13_move_id] = payment_id_to_move[
+                    v18_payment_id
+                ]
 
     print(f"Facturas migradas: {len(invoice_map)}")
     print(f"Pagos migrados: {len(payment_v13_to_v18)}")
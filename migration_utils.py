@@ -5,9 +5,14 @@ Autor: andyengit
 Mantenedor: andyengit
 """
 
-from typing import Optional
-from functools import lru_cache
+import os
+import threading
+import xmlrpc.client
+from typing import Callable, Iterable, Iterator, Optional
 from connections import odoo_v13, odoo_v18
+from id_map import IdMap
+from odoo_cache import DEFAULT_MAPPING_CACHE_SIZE, DEFAULT_NEGATIVE_TTL, MappingCache
+from tracking_mirror import TrackingMirror
 
 
 # Mapeo de modelos que cambiaron de nombre entre v13 y v18
@@ -30,7 +35,333 @@ def get_v13_model(v18_model: str) -> str:
     return MODEL_MAP_V18_TO_V13.get(v18_model, v18_model)
 
 
-@lru_cache(maxsize=None)
+def databases() -> dict:
+    """
+    Servidor y base de datos de v13 y v18, para saber de qué migración son
+    los ficheros locales (puntos de control, instantáneas).
+    """
+    return {
+        "v13": f"{odoo_v13.url}/{odoo_v13.db}",
+        "v18": f"{odoo_v18.url}/{odoo_v18.db}",
+    }
+
+
+# Réplica local en SQLite de migration.tracking (vacío = desactivada)
+TRACKING_MIRROR_FILE = os.getenv("TRACKING_MIRROR_FILE", "")
+
+_tracking_mirror: Optional[TrackingMirror] = None
+_tracking_mirror_lock = threading.Lock()
+
+
+def get_tracking_mirror() -> Optional[TrackingMirror]:
+    """
+    Retorna la réplica local de 'migration.tracking'.
+
+    La primera llamada abre el fichero TRACKING_MIRROR_FILE y trae de v18
+    las filas nuevas desde la última ejecución (o la reconstruye entera si
+    viene de otra base de datos de v18 o ya no coincide con ella).
+
+    Returns:
+        El TrackingMirror del proceso, o None si está desactivado
+    """
+    global _tracking_mirror
+    if not TRACKING_MIRROR_FILE:
+        return None
+    if _tracking_mirror is None:
+        with _tracking_mirror_lock:
+            if _tracking_mirror is None:
+                mirror = TrackingMirror(TRACKING_MIRROR_FILE)
+                mirror.validate(odoo_v18)
+                mirror.sync(odoo_v18)
+                _tracking_mirror = mirror
+    return _tracking_mirror
+
+
+def _tracking_rows(
+    models: Iterable[str],
+    after_id: int = 0,
+    upto_id: Optional[int] = None
+) -> Iterator[dict]:
+    """
+    Recorre las filas de tracking de los modelos por ID, desde la réplica
+    local si está activa (sincronizándola antes) o desde v18.
+    """
+    models = list(models)
+    mirror = get_tracking_mirror()
+    if mirror is not None:
+        if upto_id is None:
+            mirror.sync(odoo_v18)
+        return mirror.rows(models, after_id, upto_id)
+
+    domain = [("model_name", "in", models), ("id", ">", after_id)]
+    if upto_id is not None:
+        domain.append(("id", "<=", upto_id))
+    return odoo_v18.search_read_iter(
+        "migration.tracking",
+        domain,
+        fields=["model_name", "v13_id", "v18_id"],
+        page_size=TrackingIndex.PAGE_SIZE,
+    )
+
+
+def load_id_map(*models: str, path: Optional[str] = None) -> IdMap:
+    """
+    Carga el mapeo v13_id -> v18_id de uno o varios modelos en un `IdMap`.
+
+    Las filas se leen en streaming (de la réplica local si está activa) sin
+    pasar por un diccionario, así que millones de pares ocupan decenas de MB.
+    Si hay varias filas para el mismo v13_id gana la primera, como en
+    `get_v18_id`.
+
+    Args:
+        *models: Modelos (v13 o v18)
+        path: (Opcional) Fichero donde guardar el mapeo para abrirlo después
+              con `IdMap.load(path)`
+
+    Returns:
+        IdMap v13_id -> v18_id (`inverse()` da v18_id -> v13_id)
+
+    Example:
+        >>> partner_map = load_id_map('res.partner')
+        >>> partner_map.get_many([10, 11, 12])
+    """
+    v18_models = [get_v18_model(m) for m in models]
+    id_map = IdMap.from_pairs(
+        ((row["v13_id"], row["v18_id"]) for row in _tracking_rows(v18_models)),
+        keep="first",
+    )
+    if path:
+        id_map.save(path)
+    return id_map
+
+
+# Cachés compartidas por las funciones escalares y vectoriales.
+# Clave: (modelo en v18 o None, id). Valor: id traducido o None si no existe;
+# los None caducan a los MAPPING_NEGATIVE_TTL segundos.
+MAPPING_CACHE_SIZE = int(os.getenv("MAPPING_CACHE_SIZE", DEFAULT_MAPPING_CACHE_SIZE))
+MAPPING_NEGATIVE_TTL = float(os.getenv("MAPPING_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL))
+_v18_id_cache = MappingCache(MAPPING_CACHE_SIZE, MAPPING_NEGATIVE_TTL)
+_v13_id_cache = MappingCache(MAPPING_CACHE_SIZE, MAPPING_NEGATIVE_TTL)
+
+
+class TrackingIndex:
+    """
+    Copia en memoria de 'migration.tracking' para los modelos indicados.
+
+    Se carga con una sola pasada paginada por ID y se actualiza de forma
+    incremental pidiendo solo las filas con ID mayor que la última vista.
+    Si la réplica SQLite está activa, las filas se leen de ella.
+    Las búsquedas en ambos sentidos son accesos a diccionario.
+
+    Example:
+        >>> tracking = load_tracking_index('account.move', 'res.partner')
+        >>> tracking.is_migrated(123, 'account.move')
+        >>> tracking.get_v18_id(456, 'res.partner')
+    """
+
+    PAGE_SIZE = 5000
+
+    def __init__(self, models: Iterable[str]):
+        """
+        Args:
+            models: Modelos (v13 o v18) a indexar
+        """
+        self.models = {get_v18_model(m) for m in models}
+        self.last_id = 0
+        self._v13_to_v18: dict = {m: {} for m in self.models}
+        self._v18_to_v13: dict = {m: {} for m in self.models}
+        self._lock = threading.Lock()
+
+    def covers(self, model: Optional[str]) -> bool:
+        """Indica si el modelo está indexado."""
+        return bool(model) and get_v18_model(model) in self.models
+
+    def add_models(self, models: Iterable[str]):
+        """
+        Añade modelos al índice y carga sus filas completas.
+
+        Las filas de los modelos ya indexados no se vuelven a pedir; las
+        nuevas filas de todos los modelos se traen en el siguiente `refresh`.
+        """
+        new_models = {get_v18_model(m) for m in models} - self.models
+        if not new_models:
+            return
+
+        with self._lock:
+            for model in new_models:
+                self._v13_to_v18[model] = {}
+                self._v18_to_v13[model] = {}
+            for row in _tracking_rows(new_models, upto_id=self.last_id):
+                self._add_row(row)
+            self.models |= new_models
+
+    def refresh(self) -> int:
+        """
+        Trae las filas creadas desde la última carga.
+
+        Returns:
+            Número de filas nuevas
+        """
+        with self._lock:
+            count = 0
+            for row in _tracking_rows(self.models, after_id=self.last_id):
+                self._add_row(row)
+                self.last_id = max(self.last_id, row["id"])
+                count += 1
+            return count
+
+    def _add_row(self, row: dict):
+        model = row["model_name"]
+        # Si hay varias filas para el mismo ID, gana la primera (como limit=1)
+        self._v13_to_v18[model].setdefault(row["v13_id"], row["v18_id"])
+        self._v18_to_v13[model].setdefault(row["v18_id"], row["v13_id"])
+
+    def add(self, model: str, v13_id: int, v18_id: int):
+        """Registra en el índice un mapeo recién creado por este proceso."""
+        model = get_v18_model(model)
+        with self._lock:
+            self._v13_to_v18.setdefault(model, {}).setdefault(v13_id, v18_id)
+            self._v18_to_v13.setdefault(model, {}).setdefault(v18_id, v13_id)
+
+    def discard(self, model: str, v13_id: int):
+        """Quita del índice el mapeo de un registro de v13."""
+        model = get_v18_model(model)
+        with self._lock:
+            v18_id = self._v13_to_v18.get(model, {}).pop(v13_id, None)
+            if v18_id is not None and self._v18_to_v13[model].get(v18_id) == v13_id:
+                del self._v18_to_v13[model][v18_id]
+
+    def get_v18_id(self, v13_id: int, model: str) -> Optional[int]:
+        """Retorna el v18_id de un registro de v13, o None si no fue migrado."""
+        return self._v13_to_v18[get_v18_model(model)].get(v13_id)
+
+    def get_v13_id(self, v18_id: int, model: str) -> Optional[int]:
+        """Retorna el v13_id de un registro de v18, o None si no existe."""
+        return self._v18_to_v13[get_v18_model(model)].get(v18_id)
+
+    def is_migrated(self, v13_id: int, model: str) -> bool:
+        """Indica si el registro de v13 ya fue migrado."""
+        return v13_id in self._v13_to_v18[get_v18_model(model)]
+
+    def mapping(self, model: str) -> dict:
+        """Retorna una copia del mapeo v13_id -> v18_id de un modelo."""
+        return dict(self._v13_to_v18[get_v18_model(model)])
+
+    def __len__(self) -> int:
+        return sum(len(m) for m in self._v13_to_v18.values())
+
+    def __repr__(self) -> str:
+        return f"<TrackingIndex models={sorted(self.models)} rows={len(self)}>"
+
+
+_tracking_index: Optional[TrackingIndex] = None
+
+
+def load_tracking_index(*models: str) -> TrackingIndex:
+    """
+    Carga (o amplía y actualiza) el índice de tracking del proceso.
+
+    A partir de ese momento `get_v18_id`, `get_v13_id`, `get_v18_ids`,
+    `get_v13_ids` e `is_migrated` responden desde memoria para estos modelos.
+
+    Args:
+        *models: Modelos (v13 o v18) a indexar
+
+    Returns:
+        El TrackingIndex compartido
+    """
+    global _tracking_index
+    if _tracking_index is None:
+        _tracking_index = TrackingIndex(models)
+    else:
+        _tracking_index.add_models(models)
+    _tracking_index.refresh()
+    return _tracking_index
+
+
+def get_tracking_index() -> Optional[TrackingIndex]:
+    """Retorna el índice de tracking cargado, o None si no se ha cargado."""
+    return _tracking_index
+
+
+def _lookup_ids(
+    ids: Iterable[int],
+    model: Optional[str],
+    cache: MappingCache,
+    from_field: str,
+    to_field: str,
+) -> dict:
+    """
+    Traduce IDs con migration.tracking usando el índice de tracking, la
+    caché y una sola búsqueda (dividida en lotes por el cliente) para los
+    que falten.
+
+    Un fallo en el índice no es definitivo (la fila puede haberse creado
+    después del último `refresh`): esos IDs siguen el camino de la caché,
+    donde los fallos caducan a los MAPPING_NEGATIVE_TTL segundos.
+
+    Returns:
+        Diccionario id origen -> id destino, solo con los encontrados
+    """
+    v18_model = get_v18_model(model) if model else None
+    ids = list(dict.fromkeys(ids))
+
+    result = {}
+    if _tracking_index is not None and _tracking_index.covers(v18_model):
+        lookup = (
+            _tracking_index.get_v18_id
+            if to_field == "v18_id"
+            else _tracking_index.get_v13_id
+        )
+        not_indexed = []
+        for record_id in ids:
+            value = lookup(record_id, v18_model)
+            if value is not None:
+                result[record_id] = value
+            else:
+                not_indexed.append(record_id)
+        ids = not_indexed
+        if not ids:
+            return result
+
+    cached, missing = cache.get_many(v18_model, ids)
+    result.update((k, v) for k, v in cached.items() if v is not None)
+
+    if not missing:
+        return result
+
+    mirror = get_tracking_mirror()
+    if mirror is not None:
+        found = mirror.lookup(v18_model, missing, from_field, to_field)
+        cache.put_many(v18_model, found)
+        result.update(found)
+        missing = [record_id for record_id in missing if record_id not in found]
+        if not missing:
+            return result
+
+    domain = [(from_field, "in", missing)]
+    if v18_model:
+        domain.append(("model_name", "=", v18_model))
+
+    rows = odoo_v18.search_read(
+        "migration.tracking", domain, fields=["model_name", "v13_id", "v18_id"]
+    )
+    if mirror is not None and rows:
+        mirror.add_many(rows)
+
+    # Si hay varias filas para el mismo ID, gana la primera (como limit=1)
+    found = {}
+    for row in sorted(rows, key=lambda r: r["id"]):
+        found.setdefault(row[from_field], row[to_field])
+
+    cache.put_many(
+        v18_model, {record_id: found.get(record_id) for record_id in missing}
+    )
+    result.update(found)
+
+    return result
+
+
 def get_v18_id(v13_id: int, model: Optional[str] = None) -> Optional[int]:
     """
     Busca el ID correspondiente en Odoo v18 a partir de un ID de v13.
@@ -57,23 +388,31 @@ def get_v18_id(v13_id: int, model: Optional[str] = None) -> Optional[int]:
         ... else:
         ...     print("El registro no ha sido migrado")
     """
-    domain = [("v13_id", "=", v13_id)]
+    return _lookup_ids([v13_id], model, _v18_id_cache, "v13_id", "v18_id").get(v13_id)
 
-    if model:
-        v18_model = get_v18_model(model)
-        domain.append(("model_name", "=", v18_model))
 
-    result = odoo_v18.search_read(
-        "migration.tracking", domain, fields=["v18_id"], limit=1
-    )
+def get_v18_ids(v13_ids: Iterable[int], model: Optional[str] = None) -> dict:
+    """
+    Versión vectorial de `get_v18_id`: traduce muchos IDs de v13 a la vez.
 
-    if result:
-        return result[0]["v18_id"]
+    Los IDs que no están en caché se resuelven con una sola búsqueda en
+    'migration.tracking' (dividida en lotes si la lista es larga). Comparte
+    la caché con `get_v18_id`.
 
-    return None
+    Args:
+        v13_ids: IDs de los registros en Odoo v13
+        model: (Opcional) Nombre del modelo (v13 o v18) para filtrar la búsqueda.
+
+    Returns:
+        Diccionario v13_id -> v18_id. Los IDs no migrados no aparecen.
+
+    Example:
+        >>> partner_map = get_v18_ids([10, 11, 12], 'res.partner')
+        >>> partner_map.get(10)
+    """
+    return _lookup_ids(v13_ids, model, _v18_id_cache, "v13_id", "v18_id")
 
 
-@lru_cache(maxsize=None)
 def get_v13_id(v18_id: int, model: Optional[str] = None) -> Optional[int]:
     """
     Busca el ID correspondiente en Odoo v13 a partir de un ID de v18.
@@ -88,26 +427,116 @@ def get_v13_id(v18_id: int, model: Optional[str] = None) -> Optional[int]:
     Returns:
         El v13_id si se encuentra el registro, None en caso contrario.
     """
-    domain = [("v18_id", "=", v18_id)]
+    return _lookup_ids([v18_id], model, _v13_id_cache, "v18_id", "v13_id").get(v18_id)
 
-    if model:
-        v18_model = get_v18_model(model)
-        domain.append(("model_name", "=", v18_model))
 
-    result = odoo_v18.search_read(
-        "migration.tracking", domain, fields=["v13_id"], limit=1
+def get_v13_ids(v18_ids: Iterable[int], model: Optional[str] = None) -> dict:
+    """
+    Versión vectorial de `get_v13_id`: traduce muchos IDs de v18 a la vez.
+
+    Comparte la caché con `get_v13_id`.
+
+    Args:
+        v18_ids: IDs de los registros en Odoo v18
+        model: (Opcional) Nombre del modelo (v13 o v18) para filtrar la búsqueda.
+
+    Returns:
+        Diccionario v18_id -> v13_id. Los IDs sin registro de migración no aparecen.
+    """
+    return _lookup_ids(v18_ids, model, _v13_id_cache, "v18_id", "v13_id")
+
+
+def record_mapping(
+    model: str,
+    v13_id: int,
+    v18_id: int,
+    tracking_id: Optional[int] = None
+):
+    """
+    Registra un mapeo recién creado en 'migration.tracking'.
+
+    Actualiza las cachés de `get_v18_id` / `get_v13_id`, el índice de
+    tracking si está cargado y la réplica local si se indica el ID de la
+    fila creada. Los scripts deben llamarla tras cada `create` de tracking.
+
+    Args:
+        model: Nombre del modelo (v13 o v18)
+        v13_id: ID del registro en Odoo v13
+        v18_id: ID del registro en Odoo v18
+        tracking_id: (Opcional) ID de la fila creada en 'migration.tracking'
+    """
+    v18_model = get_v18_model(model)
+    _v18_id_cache.put(v18_model, v13_id, v18_id)
+    _v13_id_cache.put(v18_model, v18_id, v13_id)
+    # Las búsquedas sin modelo pueden haber guardado un fallo
+    _v18_id_cache.invalidate(None, v13_id)
+    _v13_id_cache.invalidate(None, v18_id)
+
+    if _tracking_index is not None and _tracking_index.covers(v18_model):
+        _tracking_index.add(v18_model, v13_id, v18_id)
+
+    mirror = get_tracking_mirror()
+    if mirror is not None and tracking_id:
+        mirror.add(tracking_id, v18_model, v13_id, v18_id)
+
+
+def invalidate(model: str, v13_id: int):
+    """
+    Olvida lo que se sabe del mapeo de un registro de v13.
+
+    Borra el registro de las cachés, del índice de tracking y de la réplica
+    local y vuelve a leer de v18 su fila de tracking, si todavía existe.
+    Útil si se borra o corrige a mano una fila de 'migration.tracking'.
+
+    Args:
+        model: Nombre del modelo (v13 o v18)
+        v13_id: ID del registro en Odoo v13
+    """
+    v18_model = get_v18_model(model)
+    v18_id = _v18_id_cache.peek(v18_model, v13_id)
+    _v18_id_cache.invalidate(v18_model, v13_id)
+    _v18_id_cache.invalidate(None, v13_id)
+    if v18_id is not None:
+        _v13_id_cache.invalidate(v18_model, v18_id)
+        _v13_id_cache.invalidate(None, v18_id)
+    if _tracking_index is not None and _tracking_index.covers(v18_model):
+        _tracking_index.discard(v18_model, v13_id)
+
+    mirror = get_tracking_mirror()
+    if mirror is not None:
+        mirror.discard(v18_model, v13_id)
+
+    rows = odoo_v18.search_read(
+        "migration.tracking",
+        [("model_name", "=", v18_model), ("v13_id", "=", v13_id)],
+        fields=["v18_id"],
+        order="id",
+        limit=1,
     )
+    if rows:
+        record_mapping(v18_model, v13_id, rows[0]["v18_id"], rows[0]["id"])
 
-    if result:
-        return result[0]["v13_id"]
 
-    return None
+def mapping_cache_stats() -> dict:
+    """
+    Retorna tamaño, aciertos y fallos de las cachés de traducción de IDs.
+
+    Returns:
+        Diccionario con las estadísticas de 'v13_to_v18' y 'v18_to_v13'
+    """
+    return {
+        "v13_to_v18": _v18_id_cache.stats(),
+        "v18_to_v13": _v13_id_cache.stats(),
+    }
 
 
 def is_migrated(v13_id: int, model: Optional[str] = None) -> bool:
     """
     Verifica si un registro de v13 ya fue migrado a v18.
 
+    Si el modelo está en el índice de tracking (`load_tracking_index`),
+    se responde desde memoria.
+
     Args:
         v13_id: ID del registro en Odoo v13
         model: (Opcional) Nombre del modelo para filtrar la búsqueda.
@@ -181,3 +610,295 @@ def get_v13_record(
         return result[0]
 
     return None
+
+
+def get_v18_records(
+    v13_ids: Iterable[int], model_name: str, fields: Optional[list] = None
+) -> tuple:
+    """
+    Versión en bloque de `get_v18_record`.
+
+    Traduce todos los IDs con `get_v18_ids` y lee los registros de v18 con
+    un solo `read` (dividido en lotes por el cliente).
+
+    Args:
+        v13_ids: IDs de los registros en Odoo v13
+        model_name: Nombre del modelo (v13 o v18)
+        fields: Lista de campos a obtener. Si es None, retorna todos los campos.
+
+    Returns:
+        Tupla (diccionario v13_id -> registro de v18, lista de v13_ids sin
+        registro en v18: no migrados o borrados en v18)
+
+    Example:
+        >>> contracts, missing = get_v18_records(
+        ...     [70611, 70612], 'contract.contract', ['name', 'distributor_id']
+        ... )
+        >>> contracts[70611]['name']
+    """
+    v13_ids = list(dict.fromkeys(v13_ids))
+    id_map = get_v18_ids(v13_ids, model_name)
+
+    records_by_v18_id = {}
+    if id_map:
+        v18_model = get_v18_model(model_name)
+        v18_ids = list(dict.fromkeys(id_map.values()))
+        for record in odoo_v18.read(v18_model, v18_ids, fields):
+            records_by_v18_id[record["id"]] = record
+
+    records = {}
+    missing = []
+    for v13_id in v13_ids:
+        record = records_by_v18_id.get(id_map.get(v13_id))
+        if record is None:
+            missing.append(v13_id)
+        else:
+            records[v13_id] = record
+    return records, missing
+
+
+def get_v13_records(
+    v13_ids: Iterable[int], model_name: str, fields: Optional[list] = None
+) -> tuple:
+    """
+    Versión en bloque de `get_v13_record`: un solo `read` en v13.
+
+    Args:
+        v13_ids: IDs de los registros en Odoo v13
+        model_name: Nombre del modelo en v13 (ej: 'contract.contract')
+        fields: Lista de campos a obtener. Si es None, retorna todos los campos.
+
+    Returns:
+        Tupla (diccionario v13_id -> registro de v13, lista de v13_ids que
+        no existen en v13)
+    """
+    v13_ids = list(dict.fromkeys(v13_ids))
+    records = {}
+    if v13_ids:
+        records = {r["id"]: r for r in odoo_v13.read(model_name, v13_ids, fields)}
+    missing = [v13_id for v13_id in v13_ids if v13_id not in records]
+    return records, missing
+
+
+def _post_records(method: str, ids: Iterable[int]) -> dict:
+    """Publica registros con `migration.helper.<method>` en una sola llamada."""
+    ids = list(ids)
+    if not ids:
+        return {}
+    statuses = odoo_v18.execute("migration.helper", method, ids)
+    return {s["id"]: None if s["ok"] else s["error"] for s in statuses}
+
+
+def post_moves(move_ids: Iterable[int]) -> dict:
+    """
+    Publica varios account.move de v18 con una sola llamada a
+    `migration.helper.post_moves`. Cada asiento se publica en su propio
+    savepoint, así que uno con error no impide publicar los demás.
+
+    Args:
+        move_ids: IDs de account.move en v18
+
+    Returns:
+        Diccionario id -> None si se publicó, o el mensaje de error
+
+    Example:
+        >>> for move_id, error in post_moves([42, 43]).items():
+        ...     if error:
+        ...         print(f"No se pudo publicar {move_id}: {error}")
+    """
+    return _post_records("post_moves", move_ids)
+
+
+def post_payments(payment_ids: Iterable[int]) -> dict:
+    """
+    Igual que `post_moves` para account.payment
+    (`migration.helper.post_payments`).
+
+    Returns:
+        Diccionario id -> None si se publicó, o el mensaje de error
+    """
+    return _post_records("post_payments", payment_ids)
+
+
+def create_tracking(rows: list) -> list:
+    """
+    Crea las filas de 'migration.tracking' de un lote con una sola llamada a
+    `migration.helper.create_tracking` y registra los mapeos en las cachés,
+    el índice y la réplica local (como `record_mapping`).
+
+    La llamada es una transacción en el servidor: si falla no se crea
+    ninguna fila. Reenviar un lote no duplica las filas que ya se crearon.
+
+    Args:
+        rows: Diccionarios con name, model_name, v13_id y v18_id
+
+    Returns:
+        IDs de las filas de tracking, en el mismo orden
+
+    Example:
+        >>> create_tracking([{
+        ...     "name": "res.partner:10",
+        ...     "model_name": "res.partner",
+        ...     "v13_id": 10,
+        ...     "v18_id": 2031,
+        ... }])
+        [901]
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    tracking_ids = odoo_v18.execute("migration.helper", "create_tracking", rows)
+    for row, tracking_id in zip(rows, tracking_ids):
+        record_mapping(row["model_name"], row["v13_id"], row["v18_id"], tracking_id)
+    return tracking_ids
+
+
+
+def create_with_tracking(
+    method: str,
+    vals_list: list,
+    v13_ids: list,
+    model_name: str,
+    **kwargs
+) -> list:
+    """
+    Crea registros en v18 con una sola llamada a `migration.helper.<method>`
+    (`create_invoices_xmlrpc`, `create_payments_xmlrpc`,
+    `create_partners_xmlrpc`), que crea también sus filas de
+    'migration.tracking' en la misma transacción, y registra los mapeos como
+    `record_mapping`.
+
+    Si la llamada falla no se crea nada, así que la lista se divide en dos
+    mitades y se reintenta cada una hasta aislar los registros con error.
+
+    Args:
+        method: Método de migration.helper
+        vals_list: Valores de cada registro
+        v13_ids: ID de v13 de cada registro, en el mismo orden
+        model_name: Modelo de las filas de tracking
+        **kwargs: Argumentos adicionales del método (p. ej. model_name)
+
+    Returns:
+        Lista de tuplas (v18_id, mensaje de error), una por registro en el
+        mismo orden
+    """
+    if not vals_list:
+        return []
+
+    try:
+        new_ids = odoo_v18.execute(
+            "migration.helper", method, vals_list, v13_ids, **kwargs
+        )
+    except xmlrpc.client.Fault as e:
+        if len(vals_list) == 1:
+            return [(None, str(e))]
+    except Exception as e:
+        # Error de red: no se sabe si el servidor creó los registros, no se
+        # reintenta. Si los creó, también creó su tracking y la siguiente
+        # ejecución los salta.
+        return [(None, str(e))] * len(vals_list)
+    else:
+        for v13_id, new_id in zip(v13_ids, new_ids):
+            record_mapping(model_name, v13_id, new_id)
+        return [(new_id, None) for new_id in new_ids]
+
+    middle = len(vals_list) // 2
+    first = create_with_tracking(
+        method, vals_list[:middle], v13_ids[:middle], model_name, **kwargs
+    )
+    return first + create_with_tracking(
+        method, vals_list[middle:], v13_ids[middle:], model_name, **kwargs
+    )
+
+
+class PostingQueue:
+    """
+    Crea y publica por lotes registros de v18 junto con su tracking.
+
+    Cada lote se crea con una sola llamada que también crea sus filas de
+    'migration.tracking' en la misma transacción (`create_with_tracking`),
+    así un registro nunca existe en v18 sin su tracking aunque falle la
+    publicación o se interrumpa el script. Después se publica el lote con
+    otra llamada.
+
+    Example:
+        >>> queue = PostingQueue(
+        ...     "create_payments_xmlrpc", "account.payment", post_payments
+        ... )
+        >>> queue.add(payment_v13, payment_vals)
+        >>> queue.flush()
+        >>> queue.migrated, queue.errors
+    """
+
+    def __init__(
+        self,
+        create_method: str,
+        model_name: str,
+        post: Callable[[list], dict],
+        batch_size: int = 50,
+        **create_kwargs
+    ):
+        """
+        Args:
+            create_method: Método de migration.helper que crea el lote
+            model_name: Modelo de las filas de tracking
+            post: Función que publica una lista de IDs de v18 y devuelve
+                  id -> None o mensaje de error (`post_moves`, `post_payments`)
+            batch_size: Registros creados y publicados por llamada
+            **create_kwargs: Argumentos adicionales de `create_method`
+        """
+        self.create_method = create_method
+        self.model_name = model_name
+        self.post = post
+        self.batch_size = batch_size
+        self.create_kwargs = create_kwargs
+        self.migrated = 0
+        self.errors: list = []
+        self._pending: list = []
+
+    def _error(self, record: dict, message: str):
+        self.errors.append(f"[{record['id']}] {record['name']}: {message[:100]}")
+        print(f"  ✗ {record['name']}: {message[:80]}")
+
+    def add(self, record: dict, vals: dict):
+        """
+        Deja un registro pendiente de crear y publicar.
+
+        Args:
+            record: Registro de v13 (con id y name)
+            vals: Valores del registro en v18
+        """
+        self._pending.append((record, vals))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Crea con su tracking y publica los registros pendientes."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        created = create_with_tracking(
+            self.create_method,
+            [vals for _, vals in pending],
+            [record["id"] for record, _ in pending],
+            self.model_name,
+            **self.create_kwargs,
+        )
+
+        created_ids = [v18_id for v18_id, _ in created if v18_id]
+        try:
+            post_errors = self.post(created_ids)
+        except Exception as e:
+            post_errors = {v18_id: str(e) for v18_id in created_ids}
+
+        for (record, _), (v18_id, error) in zip(pending, created):
+            if error:
+                self._error(record, error)
+            elif post_errors.get(v18_id):
+                self._error(
+                    record,
+                    f"Creado en v18 (ID {v18_id}) sin publicar: {post_errors[v18_id]}",
+                )
+            else:
+                self.migrated += 1
+                print(f"  ✓ {record['name']} -> v18 ID: {v18_id}")
@@ -0,0 +1,223 @@
+"""
+Cliente asyncio para Odoo con concurrencia acotada por servidor.
+
+`AsyncOdooClient` envuelve un `OdooClient` (seguro entre hilos gracias al
+pool de conexiones) y ejecuta cada llamada en un pool de hilos, de modo que
+cientos de búsquedas y creaciones independientes pueden solaparse en la red
+desde un pipeline asyncio.
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from odoo_client import OdooClient
+from odoo_transport import get_pool
+
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Límite de llamadas en vuelo y pool de hilos compartidos por servidor (clave: URL).
+# El primer cliente que se crea para una URL fija el límite de ese servidor; los
+# siguientes deben pedir el mismo.
+_limits: dict = {}
+_executors: dict = {}
+_servers_lock = threading.Lock()
+
+# Semáforos por event loop y servidor (un asyncio.Semaphore no puede
+# compartirse entre loops distintos)
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _get_executor(url: str, max_concurrency: int) -> ThreadPoolExecutor:
+    """
+    Retorna el pool de hilos compartido para un servidor.
+
+    Raises:
+        ValueError: Si ya hay un pool para ese servidor con otro límite
+    """
+    with _servers_lock:
+        executor = _executors.get(url)
+        if executor is not None and _limits[url] != max_concurrency:
+            raise ValueError(
+                f"El servidor {url} ya tiene un límite de {_limits[url]} llamadas "
+                f"simultáneas (se pidió {max_concurrency})"
+            )
+        if executor is None:
+            _limits[url] = max_concurrency
+            executor = ThreadPoolExecutor(
+                max_workers=max_concurrency,
+                thread_name_prefix=f"odoo-async-{url}",
+            )
+            _executors[url] = executor
+        return executor
+
+
+def _get_semaphore(url: str) -> asyncio.Semaphore:
+    """Retorna el semáforo del servidor para el event loop actual."""
+    loop = asyncio.get_running_loop()
+    with _servers_lock:
+        per_loop = _semaphores.setdefault(loop, {})
+        semaphore = per_loop.get(url)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(_limits[url])
+            per_loop[url] = semaphore
+        return semaphore
+
+
+class AsyncOdooClient:
+    """
+    Contraparte asyncio de `OdooClient`.
+
+    Todas las operaciones son corrutinas. Un semáforo por servidor limita las
+    llamadas en vuelo, y las operaciones de escritura sobre un cliente de
+    solo lectura fallan antes de enviar nada.
+
+    Example:
+        >>> v18 = AsyncOdooClient(odoo_v18, max_concurrency=16)
+        >>> ids = await asyncio.gather(*(v18.create('res.partner', v) for v in vals))
+    """
+
+    def __init__(
+        self,
+        client: OdooClient,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    ):
+        """
+        Inicializa el cliente asíncrono.
+
+        Args:
+            client: Cliente síncrono a envolver
+            max_concurrency: Máximo de llamadas simultáneas al servidor. Es
+                             compartido por todos los clientes de la misma
+                             URL, que deben usar el mismo valor.
+
+        Raises:
+            ValueError: Si otro cliente de la misma URL usa otro límite
+        """
+        self.client = client
+        self.max_concurrency = max_concurrency
+
+        self._executor = _get_executor(client.url, max_concurrency)
+
+        # Asegurar conexiones suficientes para las llamadas en vuelo
+        get_pool(client.url, maxsize=max_concurrency)
+
+    @property
+    def readonly(self) -> bool:
+        return self.client.readonly
+
+    async def _run(self, func, *args, **kwargs) -> Any:
+        """Ejecuta una llamada bloqueante del cliente respetando el semáforo."""
+        loop = asyncio.get_running_loop()
+        async with _get_semaphore(self.client.url):
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+
+    async def authenticate(self) -> int:
+        """Autentica al usuario y retorna el UID."""
+        return await self._run(self.client.authenticate)
+
+    async def execute(self, model: str, method: str, *args, **kwargs) -> Any:
+        """
+        Ejecuta un método en un modelo de Odoo.
+
+        Args:
+            model: Nombre del modelo (ej: 'res.partner')
+            method: Método a ejecutar (ej: 'search', 'read', 'create')
+            *args: Argumentos posicionales
+            **kwargs: Argumentos de palabra clave
+
+        Returns:
+            Resultado de la operación
+
+        Raises:
+            OdooClientReadOnlyError: Si el método escribe y el cliente es de solo lectura
+        """
+        self.client._check_readonly(method)
+        return await self._run(self.client.execute, model, method, *args, **kwargs)
+
+    async def search(
+        self,
+        model: str,
+        domain: list,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        order: Optional[str] = None
+    ) -> list:
+        """Busca registros que coincidan con el dominio. Retorna IDs."""
+        return await self._run(
+            self.client.search, model, domain, offset=offset, limit=limit, order=order
+        )
+
+    async def search_count(self, model: str, domain: list) -> int:
+        """Cuenta registros que coincidan con el dominio."""
+        return await self._run(self.client.search_count, model, domain)
+
+    async def read(
+        self,
+        model: str,
+        ids: list,
+        fields: Optional[list] = None
+    ) -> list:
+        """Lee registros por sus IDs."""
+        return await self._run(self.client.read, model, ids, fields)
+
+    async def search_read(
+        self,
+        model: str,
+        domain: list,
+        fields: Optional[list] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        order: Optional[str] = None
+    ) -> list:
+        """Busca y lee registros en una sola llamada."""
+        return await self._run(
+            self.client.search_read,
+            model,
+            domain,
+            fields=fields,
+            offset=offset,
+            limit=limit,
+            order=order,
+        )
+
+    async def create(self, model: str, values: dict) -> int:
+        """
+        Crea un nuevo registro.
+
+        Raises:
+            OdooClientReadOnlyError: Si el cliente es de solo lectura
+        """
+        self.client._check_readonly('create')
+        return await self._run(self.client.create, model, values)
+
+    async def write(self, model: str, ids: list, values: dict) -> bool:
+        """
+        Actualiza registros existentes.
+
+        Raises:
+            OdooClientReadOnlyError: Si el cliente es de solo lectura
+        """
+        self.client._check_readonly('write')
+        return await self._run(self.client.write, model, ids, values)
+
+    async def unlink(self, model: str, ids: list) -> bool:
+        """
+        Elimina registros.
+
+        Raises:
+            OdooClientReadOnlyError: Si el cliente es de solo lectura
+        """
+        self.client._check_readonly('unlink')
+        return await self._run(self.client.unlink, model, ids)
+
+    def __repr__(self) -> str:
+        return f"<AsyncOdooClient {self.client!r} max_concurrency={self.max_concurrency}>"
@@ -0,0 +1,343 @@
+"""
+Cachés locales del cliente de Odoo.
+
+- `RecordCache`: caché LRU de registros leídos. Pensada para el cliente de
+  solo lectura de v13: la base origen está congelada durante la migración,
+  así que un registro leído una vez no cambia. Las entradas se indexan por
+  (modelo, id, campos) y se pueden guardar en disco para que la siguiente
+  ejecución arranque con la caché llena.
+- `MappingCache`: traducciones de IDs v13 <-> v18 de `migration_utils`,
+  acotada y con caducidad para los fallos (registros aún no migrados).
+- `AuthCache`: UID autenticado por (url, base de datos, usuario) guardado en
+  disco con caducidad, para que cada script no repita `authenticate()`.
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+DEFAULT_CACHE_SIZE = 100000
+DEFAULT_AUTH_TTL = 3600
+DEFAULT_MAPPING_CACHE_SIZE = 200000
+DEFAULT_NEGATIVE_TTL = 60
+
+
+def fieldset_key(fields: Optional[list]) -> Optional[tuple]:
+    """Normaliza una lista de campos para usarla como parte de la clave."""
+    if fields is None:
+        return None
+    return tuple(sorted(set(fields)))
+
+
+class RecordCache:
+    """
+    Caché LRU acotada de registros, segura entre hilos.
+
+    La clave es (modelo, id, campos): el mismo registro leído con campos
+    distintos ocupa entradas distintas.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, path: Optional[str] = None):
+        """
+        Inicializa la caché.
+
+        Args:
+            maxsize: Número máximo de registros guardados
+            path: (Opcional) Fichero JSON donde persistir la caché. Si existe,
+                  se carga al crearla.
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def get_many(self, model: str, ids: list, fields: Optional[list]) -> tuple:
+        """
+        Busca registros en la caché.
+
+        Args:
+            model: Nombre del modelo
+            ids: IDs a buscar
+            fields: Campos leídos (None = todos)
+
+        Returns:
+            Tupla (diccionario id -> copia del registro, lista de IDs que faltan)
+        """
+        fieldset = fieldset_key(fields)
+        found = {}
+        missing = []
+        with self._lock:
+            for record_id in ids:
+                key = (model, record_id, fieldset)
+                record = self._data.get(key)
+                if record is None:
+                    missing.append(record_id)
+                    continue
+                self._data.move_to_end(key)
+                found[record_id] = dict(record)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, model: str, records: list, fields: Optional[list]):
+        """Guarda registros leídos con `fields`, descartando los menos usados."""
+        fieldset = fieldset_key(fields)
+        with self._lock:
+            for record in records:
+                key = (model, record['id'], fieldset)
+                self._data[key] = dict(record)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Vacía la caché."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Retorna tamaño, aciertos y fallos de la caché."""
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def save(self, path: Optional[str] = None):
+        """
+        Guarda la caché en un fichero JSON (escritura atómica).
+
+        Args:
+            path: Fichero destino. Por defecto el indicado al crear la caché.
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("No se indicó fichero para guardar la caché")
+
+        with self._lock:
+            entries = [
+                [model, record_id, list(fieldset) if fieldset is not None else None, record]
+                for (model, record_id, fieldset), record in self._data.items()
+            ]
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Carga entradas desde un fichero JSON guardado con `save`."""
+        with open(path, 'r') as f:
+            entries = json.load(f)
+
+        with self._lock:
+            for model, record_id, fieldset, record in entries:
+                key = (model, record_id, tuple(fieldset) if fieldset is not None else None)
+                self._data[key] = record
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"<RecordCache size={len(self._data)} maxsize={self.maxsize}>"
+
+
+class MappingCache:
+    """
+    Caché LRU acotada de traducciones de IDs, segura entre hilos.
+
+    La clave es (modelo, id). Un valor None indica que el registro no está
+    migrado; esas entradas caducan a los `negative_ttl` segundos para que un
+    registro creado después en el mismo proceso se vuelva a buscar.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAPPING_CACHE_SIZE,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL
+    ):
+        """
+        Args:
+            maxsize: Número máximo de entradas
+            negative_ttl: Segundos que se recuerda que un ID no está migrado
+        """
+        self.maxsize = maxsize
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, model: Optional[str], ids: list) -> tuple:
+        """
+        Busca traducciones en la caché.
+
+        Args:
+            model: Nombre del modelo (o None)
+            ids: IDs a traducir
+
+        Returns:
+            Tupla (diccionario id -> id traducido o None, lista de IDs que faltan)
+        """
+        found = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for record_id in ids:
+                key = (model, record_id)
+                entry = self._data.get(key)
+                if entry is None:
+                    missing.append(record_id)
+                    continue
+                value, expires = entry
+                if expires is not None and expires < now:
+                    del self._data[key]
+                    self.expired += 1
+                    missing.append(record_id)
+                    continue
+                self._data.move_to_end(key)
+                found[record_id] = value
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put(self, model: Optional[str], record_id: int, value: Optional[int]):
+        """Guarda una traducción (None = no migrado)."""
+        self.put_many(model, {record_id: value})
+
+    def put_many(self, model: Optional[str], values: dict):
+        """
+        Guarda traducciones, descartando las menos usadas.
+
+        Args:
+            model: Nombre del modelo (o None)
+            values: Diccionario id -> id traducido o None
+        """
+        expires = time.monotonic() + self.negative_ttl
+        with self._lock:
+            for record_id, value in values.items():
+                key = (model, record_id)
+                self._data[key] = (value, expires if value is None else None)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def peek(self, model: Optional[str], record_id: int) -> Optional[int]:
+        """Retorna la traducción guardada sin contarla como acierto."""
+        with self._lock:
+            entry = self._data.get((model, record_id))
+        return entry[0] if entry else None
+
+    def invalidate(self, model: Optional[str], record_id: Optional[int] = None):
+        """
+        Olvida la traducción de un ID, o todas las del modelo si no se indica.
+        """
+        with self._lock:
+            if record_id is not None:
+                self._data.pop((model, record_id), None)
+                return
+            for key in [k for k in self._data if k[0] == model]:
+                del self._data[key]
+
+    def clear(self):
+        """Vacía la caché."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Retorna tamaño, aciertos, fallos y entradas caducadas."""
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"<MappingCache size={len(self._data)} maxsize={self.maxsize}>"
+
+
+class AuthCache:
+    """
+    UIDs autenticados guardados en un fichero JSON con caducidad.
+
+    Solo se guarda el UID, nunca la contraseña: cada llamada RPC sigue
+    enviando la contraseña, así que un UID caducado o incorrecto provoca
+    un error de acceso y el cliente vuelve a autenticarse.
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_AUTH_TTL):
+        """
+        Args:
+            path: Fichero JSON donde se guardan los UIDs
+            ttl: Segundos que un UID guardado se considera válido
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url: str, db: str, username: str) -> str:
+        return f"{url}|{db}|{username}"
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, entries: dict):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, url: str, db: str, username: str) -> Optional[int]:
+        """Retorna el UID guardado si existe y no ha caducado."""
+        with self._lock:
+            entry = self._load().get(self._key(url, db, username))
+        if not entry or time.time() - entry['timestamp'] > self.ttl:
+            return None
+        return entry['uid']
+
+    def set(self, url: str, db: str, username: str, uid: int):
+        """Guarda el UID autenticado."""
+        with self._lock:
+            entries = self._load()
+            entries[self._key(url, db, username)] = {
+                'uid': uid,
+                'timestamp': time.time(),
+            }
+            self._save(entries)
+
+    def invalidate(self, url: str, db: str, username: str):
+        """Elimina el UID guardado."""
+        with self._lock:
+            entries = self._load()
+            if entries.pop(self._key(url, db, username), None) is not None:
+                self._save(entries)
+
+    def __repr__(self) -> str:
+        return f"<AuthCache {self.path} ttl={self.ttl}>"
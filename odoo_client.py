@@ -1,5 +1,38 @@
+import threading
+import time
 import xmlrpc.client
-from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional
+
+from odoo_cache import AuthCache, RecordCache
+from odoo_transport import (
+    DEFAULT_POOL_SIZE,
+    JsonRpcTransport,
+    PooledTransport,
+    get_pool,
+)
+
+
+PROTOCOL_XMLRPC = 'xmlrpc'
+PROTOCOL_JSONRPC = 'jsonrpc'
+PROTOCOLS = (PROTOCOL_XMLRPC, PROTOCOL_JSONRPC)
+
+
+DEFAULT_PAGE_SIZE = 500
+
+# Tamaño máximo de las listas de IDs (y de los valores de 'in' en dominios)
+# que se envían en una sola petición
+DEFAULT_CHUNK_SIZE = 1000
+
+# Endpoint del módulo odoo_migration_helper que ejecuta varias llamadas a la vez
+BATCH_MODEL = 'migration.helper'
+BATCH_METHOD = 'batch_execute'
+
+
+def chunked(items: list, size: int) -> list:
+    """Divide una lista en trozos de como máximo `size` elementos."""
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
 
 
 class OdooClientReadOnlyError(Exception):
@@ -7,9 +40,181 @@ class OdooClientReadOnlyError(Exception):
     pass
 
 
+class OdooBatchCallError(Exception):
+    """Excepción cuando una llamada de un lote (batch) falla en el servidor."""
+    pass
+
+
+class BatchResult:
+    """
+    Resultado diferido de una llamada encolada en un `OdooBatch`.
+    
+    El valor está disponible en `result` después de enviar el lote.
+    """
+    
+    def __init__(self, model: str, method: str):
+        self.model = model
+        self.method = method
+        self.done = False
+        self.ok = False
+        self.error: Optional[str] = None
+        self._result: Any = None
+    
+    def _set(self, response: dict):
+        self.done = True
+        self.ok = bool(response.get('ok'))
+        self.error = response.get('error')
+        self._result = response.get('result')
+    
+    @property
+    def result(self) -> Any:
+        """
+        Retorna el resultado de la llamada.
+        
+        Raises:
+            RuntimeError: Si el lote todavía no se envió
+            OdooBatchCallError: Si la llamada falló en el servidor
+        """
+        if not self.done:
+            raise RuntimeError(
+                f"{self.model}.{self.method}: el lote todavía no se ha enviado"
+            )
+        if not self.ok:
+            raise OdooBatchCallError(f"{self.model}.{self.method}: {self.error}")
+        return self._result
+    
+    def __repr__(self) -> str:
+        state = 'pending' if not self.done else ('ok' if self.ok else 'error')
+        return f"<BatchResult {self.model}.{self.method} {state}>"
+
+
+class OdooBatch:
+    """
+    Cola de llamadas que se envían juntas en una sola petición
+    (`migration.helper.batch_execute`).
+    
+    Se obtiene con `OdooClient.batch()` y se usa como context manager: al
+    salir del bloque sin errores se envían las llamadas pendientes.
+    
+    Example:
+        >>> with odoo_v18.batch() as batch:
+        ...     batch.execute('account.move', 'action_post', [move_id])
+        ...     lines = batch.search_read('account.move.line', [('move_id', '=', move_id)])
+        >>> lines.result
+    """
+    
+    def __init__(self, client: 'OdooClient', max_calls: Optional[int] = None):
+        """
+        Args:
+            client: Cliente por el que se envía el lote
+            max_calls: Si se indica, el lote se envía automáticamente al
+                       alcanzar este número de llamadas pendientes
+        """
+        self.client = client
+        self.max_calls = max_calls
+        self._calls: list = []
+        self._results: list = []
+    
+    def execute(self, model: str, method: str, *args, **kwargs) -> BatchResult:
+        """
+        Encola una llamada a un método de un modelo.
+        
+        Raises:
+            OdooClientReadOnlyError: Si el método escribe y el cliente es de solo lectura
+        """
+        self.client._check_readonly(method)
+        result = BatchResult(model, method)
+        self._calls.append([model, method, list(args), kwargs])
+        self._results.append(result)
+        if self.max_calls and len(self._calls) >= self.max_calls:
+            self.flush()
+        return result
+    
+    def read(self, model: str, ids: list, fields: Optional[list] = None) -> BatchResult:
+        """Encola un read."""
+        kwargs = {}
+        if fields is not None:
+            kwargs['fields'] = fields
+        return self.execute(model, 'read', ids, **kwargs)
+    
+    def search_read(
+        self,
+        model: str,
+        domain: list,
+        fields: Optional[list] = None,
+        limit: Optional[int] = None,
+        order: Optional[str] = None
+    ) -> BatchResult:
+        """Encola un search_read."""
+        kwargs = {}
+        if fields is not None:
+            kwargs['fields'] = fields
+        if limit is not None:
+            kwargs['limit'] = limit
+        if order is not None:
+            kwargs['order'] = order
+        return self.execute(model, 'search_read', domain, **kwargs)
+    
+    def create(self, model: str, values: dict) -> BatchResult:
+        """Encola un create."""
+        return self.execute(model, 'create', values)
+    
+    def write(self, model: str, ids: list, values: dict) -> BatchResult:
+        """Encola un write."""
+        return self.execute(model, 'write', ids, values)
+    
+    def unlink(self, model: str, ids: list) -> BatchResult:
+        """Encola un unlink."""
+        return self.execute(model, 'unlink', ids)
+    
+    def flush(self) -> list:
+        """
+        Envía las llamadas pendientes en una sola petición.
+        
+        Returns:
+            Lista de BatchResult de las llamadas enviadas, en orden
+        
+        Raises:
+            OdooBatchCallError: Si el servidor no devuelve una respuesta por llamada
+        """
+        if not self._calls:
+            return []
+        
+        calls, results = self._calls, self._results
+        self._calls, self._results = [], []
+        
+        responses = self.client.execute(BATCH_MODEL, BATCH_METHOD, calls)
+        if len(responses) != len(results):
+            raise OdooBatchCallError(
+                f"{BATCH_MODEL}.{BATCH_METHOD}: {len(responses)} respuestas "
+                f"para {len(results)} llamadas"
+            )
+        for result, response in zip(results, responses):
+            result._set(response)
+        return results
+    
+    def __len__(self) -> int:
+        return len(self._calls)
+    
+    def __enter__(self) -> 'OdooBatch':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self._calls, self._results = [], []
+        return False
+
+
 class OdooClient:
     """
-    Cliente para conectarse a Odoo vía XML-RPC.
+    Cliente para conectarse a Odoo vía XML-RPC o JSON-RPC.
+    
+    El protocolo se elige al crear el cliente; la API (execute, search_read,
+    create, ...) es la misma para ambos. Las peticiones se envían por un pool
+    de conexiones keep-alive compartido por servidor, por lo que una misma
+    instancia puede usarse desde varios hilos a la vez.
     
     Autor: andyengit
     Mantenedor: andyengit
@@ -21,7 +226,14 @@ class OdooClient:
         db: str,
         username: str,
         password: str,
-        readonly: bool = False
+        readonly: bool = False,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        protocol: str = PROTOCOL_XMLRPC,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_workers: int = 1,
+        cache_size: int = 0,
+        cache_path: Optional[str] = None,
+        auth_cache: Optional[AuthCache] = None
     ):
         """
         Inicializa el cliente de Odoo.
@@ -32,16 +244,165 @@ class OdooClient:
             username: Usuario de Odoo
             password: Contraseña del usuario
             readonly: Si es True, bloquea operaciones de escritura (create, write, unlink)
+            pool_size: Número máximo de conexiones HTTP simultáneas al servidor
+            protocol: Protocolo de transporte: 'xmlrpc' (por defecto) o 'jsonrpc'
+            chunk_size: Máximo de IDs por petición en read/write/unlink y de
+                        valores de un término 'in' en search_read
+            chunk_workers: Peticiones simultáneas al dividir en trozos (1 = secuencial)
+            cache_size: Si es mayor que 0, activa una caché LRU de registros
+                        para read (solo clientes readonly)
+            cache_path: (Opcional) Fichero JSON donde persistir la caché
+            auth_cache: (Opcional) Caché en disco del UID para no autenticar
+                        en cada ejecución
         """
+        if protocol not in PROTOCOLS:
+            raise ValueError(
+                f"Protocolo '{protocol}' no soportado. Opciones: {', '.join(PROTOCOLS)}"
+            )
+        if cache_size and not readonly:
+            raise ValueError(
+                "La caché de registros solo está disponible en clientes de solo lectura"
+            )
+        
         self.url = url.rstrip('/')
         self.db = db
         self.username = username
         self.password = password
         self.readonly = readonly
+        self.protocol = protocol
+        self.chunk_size = chunk_size
+        self.chunk_workers = chunk_workers
         self.uid: Optional[int] = None
+        self._auth_lock = threading.Lock()
+        self._auth_cache = auth_cache
+        self._uid_from_cache = False
+        self._hooks: list = []
+        self._limiter = None
+        self._cache: Optional[RecordCache] = (
+            RecordCache(cache_size, cache_path) if cache_size else None
+        )
+        
+        self._pool = get_pool(self.url, maxsize=pool_size)
+        if protocol == PROTOCOL_JSONRPC:
+            self._jsonrpc = JsonRpcTransport(self._pool)
+        else:
+            transport = PooledTransport(self._pool)
+            self._common = xmlrpc.client.ServerProxy(
+                f'{self.url}/xmlrpc/2/common', transport=transport
+            )
+            self._models = xmlrpc.client.ServerProxy(
+                f'{self.url}/xmlrpc/2/object', transport=transport
+            )
+    
+    def _call(self, service: str, method: str, *args) -> Any:
+        """
+        Envía una llamada RPC al servicio indicado con el protocolo configurado.
+        
+        Args:
+            service: Servicio de Odoo ('common' u 'object')
+            method: Método del servicio
+            *args: Argumentos posicionales
+            
+        Returns:
+            Resultado de la llamada
+        """
+        if self.protocol == PROTOCOL_JSONRPC:
+            return self._jsonrpc.call(service, method, *args)
+        proxy = self._common if service == 'common' else self._models
+        return getattr(proxy, method)(*args)
+    
+    def _map_chunks(self, func, chunks: list) -> list:
+        """
+        Aplica `func` a cada trozo, en paralelo si `chunk_workers` > 1.
+        
+        Returns:
+            Lista de resultados en el mismo orden que los trozos
+        """
+        workers = min(self.chunk_workers, len(chunks))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(func, chunks))
+        return [func(chunk) for chunk in chunks]
+    
+    def _find_chunkable_term(self, domain: list) -> Optional[int]:
+        """
+        Busca en el dominio el término ('campo', 'in', [...]) más largo que
+        supere `chunk_size`.
+        
+        Los dominios con negación ('!') no se dividen, porque la unión de
+        los resultados por trozos no sería equivalente.
+        
+        Returns:
+            Índice del término en el dominio, o None si no hay que dividir
+        """
+        if '!' in domain:
+            return None
+        
+        best = None
+        best_len = self.chunk_size
+        for index, term in enumerate(domain):
+            if (
+                isinstance(term, (list, tuple))
+                and len(term) == 3
+                and term[1] == 'in'
+                and isinstance(term[2], (list, tuple))
+                and len(term[2]) > best_len
+            ):
+                best = index
+                best_len = len(term[2])
+        return best
+    
+    def set_limiter(self, limiter):
+        """
+        Limita las llamadas en vuelo de `execute` con un controlador de
+        concurrencia (ver `odoo_concurrency.AdaptiveConcurrency`).
+        
+        Args:
+            limiter: Objeto con un método `slot(server, method)` que retorna
+                     un context manager, o None para quitar el límite
+        """
+        self._limiter = limiter
+    
+    def add_hook(self, hook: Callable[[dict], None]):
+        """
+        Registra una función que se llama después de cada `execute`.
         
-        self._common = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/common')
-        self._models = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/object')
+        La función recibe un diccionario con: server, model, method,
+        duration (segundos), request_bytes, response_bytes, records
+        (elementos del resultado si es una lista, 1 en otro caso) y error
+        (mensaje o None).
+        
+        Args:
+            hook: Función a llamar con los datos de cada llamada
+        """
+        self._hooks.append(hook)
+    
+    def remove_hook(self, hook: Callable[[dict], None]):
+        """Elimina una función registrada con `add_hook`."""
+        self._hooks.remove(hook)
+    
+    def _notify_hooks(
+        self,
+        model: str,
+        method: str,
+        started: float,
+        result: Any = None,
+        error: Optional[Exception] = None
+    ):
+        """Envía a los hooks los datos de una llamada terminada."""
+        request_bytes, response_bytes = self._pool.last_request_sizes()
+        event = {
+            'server': self.url,
+            'model': model,
+            'method': method,
+            'duration': time.perf_counter() - started,
+            'request_bytes': request_bytes,
+            'response_bytes': response_bytes,
+            'records': len(result) if isinstance(result, list) else 1,
+            'error': str(error) if error is not None else None,
+        }
+        for hook in self._hooks:
+            hook(event)
     
     def authenticate(self) -> int:
         """
@@ -53,23 +414,79 @@ class OdooClient:
         Raises:
             Exception: Si la autenticación falla
         """
-        self.uid = self._common.authenticate(
-            self.db, self.username, self.password, {}
+        self.uid = self._call(
+            'common', 'authenticate', self.db, self.username, self.password, {}
         )
         if not self.uid:
             raise Exception(
                 f"Error de autenticación en {self.url} con usuario {self.username}"
             )
+        self._uid_from_cache = False
+        if self._auth_cache is not None:
+            self._auth_cache.set(self.url, self.db, self.username, self.uid)
         return self.uid
     
     def version(self) -> dict:
         """Retorna información de la versión de Odoo."""
-        return self._common.version()
+        return self._call('common', 'version')
     
     def _ensure_authenticated(self):
         """Asegura que el cliente esté autenticado."""
         if self.uid is None:
-            self.authenticate()
+            with self._auth_lock:
+                if self.uid is None:
+                    cached_uid = None
+                    if self._auth_cache is not None:
+                        cached_uid = self._auth_cache.get(
+                            self.url, self.db, self.username
+                        )
+                    if cached_uid:
+                        self.uid = cached_uid
+                        self._uid_from_cache = True
+                    else:
+                        self.authenticate()
+    
+    def _execute_kw(self, model: str, method: str, args: tuple, kwargs: dict) -> Any:
+        """
+        Llama a execute_kw en el servidor.
+        
+        Si el UID venía de la caché de autenticación y el servidor lo
+        rechaza, se descarta, se vuelve a autenticar y se reintenta una vez.
+        """
+        try:
+            return self._call(
+                'object',
+                'execute_kw',
+                self.db,
+                self.uid,
+                self.password,
+                model,
+                method,
+                args,
+                kwargs
+            )
+        except xmlrpc.client.Fault as e:
+            access_denied = (
+                'AccessDenied' in e.faultString or 'Access Denied' in e.faultString
+            )
+            if not (self._uid_from_cache and access_denied):
+                raise
+        
+        self._auth_cache.invalidate(self.url, self.db, self.username)
+        with self._auth_lock:
+            if self._uid_from_cache:
+                self.authenticate()
+        return self._call(
+            'object',
+            'execute_kw',
+            self.db,
+            self.uid,
+            self.password,
+            model,
+            method,
+            args,
+            kwargs
+        )
     
     def _check_readonly(self, method: str):
         """Verifica si la operación está permitida en modo readonly."""
@@ -101,15 +518,21 @@ class OdooClient:
         self._ensure_authenticated()
         self._check_readonly(method)
         
-        return self._models.execute_kw(
-            self.db,
-            self.uid,
-            self.password,
-            model,
-            method,
-            args,
-            kwargs
-        )
+        started = time.perf_counter()
+        try:
+            if self._limiter is not None:
+                with self._limiter.slot(self.url, method):
+                    result = self._execute_kw(model, method, args, kwargs)
+            else:
+                result = self._execute_kw(model, method, args, kwargs)
+        except Exception as e:
+            if self._hooks:
+                self._notify_hooks(model, method, started, error=e)
+            raise
+        
+        if self._hooks:
+            self._notify_hooks(model, method, started, result)
+        return result
     
     def search(
         self,
@@ -162,6 +585,10 @@ class OdooClient:
         """
         Lee registros por sus IDs.
         
+        Las listas con más de `chunk_size` IDs se leen en varias peticiones
+        y los resultados se unen en orden. Si la caché está activa, solo se
+        piden al servidor los registros que no estén en ella.
+        
         Args:
             model: Nombre del modelo
             ids: Lista de IDs a leer
@@ -170,12 +597,44 @@ class OdooClient:
         Returns:
             Lista de diccionarios con los datos
         """
+        if self._cache is not None:
+            return self._read_cached(model, ids, fields)
+        return self._read(model, ids, fields)
+    
+    def _read(self, model: str, ids: list, fields: Optional[list]) -> list:
+        """Lee registros del servidor, dividiendo la lista de IDs si es larga."""
         kwargs = {}
         if fields is not None:
             kwargs['fields'] = fields
         
+        if len(ids) > self.chunk_size:
+            pages = self._map_chunks(
+                lambda chunk: self.execute(model, 'read', chunk, **kwargs),
+                chunked(ids, self.chunk_size),
+            )
+            return [record for page in pages for record in page]
+        
         return self.execute(model, 'read', ids, **kwargs)
     
+    def _read_cached(self, model: str, ids: list, fields: Optional[list]) -> list:
+        """Lee registros sirviendo desde la caché los que ya estén en ella."""
+        records, missing = self._cache.get_many(model, ids, fields)
+        if missing:
+            fetched = self._read(model, missing, fields)
+            self._cache.put_many(model, fetched, fields)
+            for record in fetched:
+                records[record['id']] = record
+        return [records[record_id] for record_id in ids if record_id in records]
+    
+    def cache_stats(self) -> Optional[dict]:
+        """Retorna las estadísticas de la caché de registros, o None si no está activa."""
+        return self._cache.stats() if self._cache is not None else None
+    
+    def save_cache(self):
+        """Guarda la caché de registros en su fichero, si tiene uno configurado."""
+        if self._cache is not None and self._cache.path:
+            self._cache.save()
+    
     def search_read(
         self,
         model: str,
@@ -188,6 +647,15 @@ class OdooClient:
         """
         Busca y lee registros en una sola llamada.
         
+        Si el dominio tiene un término ('campo', 'in', [...]) con más de
+        `chunk_size` valores y no se piden offset, limit ni order, la lista
+        se divide en trozos y los resultados se unen sin duplicados.
+        
+        La caché de registros solo se usa en `read`. Un dominio que solo
+        filtra por ID no se resuelve con ella, porque `read` devuelve también
+        los registros archivados y los devuelve en el orden de los IDs, no en
+        el `_order` del modelo.
+        
         Args:
             model: Nombre del modelo
             domain: Dominio de búsqueda
@@ -207,8 +675,120 @@ class OdooClient:
         if order is not None:
             kwargs['order'] = order
         
+        index = None
+        if not offset and limit is None and order is None:
+            index = self._find_chunkable_term(domain)
+        
+        if index is not None:
+            field, operator, values = domain[index]
+            
+            def search_chunk(chunk):
+                chunk_domain = list(domain)
+                chunk_domain[index] = (field, operator, chunk)
+                return self.execute(model, 'search_read', chunk_domain, **kwargs)
+            
+            pages = self._map_chunks(search_chunk, chunked(values, self.chunk_size))
+            
+            # Un registro puede aparecer en varios trozos si el campo es x2many
+            records = []
+            seen = set()
+            for page in pages:
+                for record in page:
+                    if record['id'] not in seen:
+                        seen.add(record['id'])
+                        records.append(record)
+            return records
+        
         return self.execute(model, 'search_read', domain, **kwargs)
     
+    def search_read_pages(
+        self,
+        model: str,
+        domain: list,
+        fields: Optional[list] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        prefetch: bool = False,
+        after_id: int = 0
+    ) -> Iterator[list]:
+        """
+        Recorre los registros del dominio por páginas ordenadas por ID.
+        
+        Pagina por clave (`id > último id`) en lugar de `offset`, así cada
+        página cuesta lo mismo en el servidor y no se saltan ni repiten
+        registros si la tabla cambia durante el recorrido.
+        
+        Args:
+            model: Nombre del modelo
+            domain: Dominio de búsqueda
+            fields: Lista de campos a retornar
+            page_size: Registros por página
+            prefetch: Si es True, pide la página siguiente en segundo plano
+                      mientras se procesa la actual
+            after_id: Empezar después de este ID (para reanudar un recorrido)
+            
+        Yields:
+            Listas de diccionarios (una por página), en orden de ID
+        """
+        def fetch(last_id: int) -> list:
+            return self.search_read(
+                model,
+                list(domain) + [('id', '>', last_id)],
+                fields=fields,
+                limit=page_size,
+                order='id asc',
+            )
+        
+        if not prefetch:
+            last_id = after_id
+            while True:
+                page = fetch(last_id)
+                if page:
+                    yield page
+                if len(page) < page_size:
+                    return
+                last_id = page[-1]['id']
+        
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            future = executor.submit(fetch, after_id)
+            while future is not None:
+                page = future.result()
+                future = None
+                if len(page) == page_size:
+                    future = executor.submit(fetch, page[-1]['id'])
+                if page:
+                    yield page
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def search_read_iter(
+        self,
+        model: str,
+        domain: list,
+        fields: Optional[list] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        prefetch: bool = False,
+        after_id: int = 0
+    ) -> Iterator[dict]:
+        """
+        Igual que `search_read_pages`, pero entrega los registros uno a uno.
+        
+        Example:
+            >>> for line in odoo_v13.search_read_iter(
+            ...         'account.move.line', [('parent_state', '=', 'posted')],
+            ...         fields=['debit', 'credit'], prefetch=True):
+            ...     total += line['debit'] - line['credit']
+        """
+        for page in self.search_read_pages(
+            model,
+            domain,
+            fields=fields,
+            page_size=page_size,
+            prefetch=prefetch,
+            after_id=after_id
+        ):
+            yield from page
+    
     def create(self, model: str, values: dict) -> int:
         """
         Crea un nuevo registro.
@@ -229,6 +809,8 @@ class OdooClient:
         """
         Actualiza registros existentes.
         
+        Las listas con más de `chunk_size` IDs se actualizan en varias peticiones.
+        
         Args:
             model: Nombre del modelo
             ids: Lista de IDs a actualizar
@@ -240,12 +822,21 @@ class OdooClient:
         Raises:
             OdooClientReadOnlyError: Si el cliente es de solo lectura
         """
+        if len(ids) > self.chunk_size:
+            self._check_readonly('write')
+            return all(self._map_chunks(
+                lambda chunk: self.execute(model, 'write', chunk, values),
+                chunked(ids, self.chunk_size),
+            ))
+        
         return self.execute(model, 'write', ids, values)
     
     def unlink(self, model: str, ids: list) -> bool:
         """
         Elimina registros.
         
+        Las listas con más de `chunk_size` IDs se eliminan en varias peticiones.
+        
         Args:
             model: Nombre del modelo
             ids: Lista de IDs a eliminar
@@ -256,6 +847,13 @@ class OdooClient:
         Raises:
             OdooClientReadOnlyError: Si el cliente es de solo lectura
         """
+        if len(ids) > self.chunk_size:
+            self._check_readonly('unlink')
+            return all(self._map_chunks(
+                lambda chunk: self.execute(model, 'unlink', chunk),
+                chunked(ids, self.chunk_size),
+            ))
+        
         return self.execute(model, 'unlink', ids)
     
     def fields_get(
@@ -279,6 +877,34 @@ class OdooClient:
         
         return self.execute(model, 'fields_get', [], **kwargs)
     
+    def batch(self, max_calls: Optional[int] = None) -> OdooBatch:
+        """
+        Crea un lote de llamadas que se envían juntas en una sola petición.
+        
+        Requiere el módulo odoo_migration_helper instalado en el servidor.
+        
+        Args:
+            max_calls: Si se indica, envía el lote cada vez que se acumulan
+                       este número de llamadas
+            
+        Returns:
+            OdooBatch para usar como context manager
+        """
+        return OdooBatch(self, max_calls=max_calls)
+    
+    def pool_stats(self) -> dict:
+        """
+        Retorna las estadísticas del pool de conexiones del servidor.
+        
+        Returns:
+            Diccionario con peticiones, conexiones creadas/reutilizadas,
+            esperas por conexión libre y conexiones abiertas
+        """
+        return self._pool.stats()
+    
     def __repr__(self) -> str:
         mode = "readonly" if self.readonly else "read/write"
-        return f"<OdooClient {self.url} db={self.db} user={self.username} mode={mode}>"
+        return (
+            f"<OdooClient {self.url} db={self.db} user={self.username} "
+            f"mode={mode} protocol={self.protocol}>"
+        )
@@ -0,0 +1,268 @@
+"""
+Control adaptativo de concurrencia (AIMD) para llamadas a Odoo.
+
+Un número fijo de hilos o infrautiliza los workers de v18 o los satura hasta
+provocar timeouts. `AIMDLimiter` ajusta el número de peticiones en vuelo como
+el control de congestión de TCP: suma 1 mientras la latencia se mantiene
+estable y reduce a la mitad cuando sube el p95 o aparecen errores de red.
+
+`AdaptiveConcurrency` mantiene un limitador por servidor y clase de método
+(lecturas frente a escrituras como `create_invoice_xmlrpc` o `action_post`)
+y se conecta a `OdooClient` con `client.set_limiter(...)`.
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+import http.client
+import math
+import socket
+import threading
+import time
+import xmlrpc.client
+from contextlib import contextmanager
+from typing import Optional
+
+
+# Métodos que solo leen; el resto se considera escritura
+READ_METHODS = {
+    'search',
+    'search_read',
+    'search_count',
+    'read',
+    'read_group',
+    'name_search',
+    'name_get',
+    'fields_get',
+    'default_get',
+}
+
+# Errores que indican saturación del servidor o de la red. Los
+# xmlrpc.client.Fault no cuentan: el servidor procesó la petición.
+OVERLOAD_ERRORS = (
+    socket.timeout,
+    ConnectionError,
+    http.client.HTTPException,
+    xmlrpc.client.ProtocolError,
+)
+
+
+def method_class(method: str) -> str:
+    """Clasifica un método como 'read' o 'write'."""
+    return 'read' if method in READ_METHODS else 'write'
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+class AIMDLimiter:
+    """
+    Limitador de peticiones en vuelo con aumento aditivo y reducción
+    multiplicativa, seguro entre hilos.
+
+    Cada `window` llamadas completadas compara el p95 de la ventana con la
+    latencia base (el mejor p95 observado): si lo supera en más de
+    `latency_tolerance` veces, o la tasa de errores supera `error_threshold`,
+    el límite se multiplica por `decrease`; si no, y el límite estaba en uso,
+    se suma `increase`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 2,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase: int = 1,
+        decrease: float = 0.5,
+        window: int = 20,
+        latency_tolerance: float = 2.0,
+        error_threshold: float = 0.05
+    ):
+        """
+        Args:
+            name: Nombre para informes (ej: 'http://v18:8069 write')
+            initial: Límite inicial de peticiones en vuelo
+            min_limit: Límite mínimo
+            max_limit: Límite máximo
+            increase: Cuánto sube el límite tras una ventana sana
+            decrease: Factor por el que se multiplica el límite al reducir
+            window: Llamadas completadas por ventana de evaluación
+            latency_tolerance: Cuántas veces la latencia base se tolera en el p95
+            error_threshold: Tasa de errores por ventana que provoca reducción
+        """
+        self.name = name
+        self.limit = max(min_limit, min(initial, max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self._latencies: list = []
+        self._errors = 0
+        self._saturated = False
+        self._cond = threading.Condition()
+        self._stats = {
+            'calls': 0,
+            'errors': 0,
+            'increases': 0,
+            'decreases': 0,
+            'wait_time': 0.0,
+            'max_limit_reached': self.limit,
+        }
+
+    def acquire(self):
+        """Espera hasta que haya cupo y ocupa una plaza."""
+        with self._cond:
+            started = None
+            while self.in_flight >= self.limit:
+                if started is None:
+                    started = time.monotonic()
+                self._cond.wait()
+            if started is not None:
+                self._stats['wait_time'] += time.monotonic() - started
+            self.in_flight += 1
+            if self.in_flight >= self.limit:
+                self._saturated = True
+
+    def release(self, duration: float, error: bool = False):
+        """
+        Libera una plaza y registra el resultado de la llamada.
+
+        Args:
+            duration: Duración de la llamada en segundos
+            error: True si la llamada falló por saturación o red
+        """
+        with self._cond:
+            self.in_flight -= 1
+            self._stats['calls'] += 1
+            self._latencies.append(duration)
+            if error:
+                self._errors += 1
+                self._stats['errors'] += 1
+            if len(self._latencies) >= self.window:
+                self._adjust()
+            self._cond.notify_all()
+
+    def _adjust(self):
+        """Evalúa la ventana actual y ajusta el límite (con el lock tomado)."""
+        p95 = _percentile(self._latencies, 0.95)
+        error_rate = self._errors / len(self._latencies)
+
+        if self.baseline is None or p95 < self.baseline:
+            self.baseline = p95
+
+        if error_rate > self.error_threshold or p95 > self.baseline * self.latency_tolerance:
+            new_limit = max(self.min_limit, int(self.limit * self.decrease))
+            if new_limit < self.limit:
+                self._stats['decreases'] += 1
+            self.limit = new_limit
+            # La latencia base se recalcula despacio para adaptarse a
+            # cambios reales de carga del servidor
+            self.baseline *= 1.1
+        elif self._saturated and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + self.increase)
+            self._stats['increases'] += 1
+            self._stats['max_limit_reached'] = max(
+                self._stats['max_limit_reached'], self.limit
+            )
+
+        self._latencies = []
+        self._errors = 0
+        self._saturated = self.in_flight >= self.limit
+
+    @contextmanager
+    def slot(self):
+        """Context manager que ocupa una plaza durante una llamada."""
+        self.acquire()
+        started = time.perf_counter()
+        error = False
+        try:
+            yield
+        except OVERLOAD_ERRORS:
+            error = True
+            raise
+        finally:
+            self.release(time.perf_counter() - started, error)
+
+    def stats(self) -> dict:
+        """Retorna el límite actual, la latencia base y los contadores."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['name'] = self.name
+            stats['limit'] = self.limit
+            stats['in_flight'] = self.in_flight
+            stats['baseline'] = self.baseline
+        return stats
+
+    def __repr__(self) -> str:
+        return f"<AIMDLimiter {self.name} limit={self.limit} in_flight={self.in_flight}>"
+
+
+class AdaptiveConcurrency:
+    """
+    Limitadores AIMD por (servidor, clase de método).
+
+    Example:
+        >>> concurrency = AdaptiveConcurrency(limits={'write': {'max_limit': 8}})
+        >>> odoo_v18.set_limiter(concurrency)
+        >>> # ... lanzar hilos que llaman a odoo_v18 ...
+        >>> concurrency.print_summary()
+    """
+
+    def __init__(self, limits: Optional[dict] = None, **defaults):
+        """
+        Args:
+            limits: (Opcional) Parámetros de AIMDLimiter por clase de método,
+                    ej: {'read': {'max_limit': 32}, 'write': {'max_limit': 8}}
+            **defaults: Parámetros de AIMDLimiter comunes a todas las clases
+        """
+        self.limits = limits or {}
+        self.defaults = defaults
+        self._limiters: dict = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, server: str, method: str) -> AIMDLimiter:
+        """Retorna el limitador del servidor para la clase del método."""
+        key = (server, method_class(method))
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(key)
+                if limiter is None:
+                    params = dict(self.defaults)
+                    params.update(self.limits.get(key[1], {}))
+                    limiter = AIMDLimiter(f"{server} {key[1]}", **params)
+                    self._limiters[key] = limiter
+        return limiter
+
+    def slot(self, server: str, method: str):
+        """Context manager que ocupa una plaza del limitador correspondiente."""
+        return self.limiter(server, method).slot()
+
+    def stats(self) -> list:
+        """Retorna las estadísticas de todos los limitadores."""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return [limiter.stats() for limiter in limiters]
+
+    def print_summary(self):
+        """Imprime el límite alcanzado por cada servidor y clase de método."""
+        print("\n" + "=" * 70)
+        print("CONCURRENCIA ADAPTATIVA")
+        print("=" * 70)
+        for stats in self.stats():
+            baseline = f"{stats['baseline'] * 1000:.0f} ms" if stats['baseline'] else "-"
+            print(
+                f"  {stats['name']}: límite {stats['limit']} "
+                f"(máx. {stats['max_limit_reached']}), llamadas {stats['calls']}, "
+                f"errores {stats['errors']}, base p95 {baseline}, "
+                f"+{stats['increases']}/-{stats['decreases']}"
+            )
@@ -0,0 +1,265 @@
+"""
+Métricas por llamada RPC a Odoo: latencias, tamaños de payload y registros.
+
+`RpcMetrics` se registra como hook de uno o varios `OdooClient` y agrupa las
+llamadas por (servidor, modelo, método). Al final de una ejecución se pueden
+volcar a JSON, a un fichero de texto con formato Prometheus o imprimir un
+resumen con p50/p95/p99 y llamadas por segundo.
+
+Uso:
+    >>> from odoo_metrics import RpcMetrics
+    >>> metrics = RpcMetrics()
+    >>> metrics.install(odoo_v13, odoo_v18)
+    >>> ...
+    >>> metrics.print_summary()
+    >>> metrics.dump_json('rpc_metrics.json')
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+import bisect
+import json
+import threading
+import time
+from typing import Optional
+
+
+# Límites superiores (segundos) de los buckets del histograma: escala
+# logarítmica de 1 ms a ~2 min
+LATENCY_BUCKETS = tuple(round(0.001 * 1.5 ** i, 6) for i in range(30))
+
+
+class LatencyHistogram:
+    """Histograma de latencias con buckets fijos y memoria constante."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Estima el percentil `q` (0-1) interpolando dentro del bucket.
+
+        Returns:
+            Latencia estimada en segundos, None si no hay observaciones
+        """
+        if not self.count:
+            return None
+
+        target = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= target and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                fraction = (target - cumulative) / bucket_count
+                value = lower + (upper - lower) * fraction
+                return min(max(value, self.min), self.max)
+            cumulative += bucket_count
+        return self.max
+
+
+class _Series:
+    """Acumulados de un (servidor, modelo, método)."""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.records = 0
+
+
+class RpcMetrics:
+    """
+    Colector de métricas de llamadas RPC, seguro entre hilos.
+
+    Se usa como hook de `OdooClient` (ver `install`).
+    """
+
+    def __init__(self):
+        self._series: dict = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self._started_monotonic = time.monotonic()
+
+    def install(self, *clients):
+        """Registra este colector como hook en los clientes indicados."""
+        for client in clients:
+            client.add_hook(self.record)
+
+    def uninstall(self, *clients):
+        """Quita este colector de los clientes indicados."""
+        for client in clients:
+            client.remove_hook(self.record)
+
+    def record(self, event: dict):
+        """
+        Registra una llamada. Firma compatible con `OdooClient.add_hook`.
+
+        Args:
+            event: Diccionario con server, model, method, duration,
+                   request_bytes, response_bytes, records y error
+        """
+        key = (event['server'], event['model'], event['method'])
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = _Series()
+                self._series[key] = series
+            series.histogram.observe(event['duration'])
+            series.request_bytes += event['request_bytes']
+            series.response_bytes += event['response_bytes']
+            series.records += event['records']
+            if event.get('error'):
+                series.errors += 1
+
+    def reset(self):
+        """Descarta todas las métricas acumuladas."""
+        with self._lock:
+            self._series = {}
+            self.started = time.time()
+            self._started_monotonic = time.monotonic()
+
+    def to_dict(self) -> dict:
+        """
+        Retorna las métricas como diccionario serializable a JSON.
+
+        Returns:
+            Diccionario con el tiempo transcurrido y una entrada por
+            (servidor, modelo, método), ordenadas por tiempo total descendente
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._started_monotonic
+            calls = []
+            for (server, model, method), series in self._series.items():
+                histogram = series.histogram
+                calls.append({
+                    'server': server,
+                    'model': model,
+                    'method': method,
+                    'count': histogram.count,
+                    'errors': series.errors,
+                    'total_time': histogram.total,
+                    'mean': histogram.total / histogram.count if histogram.count else None,
+                    'min': histogram.min,
+                    'max': histogram.max,
+                    'p50': histogram.percentile(0.50),
+                    'p95': histogram.percentile(0.95),
+                    'p99': histogram.percentile(0.99),
+                    'calls_per_second': histogram.count / elapsed if elapsed else None,
+                    'request_bytes': series.request_bytes,
+                    'response_bytes': series.response_bytes,
+                    'records': series.records,
+                    'buckets': {
+                        str(bound): count
+                        for bound, count in zip(
+                            histogram.buckets + ('+Inf',), histogram.counts
+                        )
+                        if count
+                    },
+                })
+
+        calls.sort(key=lambda c: c['total_time'], reverse=True)
+        total_calls = sum(c['count'] for c in calls)
+        return {
+            'started': self.started,
+            'elapsed': elapsed,
+            'total_calls': total_calls,
+            'calls_per_second': total_calls / elapsed if elapsed else None,
+            'calls': calls,
+        }
+
+    def dump_json(self, path: str):
+        """Guarda las métricas en un fichero JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Retorna las métricas en formato de texto de Prometheus
+        (apto para el textfile collector de node_exporter).
+        """
+        lines = [
+            '# HELP odoo_rpc_duration_seconds Latencia de las llamadas RPC a Odoo.',
+            '# TYPE odoo_rpc_duration_seconds histogram',
+        ]
+        counters = {
+            'odoo_rpc_errors_total': ('Llamadas RPC con error.', 'errors'),
+            'odoo_rpc_request_bytes_total': ('Bytes enviados en peticiones RPC.', 'request_bytes'),
+            'odoo_rpc_response_bytes_total': ('Bytes recibidos en respuestas RPC.', 'response_bytes'),
+            'odoo_rpc_records_total': ('Registros retornados por llamadas RPC.', 'records'),
+        }
+        counter_lines = {name: [] for name in counters}
+
+        with self._lock:
+            for (server, model, method), series in sorted(self._series.items()):
+                labels = (
+                    f'server="{_escape(server)}",model="{_escape(model)}",'
+                    f'method="{_escape(method)}"'
+                )
+                histogram = series.histogram
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f'odoo_rpc_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(
+                    f'odoo_rpc_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}'
+                )
+                lines.append(f'odoo_rpc_duration_seconds_sum{{{labels}}} {histogram.total}')
+                lines.append(f'odoo_rpc_duration_seconds_count{{{labels}}} {histogram.count}')
+                for name, (_, attr) in counters.items():
+                    counter_lines[name].append(f'{name}{{{labels}}} {getattr(series, attr)}')
+
+        for name, (help_text, _) in counters.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            lines.extend(counter_lines[name])
+        return '\n'.join(lines) + '\n'
+
+    def dump_prometheus(self, path: str):
+        """Guarda las métricas en un fichero de texto con formato Prometheus."""
+        with open(path, 'w') as f:
+            f.write(self.to_prometheus())
+
+    def print_summary(self, top: int = 20):
+        """Imprime las llamadas que más tiempo acumulan."""
+        data = self.to_dict()
+        print("\n" + "=" * 70)
+        print("MÉTRICAS RPC")
+        print("=" * 70)
+        print(
+            f"Llamadas: {data['total_calls']} en {data['elapsed']:.1f}s "
+            f"({data['calls_per_second'] or 0:.1f}/s)"
+        )
+        print(
+            f"\n{'Modelo.método':45} {'N':>7} {'Total s':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'KB resp':>9}"
+        )
+        for call in data['calls'][:top]:
+            name = f"{call['model']}.{call['method']}"
+            print(
+                f"{name[:45]:45} {call['count']:>7} {call['total_time']:>9.1f} "
+                f"{call['p50'] * 1000:>8.1f} {call['p95'] * 1000:>8.1f} "
+                f"{call['p99'] * 1000:>8.1f} {call['response_bytes'] / 1024:>9.1f}"
+            )
+
+
+def _escape(value: str) -> str:
+    """Escapa un valor de etiqueta Prometheus."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Migration Helper - Invoice Creation via XML-RPC',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.6.0',
     'category': 'Technical',
     'summary': 'Helper module to create invoices via XML-RPC for migration from v13 to v18',
     'description': """
@@ -17,6 +17,12 @@ a simple wrapper method that can be called via XML-RPC.
 Features:
 ---------
 * create_invoice_xmlrpc: Creates a single invoice and returns its ID
+* create_invoices_xmlrpc: Creates many invoices, optionally with their tracking rows
+* create_payments_xmlrpc / create_partners_xmlrpc: Same for payments and partners
+* batch_execute: Runs a list of model method calls in one request
+* post_moves / post_payments: Post many records in one request, one savepoint each
+* match_automatic_lines: Sets x_v13_id on the automatic lines of a migrated move
+* create_tracking: Creates the migration.tracking rows of a batch in one request
 * Fully compatible with XML-RPC
 * Handles invoice lines and taxes
 * Returns integer ID (not recordset)
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, api
+from odoo.api import call_kw
+from odoo.service.model import get_public_method
 
 
 class MigrationHelper(models.AbstractModel):
@@ -70,28 +72,335 @@ class MigrationHelper(models.AbstractModel):
         return invoice.id
 
     @api.model
-    def create_invoices_xmlrpc(self, vals_list):
+    def create_invoices_xmlrpc(self, vals_list, v13_ids=None, model_name='account.move'):
         """
         Create multiple invoices via XML-RPC.
         
         This method accepts a list of dictionaries and creates multiple invoices
         in a single call. More efficient than calling create_invoice_xmlrpc multiple times.
         
+        When v13_ids is given, the migration.tracking row of each invoice is
+        created in the same transaction (see create_tracking), so an invoice
+        never exists in v18 without its tracking row, even if posting it
+        fails later or the client loses the response.
+        
         Args:
             vals_list (list): List of dictionaries with invoice values
+            v13_ids (list, optional): v13 ID of each invoice, in the same
+                order as vals_list
+            model_name (str, optional): model_name of the tracking rows,
+                e.g. 'account.move.entry' for journal entries
             
         Returns:
             list: List of IDs of the created invoices
         """
+        return self._create_with_tracking('account.move', vals_list, v13_ids, model_name)
+
+    @api.model
+    def create_payments_xmlrpc(self, vals_list, v13_ids=None):
+        """
+        Create multiple payments via XML-RPC, like create_invoices_xmlrpc.
+        
+        Args:
+            vals_list (list): List of dictionaries with payment values
+            v13_ids (list, optional): v13 ID of each payment; their
+                'account.payment' tracking rows are created in the same
+                transaction
+            
+        Returns:
+            list: List of IDs of the created payments
+        """
+        return self._create_with_tracking(
+            'account.payment', vals_list, v13_ids, 'account.payment'
+        )
+
+    @api.model
+    def create_partners_xmlrpc(self, vals_list, v13_ids=None):
+        """
+        Create multiple partners via XML-RPC, like create_invoices_xmlrpc.
+        
+        Args:
+            vals_list (list): List of dictionaries with partner values
+            v13_ids (list, optional): v13 ID of each partner; their
+                'res.partner' tracking rows are created in the same
+                transaction
+            
+        Returns:
+            list: List of IDs of the created partners
+        """
+        return self._create_with_tracking('res.partner', vals_list, v13_ids, 'res.partner')
+
+    def _create_with_tracking(self, model, vals_list, v13_ids, model_name):
+        """Create records and, if v13_ids is given, their tracking rows."""
         # Ensure we're working with a list
         if not isinstance(vals_list, list):
             raise ValueError("vals_list must be a list of dictionaries")
+        if v13_ids is not None and len(v13_ids) != len(vals_list):
+            raise ValueError("v13_ids must have one ID per record")
+        
+        records = self.env[model].create(vals_list)
+        
+        if v13_ids is not None:
+            self.create_tracking([
+                {
+                    'name': '%s:%s' % (model_name, v13_id),
+                    'model_name': model_name,
+                    'v13_id': v13_id,
+                    'v18_id': record.id,
+                }
+                for v13_id, record in zip(v13_ids, records)
+            ])
+        
+        # Return the list of IDs (not the recordset)
+        return records.ids
+
+    @api.model
+    def batch_execute(self, calls):
+        """
+        Execute several model methods in a single XML-RPC request.
+        
+        Each call runs inside its own savepoint, so a failing call is rolled
+        back without affecting the others. Results are returned in the same
+        order as the calls.
+        
+        Args:
+            calls (list): List of [model, method, args, kwargs] entries.
+                args and kwargs are optional.
+                
+        Returns:
+            list: One dict per call, either {'ok': True, 'result': ...}
+                or {'ok': False, 'error': 'message'}
+                
+        Example usage via XML-RPC:
+            results = models.execute_kw(
+                db, uid, password,
+                'migration.helper', 'batch_execute',
+                [[
+                    ['account.move', 'action_post', [[42]], {}],
+                    ['account.move.line', 'search_read',
+                     [[('move_id', '=', 42)]], {'fields': ['account_id']}],
+                ]], {}
+            )
+        """
+        if not isinstance(calls, list):
+            raise ValueError("calls must be a list of [model, method, args, kwargs]")
         
-        # Create the invoices
-        invoices = self.env['account.move'].create(vals_list)
+        results = []
+        for call in calls:
+            try:
+                with self.env.cr.savepoint():
+                    result = self._batch_call(*call)
+                results.append({'ok': True, 'result': result})
+            except Exception as e:
+                results.append({'ok': False, 'error': str(e)})
+        return results
+
+    def _batch_call(self, model, method, args=None, kwargs=None):
+        """Run one call of batch_execute the same way execute_kw would."""
+        records = self.env[model]
+        # Same check as execute_kw: rejects private methods (leading underscore
+        # or @api.private) and raises AccessError
+        get_public_method(records, method)
+        result = call_kw(records, method, list(args or []), kwargs or {})
+        if isinstance(result, models.BaseModel):
+            result = result.ids
+        # None cannot be marshalled by XML-RPC (e.g. action_post)
+        return False if result is None else result
+
+    @api.model
+    def post_moves(self, ids):
+        """
+        Post several account.move records in a single XML-RPC request.
         
-        # Return the list of IDs
-        return invoices.ids
+        Each move is posted inside its own savepoint, so a move that fails
+        validation is rolled back without affecting the others. Moves that
+        are already posted are reported as ok.
+        
+        Args:
+            ids (list): IDs of the account.move records to post
+            
+        Returns:
+            list: One dict per id, in the same order:
+                {'id': id, 'ok': True} or {'id': id, 'ok': False, 'error': 'message'}
+                
+        Example usage via XML-RPC:
+            statuses = models.execute_kw(
+                db, uid, password,
+                'migration.helper', 'post_moves',
+                [[42, 43, 44]], {}
+            )
+        """
+        return self._post_records('account.move', ids)
+
+    @api.model
+    def post_payments(self, ids):
+        """
+        Post several account.payment records in a single XML-RPC request.
+        
+        Same behaviour and return value as post_moves.
+        
+        Args:
+            ids (list): IDs of the account.payment records to post
+            
+        Returns:
+            list: One status dict per id, in the same order
+        """
+        return self._post_records('account.payment', ids)
+
+    def _post_records(self, model, ids):
+        """Call action_post on each record of model inside its own savepoint."""
+        if not isinstance(ids, list):
+            raise ValueError("ids must be a list of integers")
+        
+        records = self.env[model].browse(ids).exists()
+        existing = set(records.ids)
+        statuses = []
+        for record_id in ids:
+            if record_id not in existing:
+                statuses.append({
+                    'id': record_id,
+                    'ok': False,
+                    'error': "Record does not exist or has been deleted",
+                })
+                continue
+            record = self.env[model].browse(record_id)
+            if record.state == 'posted':
+                statuses.append({'id': record_id, 'ok': True})
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    record.action_post()
+                statuses.append({'id': record_id, 'ok': True})
+            except Exception as e:
+                statuses.append({'id': record_id, 'ok': False, 'error': str(e)})
+        return statuses
+
+    @api.model
+    def match_automatic_lines(self, move_id, lines_v13, tolerance=0.01):
+        """
+        Set x_v13_id on the automatic lines (taxes, receivable, payable) of a
+        migrated move.
+        
+        Lines of the move without x_v13_id are matched against the given v13
+        line descriptors: same account, same debit and credit within
+        `tolerance` and, for tax lines, same tax. v13 lines are indexed by
+        (account, tax, amount in cents), the same algorithm as the client
+        side line_matcher.py. All matches are written with a single UPDATE.
+        
+        Args:
+            move_id (int): ID of the account.move in v18
+            lines_v13 (list): v13 line descriptors, with account and tax
+                already mapped to v18 IDs:
+                {'id', 'account_id', 'tax_line_id', 'debit', 'credit'}
+            tolerance (float): Maximum difference on debit and on credit
+                
+        Returns:
+            dict: {
+                'matched': [[v18_line_id, v13_line_id], ...],
+                'unmatched_v18': [{'id': v18_line_id, 'reason': code}, ...],
+                'unmatched_v13': [{'id': v13_line_id, 'reason': code}, ...],
+            }
+            Reason codes: 'no_account', 'account', 'amount', 'tax', 'taken',
+            'no_v18_line'.
+        """
+        move = self.env['account.move'].browse(move_id).exists()
+        if not move:
+            raise ValueError("Move %s does not exist" % move_id)
+        
+        index = _AutomaticLineIndex(lines_v13, tolerance)
+        matched = []
+        unmatched_v18 = []
+        for line in move.line_ids.filtered(lambda l: not l.x_v13_id):
+            line_v13, reason = index.match(
+                line.account_id.id, line.tax_line_id.id, line.debit, line.credit
+            )
+            if line_v13 is None:
+                unmatched_v18.append({'id': line.id, 'reason': reason})
+            else:
+                matched.append([line.id, line_v13['id']])
+        
+        if matched:
+            self._write_x_v13_id(matched)
+        
+        return {
+            'matched': matched,
+            'unmatched_v18': unmatched_v18,
+            'unmatched_v13': index.unmatched(),
+        }
+
+    def _write_x_v13_id(self, pairs):
+        """Write x_v13_id on many move lines with one UPDATE statement."""
+        lines = self.env['account.move.line']
+        lines.flush_model(['x_v13_id'])
+        values = ', '.join(['(%s, %s)'] * len(pairs))
+        self.env.cr.execute(
+            "UPDATE account_move_line AS aml SET x_v13_id = v.v13_id "
+            "FROM (VALUES " + values + ") AS v(id, v13_id) "
+            "WHERE aml.id = v.id",
+            [value for pair in pairs for value in pair],
+        )
+        lines.invalidate_model(['x_v13_id'])
+
+    @api.model
+    def create_tracking(self, vals_list):
+        """
+        Create the migration.tracking rows of a batch in a single XML-RPC
+        request and a single transaction.
+        
+        Rows that already exist with the same model_name, v13_id and v18_id
+        are not created again and their ID is returned instead, so a batch
+        can be sent again safely after a network error.
+        
+        Args:
+            vals_list (list): One dict per row with name, model_name,
+                v13_id and v18_id
+                
+        Returns:
+            list: IDs of the tracking rows, in the same order as vals_list
+                
+        Example usage via XML-RPC:
+            tracking_ids = models.execute_kw(
+                db, uid, password,
+                'migration.helper', 'create_tracking',
+                [[
+                    {'name': 'account.move:10', 'model_name': 'account.move',
+                     'v13_id': 10, 'v18_id': 42},
+                ]], {}
+            )
+        """
+        if not isinstance(vals_list, list):
+            raise ValueError("vals_list must be a list of dictionaries")
+        
+        Tracking = self.env['migration.tracking']
+        existing = {}
+        if vals_list:
+            rows = Tracking.search_read(
+                [
+                    ('model_name', 'in', list({v['model_name'] for v in vals_list})),
+                    ('v13_id', 'in', list({v['v13_id'] for v in vals_list})),
+                ],
+                ['model_name', 'v13_id', 'v18_id'],
+                order='id',
+            )
+            for row in rows:
+                key = (row['model_name'], row['v13_id'], row['v18_id'])
+                existing.setdefault(key, row['id'])
+        
+        to_create = []
+        for vals in vals_list:
+            key = (vals['model_name'], vals['v13_id'], vals['v18_id'])
+            if key not in existing:
+                existing[key] = None
+                to_create.append(vals)
+        
+        created = Tracking.create(to_create) if to_create else Tracking
+        for vals, record in zip(to_create, created):
+            existing[(vals['model_name'], vals['v13_id'], vals['v18_id'])] = record.id
+        
+        return [
+            existing[(vals['model_name'], vals['v13_id'], vals['v18_id'])]
+            for vals in vals_list
+        ]
 
     @api.model
     def test_connection(self):
@@ -106,3 +415,91 @@ class MigrationHelper(models.AbstractModel):
             'message': 'Migration Helper module is installed and ready',
             'model': 'migration.helper',
         }
+
+
+class _AutomaticLineIndex:
+    """
+    v13 line descriptors bucketed by (account, tax, amount in cents).
+    
+    Server side copy of line_matcher.LineMatcher (the module cannot import
+    the migration scripts).
+    """
+
+    def __init__(self, lines_v13, tolerance):
+        self.tolerance = tolerance
+        self.tolerance_cents = int(round(tolerance * 100))
+        self.spread = self.tolerance_cents + 1
+        self.lines = list(lines_v13)
+        self.buckets = {}
+        self.taxes = {}
+        self.by_account = {}
+        self.unmapped_ids = set()
+        self.matched_ids = set()
+        for line in self.lines:
+            account = line.get('account_id')
+            if not account:
+                self.unmapped_ids.add(line['id'])
+                continue
+            tax = line.get('tax_line_id') or False
+            cents = round((line['debit'] - line['credit']) * 100)
+            self.buckets.setdefault((account, tax, cents), []).append(line)
+            self.taxes.setdefault((account, cents), set()).add(tax)
+            self.by_account.setdefault(account, []).append(line)
+
+    def _close(self, line, debit, credit):
+        # Compare whole cents: with floats, abs(100.0 - 100.01) > 0.01
+        return all(
+            abs(round(line[field] * 100) - round(amount * 100)) <= self.tolerance_cents
+            for field, amount in (('debit', debit), ('credit', credit))
+        )
+
+    def _candidate_keys(self, account, tax, cents):
+        offsets = [0]
+        for step in range(1, self.spread + 1):
+            offsets += [-step, step]
+        for offset in offsets:
+            amount = cents + offset
+            if tax:
+                yield (account, tax, amount)
+            else:
+                # Lines without tax accept any v13 line, preferring untaxed ones
+                taxes = self.taxes.get((account, amount), ())
+                for candidate_tax in sorted(taxes, key=lambda t: (t is not False, t)):
+                    yield (account, candidate_tax, amount)
+
+    def match(self, account, tax, debit, credit):
+        """Return (v13 descriptor, None) or (None, reason code)."""
+        tax = tax or False
+        if account not in self.by_account:
+            return None, 'account'
+        
+        cents = round((debit - credit) * 100)
+        for key in self._candidate_keys(account, tax, cents):
+            bucket = self.buckets.get(key)
+            if not bucket:
+                continue
+            for index, line in enumerate(bucket):
+                if self._close(line, debit, credit):
+                    del bucket[index]
+                    self.matched_ids.add(line['id'])
+                    return line, None
+        
+        same_amount = [
+            line for line in self.by_account[account]
+            if self._close(line, debit, credit)
+        ]
+        if not same_amount:
+            return None, 'amount'
+        if tax and not any(line.get('tax_line_id') == tax for line in same_amount):
+            return None, 'tax'
+        return None, 'taken'
+
+    def unmatched(self):
+        """v13 descriptors that were not matched, with their reason code."""
+        result = []
+        for line in self.lines:
+            if line['id'] in self.unmapped_ids:
+                result.append({'id': line['id'], 'reason': 'no_account'})
+            elif line['id'] not in self.matched_ids:
+                result.append({'id': line['id'], 'reason': 'no_v18_line'})
+        return result
@@ -0,0 +1,368 @@
+"""
+Transporte HTTP con pool de conexiones persistentes (keep-alive) para Odoo.
+
+`xmlrpc.client.ServerProxy` mantiene una única conexión HTTP y no es seguro
+compartirlo entre hilos. Este módulo ofrece un pool acotado de conexiones
+HTTP/1.1 por servidor que los hilos toman y devuelven de forma segura, un
+`Transport` de XML-RPC que lo utiliza y un transporte equivalente para el
+endpoint `/jsonrpc` de Odoo.
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+import http.client
+import itertools
+import json
+import threading
+import time
+import xmlrpc.client
+from collections import deque
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 300
+
+# Errores que indican que el servidor cerró una conexión keep-alive ociosa.
+# En ese caso se descarta la conexión y se reintenta una vez con una nueva.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones HTTP/1.1 persistentes hacia un servidor.
+
+    Las conexiones se crean bajo demanda hasta `maxsize`; si todas están en
+    uso, el hilo que pide una espera hasta que otro la devuelva.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        maxsize: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_TIMEOUT
+    ):
+        """
+        Inicializa el pool.
+
+        Args:
+            url: URL base del servidor (ej: http://localhost:8069)
+            maxsize: Número máximo de conexiones abiertas simultáneamente
+            timeout: Timeout de socket en segundos para cada conexión
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize debe ser mayor o igual a 1")
+
+        parts = urlsplit(url)
+        self.url = url.rstrip('/')
+        self.scheme = parts.scheme or 'http'
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port
+        self.maxsize = maxsize
+        self.timeout = timeout
+
+        self._idle: deque = deque()
+        self._created = 0
+        self._local = threading.local()
+        self._cond = threading.Condition()
+        self._stats = {
+            'requests': 0,
+            'connections_created': 0,
+            'connections_reused': 0,
+            'connections_discarded': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'errors': 0,
+        }
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        """Crea una nueva conexión (sin abrir el socket todavía)."""
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+        return http.client.HTTPConnection(
+            self.host, self.port, timeout=self.timeout
+        )
+
+    def acquire(self) -> http.client.HTTPConnection:
+        """
+        Toma una conexión del pool, creando una nueva si hay cupo.
+
+        Returns:
+            Conexión HTTP lista para usar en exclusiva por el hilo actual
+        """
+        with self._cond:
+            started = None
+            while not self._idle and self._created >= self.maxsize:
+                if started is None:
+                    started = time.monotonic()
+                    self._stats['waits'] += 1
+                self._cond.wait()
+            if started is not None:
+                self._stats['wait_time'] += time.monotonic() - started
+
+            if self._idle:
+                self._stats['connections_reused'] += 1
+                return self._idle.pop()
+
+            self._created += 1
+            self._stats['connections_created'] += 1
+
+        return self._new_connection()
+
+    def release(
+        self,
+        conn: http.client.HTTPConnection,
+        discard: bool = False
+    ):
+        """
+        Devuelve una conexión al pool.
+
+        Args:
+            conn: Conexión obtenida con `acquire`
+            discard: Si es True, la conexión se cierra en lugar de reutilizarse
+        """
+        if discard:
+            conn.close()
+        with self._cond:
+            if discard:
+                self._created -= 1
+                self._stats['connections_discarded'] += 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def request(
+        self,
+        handler: str,
+        body: bytes,
+        headers: Optional[dict] = None
+    ) -> tuple:
+        """
+        Envía un POST por una conexión del pool y lee la respuesta completa.
+
+        Si una conexión reutilizada había sido cerrada por el servidor, se
+        reintenta una vez con una conexión nueva.
+
+        Args:
+            handler: Ruta del endpoint (ej: '/xmlrpc/2/object')
+            body: Cuerpo de la petición
+            headers: Cabeceras adicionales
+
+        Returns:
+            Tupla (status, reason, headers, cuerpo de la respuesta en bytes)
+        """
+        all_headers = {'Connection': 'keep-alive'}
+        if headers:
+            all_headers.update(headers)
+
+        with self._cond:
+            self._stats['requests'] += 1
+        self._local.sizes = (len(body), 0)
+
+        while True:
+            conn = self.acquire()
+            reused = conn.sock is not None
+            try:
+                conn.request('POST', handler, body, all_headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except _STALE_CONNECTION_ERRORS:
+                self.release(conn, discard=True)
+                if not reused:
+                    self._count_error()
+                    raise
+                continue
+            except BaseException:
+                self.release(conn, discard=True)
+                self._count_error()
+                raise
+
+            self.release(conn, discard=resp.will_close)
+            self._local.sizes = (len(body), len(data))
+            return resp.status, resp.reason, resp.getheaders(), data
+
+    def last_request_sizes(self) -> tuple:
+        """
+        Retorna (bytes enviados, bytes recibidos) de la última petición hecha
+        por el hilo actual.
+        """
+        return getattr(self._local, 'sizes', (0, 0))
+
+    def _count_error(self):
+        with self._cond:
+            self._stats['errors'] += 1
+
+    def stats(self) -> dict:
+        """
+        Retorna estadísticas del pool.
+
+        Returns:
+            Diccionario con contadores de peticiones, conexiones creadas,
+            reutilizadas, descartadas, esperas y conexiones abiertas/ociosas
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats['open'] = self._created
+            stats['idle'] = len(self._idle)
+            stats['maxsize'] = self.maxsize
+        stats['url'] = self.url
+        return stats
+
+    def close(self):
+        """Cierra todas las conexiones ociosas del pool."""
+        with self._cond:
+            while self._idle:
+                self._idle.pop().close()
+                self._created -= 1
+
+    def __repr__(self) -> str:
+        return f"<ConnectionPool {self.url} maxsize={self.maxsize}>"
+
+
+_pools: dict = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(
+    url: str,
+    maxsize: int = DEFAULT_POOL_SIZE,
+    timeout: float = DEFAULT_TIMEOUT
+) -> ConnectionPool:
+    """
+    Retorna el pool compartido para un servidor, creándolo si no existe.
+
+    Todos los clientes que apuntan a la misma URL comparten el mismo pool.
+    Si se pide un `maxsize` mayor que el del pool existente, se amplía.
+
+    Args:
+        url: URL base del servidor
+        maxsize: Número máximo de conexiones
+        timeout: Timeout de socket en segundos
+
+    Returns:
+        ConnectionPool del servidor
+    """
+    key = url.rstrip('/')
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(key, maxsize=maxsize, timeout=timeout)
+            _pools[key] = pool
+        elif maxsize > pool.maxsize:
+            with pool._cond:
+                pool.maxsize = maxsize
+                pool._cond.notify_all()
+        return pool
+
+
+def pool_stats() -> list:
+    """Retorna las estadísticas de todos los pools creados en el proceso."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
+
+
+class PooledTransport(xmlrpc.client.Transport):
+    """
+    Transporte XML-RPC que envía cada petición por una conexión del pool.
+
+    A diferencia de `xmlrpc.client.Transport`, no guarda estado de conexión
+    propio, por lo que un mismo `ServerProxy` puede usarse desde varios hilos.
+    """
+
+    def __init__(self, pool: ConnectionPool, use_datetime: bool = False):
+        super().__init__(use_datetime=use_datetime)
+        self.pool = pool
+
+    def request(self, host, handler, request_body, verbose=False):
+        status, reason, headers, data = self.pool.request(
+            handler,
+            request_body,
+            {
+                'Content-Type': 'text/xml',
+                'User-Agent': self.user_agent,
+            },
+        )
+        if status != 200:
+            raise xmlrpc.client.ProtocolError(
+                host + handler, status, reason, dict(headers)
+            )
+
+        parser, unmarshaller = self.getparser()
+        parser.feed(data)
+        parser.close()
+        return unmarshaller.close()
+
+    def close(self):
+        """Las conexiones pertenecen al pool; no hay nada que cerrar aquí."""
+        pass
+
+
+class JsonRpcTransport:
+    """
+    Transporte para el endpoint `/jsonrpc` de Odoo sobre el pool de conexiones.
+
+    Expone los mismos servicios que XML-RPC ('common', 'object') y convierte
+    los errores del servidor en `xmlrpc.client.Fault`, de modo que el código
+    que captura errores de XML-RPC funciona igual con ambos protocolos.
+    """
+
+    handler = '/jsonrpc'
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self._ids = itertools.count(1)
+
+    def call(self, service: str, method: str, *args) -> Any:
+        """
+        Ejecuta `method` del servicio `service` en el servidor.
+
+        Args:
+            service: Servicio de Odoo ('common' u 'object')
+            method: Método del servicio (ej: 'authenticate', 'execute_kw')
+            *args: Argumentos posicionales del método
+
+        Returns:
+            Resultado de la llamada
+
+        Raises:
+            xmlrpc.client.Fault: Si el servidor retorna un error
+            xmlrpc.client.ProtocolError: Si la respuesta HTTP no es 200
+        """
+        request_id = next(self._ids)
+        payload = {
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'params': {'service': service, 'method': method, 'args': args},
+            'id': request_id,
+        }
+        body = json.dumps(payload).encode('utf-8')
+        status, reason, headers, data = self.pool.request(
+            self.handler, body, {'Content-Type': 'application/json'}
+        )
+        if status != 200:
+            raise xmlrpc.client.ProtocolError(
+                self.pool.url + self.handler, status, reason, dict(headers)
+            )
+
+        response = json.loads(data)
+        error = response.get('error')
+        if error:
+            error_data = error.get('data') or {}
+            raise xmlrpc.client.Fault(
+                error.get('code', 0),
+                error_data.get('debug')
+                or error_data.get('message')
+                or error.get('message', ''),
+            )
+        return response.get('result')
@@ -0,0 +1,222 @@
+"""
+Tubería de etapas con colas acotadas entre hilos.
+
+Cuando un proceso lee de v13, transforma y escribe en v18 uno detrás de otro,
+siempre hay un servidor esperando. `Pipeline` ejecuta cada etapa en su propio
+hilo y las une con colas de tamaño fijo: mientras la escritura trabaja con un
+lote, la lectura ya está trayendo los siguientes, y si la escritura se
+retrasa las colas se llenan y frenan a las etapas anteriores (sin acumular
+lotes en memoria).
+
+Cada etapa anota cuántos elementos procesó, cuánto tiempo estuvo trabajando,
+cuánto esperó a la etapa anterior y cuánto estuvo bloqueada por la
+siguiente; `report()` lo resume para ver cuál es el cuello de botella.
+
+Uso:
+    >>> pipeline = Pipeline(
+    ...     read_batches(),                     # lectura (iterable)
+    ...     [('transformación', transform), ('escritura', write)],
+    ...     queue_size=2,
+    ... )
+    >>> for result in pipeline.run():
+    ...     pass
+    >>> print(pipeline.report())
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+
+DEFAULT_QUEUE_SIZE = 2
+
+# Cada cuánto revisan las etapas bloqueadas si la tubería se detuvo
+_POLL_INTERVAL = 0.1
+
+_END = object()
+
+
+class _Failure:
+    """Excepción de una etapa, que viaja por las colas hasta el consumidor."""
+
+    def __init__(self, stage: str, error: BaseException):
+        self.stage = stage
+        self.error = error
+
+
+class StageStats:
+    """Contadores de una etapa."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0      # segundos trabajando
+        self.starved = 0.0   # segundos esperando a la etapa anterior
+        self.blocked = 0.0   # segundos esperando sitio en la cola siguiente
+
+    @property
+    def throughput(self) -> float:
+        """Elementos por segundo de trabajo."""
+        return self.items / self.busy if self.busy else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.name}: {self.items} en {self.busy:.1f} s "
+            f"({self.throughput:.2f}/s), esperando {self.starved:.1f} s, "
+            f"bloqueada {self.blocked:.1f} s"
+        )
+
+
+class Pipeline:
+    """
+    Tubería de una fuente y varias etapas, cada una en su propio hilo.
+
+    Los elementos salen en el mismo orden en que los produjo la fuente. Si
+    una etapa lanza una excepción, las demás se detienen y `run` la relanza.
+    """
+
+    def __init__(
+        self,
+        source: Iterable,
+        stages: list,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        source_name: str = 'lectura'
+    ):
+        """
+        Args:
+            source: Iterable que produce los elementos (primera etapa)
+            stages: Lista de tuplas (nombre, función) aplicadas en orden a
+                    cada elemento
+            queue_size: Elementos que caben en cada cola entre etapas
+            source_name: Nombre de la etapa fuente en las estadísticas
+        """
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = [StageStats(source_name)]
+        self.stats += [StageStats(name) for name, _ in stages]
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+
+    def _put(self, out: queue.Queue, item, stats: StageStats) -> bool:
+        """Encola respetando la contrapresión; False si la tubería se detuvo."""
+        started = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    out.put(item, timeout=_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            stats.blocked += time.perf_counter() - started
+
+    def _get(self, source: queue.Queue, stats: StageStats):
+        started = time.perf_counter()
+        try:
+            while True:
+                try:
+                    return source.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        return _END
+        finally:
+            stats.starved += time.perf_counter() - started
+
+    def _run_source(self, out: queue.Queue):
+        stats = self.stats[0]
+        iterator = iter(self.source)
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    stats.busy += time.perf_counter() - started
+                stats.items += 1
+                if not self._put(out, item, stats):
+                    return
+        except BaseException as e:
+            self._put(out, _Failure(stats.name, e), stats)
+            return
+        finally:
+            # Un generador a medias libera sus recursos (p. ej. la precarga)
+            if hasattr(iterator, 'close'):
+                iterator.close()
+        self._put(out, _END, stats)
+
+    def _run_stage(
+        self,
+        func: Callable,
+        stats: StageStats,
+        source: queue.Queue,
+        out: queue.Queue
+    ):
+        while True:
+            item = self._get(source, stats)
+            if item is _END or isinstance(item, _Failure):
+                self._put(out, item, stats)
+                return
+            started = time.perf_counter()
+            try:
+                result = func(item)
+            except BaseException as e:
+                self._put(out, _Failure(stats.name, e), stats)
+                return
+            finally:
+                stats.busy += time.perf_counter() - started
+            stats.items += 1
+            if not self._put(out, result, stats):
+                return
+
+    def run(self) -> Iterator:
+        """
+        Arranca los hilos y entrega los resultados de la última etapa.
+
+        Raises:
+            La excepción de la primera etapa que falle
+        """
+        queues = [
+            queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)
+        ]
+        threads = [
+            threading.Thread(target=self._run_source, args=(queues[0],), daemon=True)
+        ]
+        for index, (name, func) in enumerate(self.stages):
+            threads.append(threading.Thread(
+                target=self._run_stage,
+                args=(func, self.stats[index + 1], queues[index], queues[index + 1]),
+                name=f"pipeline-{name}",
+                daemon=True,
+            ))
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            # Si el consumidor deja de iterar o algo falla, se detienen las
+            # etapas que sigan trabajando
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.elapsed = time.perf_counter() - started
+
+    def report(self) -> str:
+        """Resumen de rendimiento por etapa."""
+        lines = [f"Tubería: {self.elapsed:.1f} s en total"]
+        lines += [f"  - {stats!r}" for stats in self.stats]
+        return '\n'.join(lines)
@@ -0,0 +1,389 @@
+"""
+Datos de referencia de v13 y v18: monedas, países, provincias, diarios y
+cuentas.
+
+Son tablas pequeñas que no cambian durante la migración, pero los scripts
+las consultaban fila a fila (monedas por nombre, diarios con `ilike`,
+cuentas por código, países y provincias por partner) con cachés propias en
+atributos de función. `ReferenceData` las descarga de los dos servidores una
+sola vez, con todas las consultas en paralelo, las indexa por ID, nombre y
+código y guarda una instantánea en disco (REFERENCE_DATA_FILE) para que la
+siguiente ejecución no tenga que pedirlas mientras no caduque
+(REFERENCE_DATA_TTL segundos). La instantánea recuerda de qué servidores y
+bases de datos viene y no se usa si los scripts apuntan a otros.
+
+Si una búsqueda no encuentra el registro (p. ej. un diario o una cuenta
+creados después de la instantánea), se consulta una vez en el servidor y el
+resultado, encontrado o no, se recuerda. Los scripts que crean registros de
+referencia llaman a `invalidate_reference_data` para descartar la instantánea.
+
+Uso:
+    >>> reference = get_reference_data()
+    >>> reference.currency_id('USD')
+    >>> reference.account_id('430000')
+    >>> reference.journal_id('Facturas de cliente')
+    >>> reference.v18_id('res.country.state', partner['state_id'][0])
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+from connections import odoo_v13, odoo_v18
+from migration_utils import databases
+
+
+REFERENCE_DATA_FILE = os.getenv('REFERENCE_DATA_FILE', '.reference_data.json')
+REFERENCE_DATA_TTL = int(os.getenv('REFERENCE_DATA_TTL', '86400'))
+
+# Campos leídos de cada tabla (los mismos en v13 y v18)
+REFERENCE_FIELDS = {
+    'res.currency': ['name'],
+    'res.country': ['name', 'code'],
+    'res.country.state': ['name', 'code', 'country_id'],
+    'account.journal': ['name', 'code'],
+    'account.account': ['name', 'code'],
+}
+
+
+# Dominio de la consulta al servidor equivalente a cada búsqueda local
+_LOOKUP_DOMAINS = {
+    'by_id': ('id', '='),
+    'by_name': ('name', '='),
+    'by_code': ('code', '='),
+    'search_name': ('name', 'ilike'),
+}
+
+
+def _many2one_id(value) -> Optional[int]:
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return value or None
+
+
+class ReferenceTable:
+    """
+    Registros de una tabla de referencia de un servidor, indexados por ID,
+    nombre y código.
+
+    Los registros se guardan en el orden en que los devolvió el servidor
+    (su orden por defecto), así que `search_name` devuelve el mismo registro
+    que una búsqueda `ilike` con `limit=1`.
+    """
+
+    def __init__(self, model: str, records: list):
+        """
+        Args:
+            model: Nombre del modelo
+            records: Registros leídos con `search_read`
+        """
+        self.model = model
+        self.records = []
+        self._by_id = {}
+        self._by_name = {}
+        self._by_code = {}
+        for record in records:
+            self.add(record)
+
+    def add(self, record: dict):
+        """Añade un registro a la tabla y a sus índices."""
+        if record['id'] in self._by_id:
+            return
+        self.records.append(record)
+        self._by_id[record['id']] = record
+        if record.get('name'):
+            self._by_name.setdefault(record['name'], record)
+        if record.get('code'):
+            self._by_code.setdefault(record['code'], record)
+
+    def by_id(self, record_id: int) -> Optional[dict]:
+        """Registro con ese ID, o None."""
+        return self._by_id.get(record_id)
+
+    def by_name(self, name: str) -> Optional[dict]:
+        """Primer registro con ese nombre exacto, o None."""
+        return self._by_name.get(name)
+
+    def by_code(self, code: str) -> Optional[dict]:
+        """Primer registro con ese código exacto, o None."""
+        return self._by_code.get(code)
+
+    def search_name(self, text: str) -> Optional[dict]:
+        """Primer registro cuyo nombre contiene el texto (como `ilike`)."""
+        text = text.lower()
+        for record in self.records:
+            if text in (record.get('name') or '').lower():
+                return record
+        return None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+class ReferenceData:
+    """
+    Tablas de referencia de v13 y v18.
+
+    Además de las búsquedas por nombre y código en v18, `v18_id` traduce un
+    ID de v13 al de v18 por su clave natural: nombre de la moneda, código del
+    país, país y código de la provincia, código del diario o de la cuenta.
+
+    Con `clients`, una búsqueda sin resultado se repite una vez en el
+    servidor; el registro encontrado se añade a la tabla y los que no
+    existen se recuerdan para no volver a consultarlos.
+    """
+
+    def __init__(
+        self,
+        tables: dict,
+        loaded_at: Optional[float] = None,
+        source: Optional[dict] = None,
+        clients: Optional[dict] = None
+    ):
+        """
+        Args:
+            tables: Diccionario (servidor, modelo) -> lista de registros
+            loaded_at: Momento de la descarga (por defecto, ahora)
+            source: (Opcional) Servidor y base de datos de cada servidor
+                    ('v13' / 'v18') de los que vienen las tablas
+            clients: (Opcional) Diccionario servidor -> OdooClient para
+                     consultar los registros que no están en las tablas
+        """
+        self.loaded_at = loaded_at or time.time()
+        self.source = source
+        self.clients = clients
+        self._misses = set()
+        self._lock = threading.Lock()
+        self.tables = {
+            key: ReferenceTable(key[1], records) for key, records in tables.items()
+        }
+
+    @classmethod
+    def fetch(
+        cls,
+        clients: dict,
+        models: Optional[Iterable[str]] = None,
+        source: Optional[dict] = None
+    ) -> 'ReferenceData':
+        """
+        Descarga las tablas de los servidores, todas las consultas en paralelo.
+
+        Args:
+            clients: Diccionario servidor ('v13' / 'v18') -> OdooClient
+            models: (Opcional) Modelos a descargar. Por defecto todos los de
+                    REFERENCE_FIELDS.
+            source: (Opcional) Servidor y base de datos de los clientes, que
+                    se guarda con la instantánea
+        """
+        keys = [
+            (server, model)
+            for server in clients
+            for model in (models or REFERENCE_FIELDS)
+        ]
+
+        def fetch_table(key):
+            server, model = key
+            return clients[server].search_read(model, [], fields=REFERENCE_FIELDS[model])
+
+        with ThreadPoolExecutor(max_workers=len(keys)) as executor:
+            results = executor.map(fetch_table, keys)
+            return cls(dict(zip(keys, results)), source=source, clients=clients)
+
+    def save(self, path: str):
+        """Guarda una instantánea en un fichero JSON (escritura atómica)."""
+        snapshot = {
+            'loaded_at': self.loaded_at,
+            'source': self.source,
+            'tables': [
+                [server, model, table.records]
+                for (server, model), table in self.tables.items()
+            ],
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        ttl: Optional[float] = None,
+        source: Optional[dict] = None,
+        clients: Optional[dict] = None
+    ) -> Optional['ReferenceData']:
+        """
+        Abre una instantánea guardada con `save`.
+
+        Args:
+            path: Fichero JSON
+            ttl: (Opcional) Segundos que la instantánea se considera válida
+            source: (Opcional) Servidores y bases de datos esperados
+            clients: (Opcional) Clientes para las búsquedas sin resultado
+
+        Returns:
+            ReferenceData, o None si el fichero no existe, no se puede leer,
+            ha caducado o viene de otros servidores o bases de datos
+        """
+        try:
+            with open(path, 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if ttl is not None and time.time() - snapshot['loaded_at'] > ttl:
+            return None
+        if source is not None and snapshot.get('source') != source:
+            return None
+        tables = {
+            (server, model): records for server, model, records in snapshot['tables']
+        }
+        return cls(tables, snapshot['loaded_at'], snapshot.get('source'), clients)
+
+    def table(self, server: str, model: str) -> ReferenceTable:
+        """Tabla de un servidor ('v13' o 'v18')."""
+        return self.tables[(server, model)]
+
+    def _record(self, server: str, model: str, lookup: str, value) -> Optional[dict]:
+        table = self.table(server, model)
+        record = getattr(table, lookup)(value)
+        if record is not None or not value:
+            return record
+        field, operator = _LOOKUP_DOMAINS[lookup]
+        return self._search(server, model, [(field, operator, value)])
+
+    def _search(self, server: str, model: str, domain: list) -> Optional[dict]:
+        """
+        Busca en el servidor un registro que no está en la tabla y lo añade.
+        Cada dominio se consulta como mucho una vez.
+        """
+        if not self.clients:
+            return None
+        key = (server, model, repr(domain))
+        with self._lock:
+            if key in self._misses:
+                return None
+            records = self.clients[server].search_read(
+                model, domain, fields=REFERENCE_FIELDS[model], limit=1
+            )
+            if not records:
+                self._misses.add(key)
+                return None
+            self.table(server, model).add(records[0])
+            return records[0]
+
+    def _record_id(self, server: str, model: str, lookup: str, value) -> Optional[int]:
+        record = self._record(server, model, lookup, value)
+        return record['id'] if record else None
+
+    def currency_id(self, name: str) -> Optional[int]:
+        """ID en v18 de la moneda con ese nombre (p. ej. 'USD')."""
+        return self._record_id('v18', 'res.currency', 'by_name', name)
+
+    def country_id(self, code: str) -> Optional[int]:
+        """ID en v18 del país con ese código (p. ej. 'ES')."""
+        return self._record_id('v18', 'res.country', 'by_code', code)
+
+    def state_id(self, name: str) -> Optional[int]:
+        """ID en v18 de la primera provincia cuyo nombre contiene el texto."""
+        return self._record_id('v18', 'res.country.state', 'search_name', name)
+
+    def journal_id(self, name: str) -> Optional[int]:
+        """ID en v18 del primer diario cuyo nombre contiene el texto."""
+        return self._record_id('v18', 'account.journal', 'search_name', name)
+
+    def account_id(self, code: str) -> Optional[int]:
+        """ID en v18 de la cuenta con ese código."""
+        return self._record_id('v18', 'account.account', 'by_code', code)
+
+    def v18_id(self, model: str, v13_id: int) -> Optional[int]:
+        """
+        Traduce el ID de v13 de un registro de referencia a su ID en v18.
+
+        Returns:
+            ID en v18, o None si el registro no existe en v13 o no tiene
+            equivalente en v18
+        """
+        record = self._record('v13', model, 'by_id', v13_id)
+        if not record:
+            return None
+
+        if model == 'res.currency':
+            return self.currency_id(record['name'])
+        if model == 'res.country.state':
+            country_v18_id = self.v18_id('res.country', _many2one_id(record['country_id']))
+            for state in self.table('v18', model).records:
+                if (
+                    state['code'] == record['code']
+                    and _many2one_id(state['country_id']) == country_v18_id
+                ):
+                    return state['id']
+            if not country_v18_id:
+                return None
+            state = self._search('v18', model, [
+                ('code', '=', record['code']), ('country_id', '=', country_v18_id)
+            ])
+            return state['id'] if state else None
+        return self._record_id('v18', model, 'by_code', record['code'])
+
+    def __repr__(self) -> str:
+        sizes = ', '.join(
+            f"{server}:{model}={len(table)}"
+            for (server, model), table in self.tables.items()
+        )
+        return f"<ReferenceData {sizes}>"
+
+
+_reference_data: Optional[ReferenceData] = None
+_reference_data_lock = threading.Lock()
+
+
+def get_reference_data(refresh: bool = False) -> ReferenceData:
+    """
+    Retorna los datos de referencia, cargándolos la primera vez.
+
+    Usa la instantánea de REFERENCE_DATA_FILE si existe, no ha caducado y
+    viene de los mismos servidores y bases de datos; si no, descarga las
+    tablas de v13 y v18 y guarda una nueva instantánea.
+
+    Args:
+        refresh: Si es True, ignora la instantánea y descarga de nuevo
+    """
+    global _reference_data
+    with _reference_data_lock:
+        if _reference_data is not None and not refresh:
+            return _reference_data
+
+        source = databases()
+        clients = {'v13': odoo_v13, 'v18': odoo_v18}
+        reference = None
+        if REFERENCE_DATA_FILE and not refresh:
+            reference = ReferenceData.load(
+                REFERENCE_DATA_FILE, REFERENCE_DATA_TTL, source=source, clients=clients
+            )
+        if reference is None:
+            reference = ReferenceData.fetch(clients, source=source)
+            if REFERENCE_DATA_FILE:
+                reference.save(REFERENCE_DATA_FILE)
+        _reference_data = reference
+        return reference
+
+
+def invalidate_reference_data():
+    """
+    Descarta los datos de referencia cargados y la instantánea en disco.
+
+    La deben llamar los scripts que crean monedas, diarios, cuentas u otros
+    registros de referencia en v18, para que la siguiente carga los incluya.
+    """
+    global _reference_data
+    with _reference_data_lock:
+        _reference_data = None
+        if REFERENCE_DATA_FILE:
+            try:
+                os.remove(REFERENCE_DATA_FILE)
+            except FileNotFoundError:
+                pass
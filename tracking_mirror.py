@@ -0,0 +1,317 @@
+"""
+Réplica local en SQLite de 'migration.tracking' (Odoo v18).
+
+Cada script empezaba descargando de v18 toda la tabla de tracking de su
+modelo. `TrackingMirror` guarda una copia en un fichero SQLite con índices
+por (model_name, v13_id) y (model_name, v18_id): al arrancar solo pide a v18
+las filas con ID mayor que la última sincronizada, y las filas que crean los
+scripts se añaden en cuanto se crean.
+
+La réplica recuerda de qué servidor y base de datos de v18 viene: si los
+scripts apuntan a otra, `sync` la vacía y la vuelve a descargar entera. Al
+abrirla, `validate` comprueba además que v18 tiene las mismas filas hasta la
+última sincronizada (no se restauró la base, no se borraron filas ni
+apareció alguna con un ID menor) y, si no, también la vacía.
+
+Autor: andyengit
+Mantenedor: andyengit
+"""
+import sqlite3
+import threading
+from typing import Iterable, Iterator, Optional
+
+
+SYNC_PAGE_SIZE = 5000
+
+# SQLite admite como máximo 999 parámetros por consulta en versiones antiguas
+_MAX_PARAMS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracking (
+    id INTEGER PRIMARY KEY,
+    model_name TEXT NOT NULL,
+    v13_id INTEGER NOT NULL,
+    v18_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tracking_model_v13 ON tracking (model_name, v13_id);
+CREATE INDEX IF NOT EXISTS tracking_model_v18 ON tracking (model_name, v18_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value NOT NULL
+);
+"""
+
+
+def _source(client) -> str:
+    """Identifica el servidor y la base de datos de un cliente."""
+    return f"{client.url}/{client.db}"
+
+
+class TrackingMirror:
+    """
+    Copia local de 'migration.tracking', segura entre hilos.
+
+    Las filas conservan el ID que tienen en v18, así que sincronizar varias
+    veces o registrar una fila que luego llega por sincronización no crea
+    duplicados.
+
+    Example:
+        >>> mirror = TrackingMirror('.migration_tracking.sqlite3')
+        >>> mirror.validate(odoo_v18)
+        >>> mirror.sync(odoo_v18)
+        >>> mirror.lookup('res.partner', [10, 11], 'v13_id', 'v18_id')
+        {10: 2031, 11: 2032}
+    """
+
+    def __init__(self, path: str):
+        """
+        Abre (o crea) la réplica.
+
+        Args:
+            path: Fichero SQLite
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def _get_state(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM sync_state WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+            (key, value),
+        )
+
+    @property
+    def last_synced_id(self) -> int:
+        """Mayor ID de v18 traído por `sync`."""
+        return self._get_state("last_synced_id") or 0
+
+    @property
+    def source(self) -> Optional[str]:
+        """Servidor y base de datos de v18 de los que viene la réplica."""
+        return self._get_state("source")
+
+    def clear(self, source: Optional[str] = None):
+        """
+        Vacía la réplica.
+
+        Args:
+            source: (Opcional) Servidor y base de datos de la nueva réplica
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tracking")
+            self._conn.execute("DELETE FROM sync_state")
+            if source:
+                self._set_state("source", source)
+
+    def validate(self, client) -> bool:
+        """
+        Comprueba que la réplica corresponde a lo que hay ahora en v18 y, si
+        no (viene de otro servidor o base de datos, o v18 no tiene las mismas
+        filas hasta la última sincronizada), la vacía.
+
+        Hace dos consultas a v18, así que se llama una vez al abrir la
+        réplica y no en cada `sync`.
+
+        Args:
+            client: OdooClient de v18
+
+        Returns:
+            True si la réplica era válida
+        """
+        if self._is_stale(client):
+            self.clear(_source(client))
+            return False
+        return True
+
+    def _is_stale(self, client) -> bool:
+        if self.source != _source(client):
+            return True
+        last_id = self.last_synced_id
+        if not last_id:
+            return False
+        latest = client.search_read(
+            "migration.tracking", [], fields=["id"], order="id desc", limit=1
+        )
+        if not latest or latest[0]["id"] < last_id:
+            return True
+        remote_count = client.search_count(
+            "migration.tracking", [("id", "<=", last_id)]
+        )
+        with self._lock:
+            local_count = self._conn.execute(
+                "SELECT COUNT(*) FROM tracking WHERE id <= ?", (last_id,)
+            ).fetchone()[0]
+        return remote_count != local_count
+
+    def sync(self, client, page_size: int = SYNC_PAGE_SIZE) -> int:
+        """
+        Trae de v18 las filas creadas desde la última sincronización.
+
+        Si la réplica viene de otro servidor o base de datos, la vacía y la
+        descarga de nuevo entera. No comprueba si v18 se restauró o perdió
+        filas; para eso está `validate`.
+
+        Args:
+            client: OdooClient de v18
+            page_size: Filas por petición
+
+        Returns:
+            Número de filas nuevas
+        """
+        if self.source != _source(client):
+            self.clear(_source(client))
+
+        count = 0
+        pages = client.search_read_pages(
+            "migration.tracking",
+            [("id", ">", self.last_synced_id)],
+            fields=["model_name", "v13_id", "v18_id"],
+            page_size=page_size,
+        )
+        for rows in pages:
+            with self._lock, self._conn:
+                self._insert(rows)
+                self._set_state("last_synced_id", rows[-1]["id"])
+            count += len(rows)
+        return count
+
+    def _insert(self, rows: Iterable[dict]):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO tracking (id, model_name, v13_id, v18_id) "
+            "VALUES (?, ?, ?, ?)",
+            [(r["id"], r["model_name"], r["v13_id"], r["v18_id"]) for r in rows],
+        )
+
+    def add(self, tracking_id: int, model_name: str, v13_id: int, v18_id: int):
+        """Registra una fila recién creada en v18 por este proceso."""
+        self.add_many([{
+            "id": tracking_id,
+            "model_name": model_name,
+            "v13_id": v13_id,
+            "v18_id": v18_id,
+        }])
+
+    def add_many(self, rows: Iterable[dict]):
+        """
+        Registra filas de tracking leídas o creadas en v18.
+
+        Args:
+            rows: Diccionarios con id, model_name, v13_id y v18_id
+        """
+        with self._lock, self._conn:
+            self._insert(rows)
+
+    def discard(self, model_name: str, v13_id: int):
+        """
+        Borra de la réplica las filas de un registro de v13 (p. ej. porque su
+        fila de tracking se borró o corrigió a mano en v18). La siguiente
+        búsqueda va a v18.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM tracking WHERE model_name = ? AND v13_id = ?",
+                (model_name, v13_id),
+            )
+
+    def lookup(
+        self,
+        model_name: Optional[str],
+        ids: Iterable[int],
+        from_field: str,
+        to_field: str
+    ) -> dict:
+        """
+        Traduce IDs con la réplica.
+
+        Args:
+            model_name: Modelo en v18, o None para buscar en todos
+            ids: IDs a traducir
+            from_field: 'v13_id' o 'v18_id'
+            to_field: El campo contrario
+
+        Returns:
+            Diccionario id -> id traducido. Si hay varias filas para el mismo
+            ID, gana la de menor ID de tracking.
+        """
+        ids = list(dict.fromkeys(ids))
+        result = {}
+        with self._lock:
+            for start in range(0, len(ids), _MAX_PARAMS):
+                chunk = ids[start:start + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                query = (
+                    f"SELECT {from_field}, {to_field} FROM tracking "
+                    f"WHERE {from_field} IN ({placeholders})"
+                )
+                params = list(chunk)
+                if model_name:
+                    query += " AND model_name = ?"
+                    params.append(model_name)
+                query += " ORDER BY id"
+                for source_id, target_id in self._conn.execute(query, params):
+                    result.setdefault(source_id, target_id)
+        return result
+
+    def rows(
+        self,
+        models: Iterable[str],
+        after_id: int = 0,
+        upto_id: Optional[int] = None
+    ) -> Iterator[dict]:
+        """
+        Recorre las filas de los modelos indicados ordenadas por ID.
+
+        Args:
+            models: Modelos en v18
+            after_id: Solo filas con ID mayor que este
+            upto_id: (Opcional) Solo filas con ID menor o igual que este
+        """
+        models = list(models)
+        placeholders = ",".join("?" * len(models))
+        query = (
+            "SELECT id, model_name, v13_id, v18_id FROM tracking "
+            f"WHERE model_name IN ({placeholders}) AND id > ?"
+        )
+        params = models + [after_id]
+        if upto_id is not None:
+            query += " AND id <= ?"
+            params.append(upto_id)
+        query += " ORDER BY id"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for tracking_id, model_name, v13_id, v18_id in rows:
+            yield {
+                "id": tracking_id,
+                "model_name": model_name,
+                "v13_id": v13_id,
+                "v18_id": v18_id,
+            }
+
+    def count(self, model_name: Optional[str] = None) -> int:
+        """Número de filas de la réplica, de un modelo o en total."""
+        with self._lock:
+            if model_name:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM tracking WHERE model_name = ?", (model_name,)
+                ).fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM tracking").fetchone()
+        return row[0]
+
+    def close(self):
+        """Cierra el fichero SQLite."""
+        with self._lock:
+            self._conn.close()
+
+    def __repr__(self) -> str:
+        return f"<TrackingMirror {self.path} rows={self.count()}>"
@@ -8,6 +8,7 @@ Autor: andyengit
 Mantenedor: andyengit
 """
 from connections import odoo_v13, odoo_v18
+from migration_utils import get_v13_records, get_v18_ids
 
 BATCH_SIZE = 500
 
@@ -39,37 +40,36 @@ def update_distributor_ids():
     skipped_partner_not_migrated = 0
     errors = []
     
-    # Procesar en lotes
-    for offset in range(0, total, BATCH_SIZE):
-        batch_num = (offset // BATCH_SIZE) + 1
-        total_batches = (total + BATCH_SIZE - 1) // BATCH_SIZE
-        print(f"\n[Lote {batch_num}/{total_batches}] Procesando {offset} - {min(offset + BATCH_SIZE, total)}...")
-        
-        # 1. Obtener lote de contratos migrados
-        migrated_contracts = odoo_v18.search_read(
-            'migration.tracking',
-            [('model_name', '=', 'sale.subscription')],
-            fields=['v13_id', 'v18_id'],
-            offset=offset,
-            limit=BATCH_SIZE
-        )
+    # Procesar en lotes (paginación por ID, precargando el lote siguiente)
+    total_batches = (total + BATCH_SIZE - 1) // BATCH_SIZE
+    processed = 0
+    pages = odoo_v18.search_read_pages(
+        'migration.tracking',
+        [('model_name', '=', 'sale.subscription')],
+        fields=['v13_id', 'v18_id'],
+        page_size=BATCH_SIZE,
+        prefetch=True
+    )
+    
+    for batch_num, migrated_contracts in enumerate(pages, start=1):
+        print(f"\n[Lote {batch_num}/{total_batches}] Procesando {processed} - {processed + len(migrated_contracts)}...")
+        processed += len(migrated_contracts)
+        updated_before = updated
         
         # Crear mapeos
         v13_to_v18_contract = {c['v13_id']: c['v18_id'] for c in migrated_contracts}
         v13_contract_ids = list(v13_to_v18_contract.keys())
         
         # 2. Leer todos los invoice_partner_id de v13 en UNA llamada
-        v13_contracts = odoo_v13.search_read(
-            'contract.contract',
-            [('id', 'in', v13_contract_ids)],
-            fields=['id', 'invoice_partner_id']
+        v13_contracts, _ = get_v13_records(
+            v13_contract_ids, 'contract.contract', ['invoice_partner_id']
         )
         
         # Mapear v13_contract_id -> invoice_partner_v13_id
         contract_to_invoice_partner = {}
         invoice_partner_v13_ids = set()
         
-        for c in v13_contracts:
+        for c in v13_contracts.values():
             if c.get('invoice_partner_id'):
                 partner_v13_id = c['invoice_partner_id'][0]
                 contract_to_invoice_partner[c['id']] = partner_v13_id
@@ -80,18 +80,8 @@ def update_distributor_ids():
         if not invoice_partner_v13_ids:
             continue
         
-        # 3. Buscar todos los partners en migration.tracking en UNA llamada
-        partner_mappings = odoo_v18.search_read(
-            'migration.tracking',
-            [
-                ('model_name', '=', 'res.partner'),
-                ('v13_id', 'in', list(invoice_partner_v13_ids))
-            ],
-            fields=['v13_id', 'v18_id']
-        )
-        
-        # Mapear v13_partner -> v18_partner
-        partner_v13_to_v18 = {p['v13_id']: p['v18_id'] for p in partner_mappings}
+        # 3. Traducir todos los partners en UNA búsqueda (o desde caché/réplica)
+        partner_v13_to_v18 = get_v18_ids(invoice_partner_v13_ids, 'res.partner')
         
         # 4. Preparar actualizaciones
         for v13_contract_id, invoice_partner_v13_id in contract_to_invoice_partner.items():
@@ -112,7 +102,7 @@ def update_distributor_ids():
             except Exception as e:
                 errors.append(f"v18 {v18_contract_id}: {str(e)}")
         
-        print(f"   Actualizados en este lote: {updated - sum(1 for _ in range((offset // BATCH_SIZE) * BATCH_SIZE, updated))}")
+        print(f"   Actualizados en este lote: {updated - updated_before}")
     
     # Resumen
     print("\n" + "=" * 70)